@@ -1,11 +1,47 @@
-from slam_datagen.datasets.human_messages import build_human_messages_dataset
-from slam_datagen.datasets.merge_quality import (DatasetSample,
-                                                 build_merge_quality_dataset,
-                                                 write_merge_quality_dataset)
+"""Synthetic data generation for SLAM datasets.
+
+Public names are imported on first access, so importing the package does not
+load the dataset builders and their dependencies (Faker, pydantic_ai).
+"""
+
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from slam_datagen.datasets.human_messages import build_human_messages_dataset
+    from slam_datagen.datasets.merge_quality import (DatasetSample,
+                                                     build_merge_quality_dataset,
+                                                     iter_merge_quality_dataset,
+                                                     write_merge_quality_dataset)
+
+# Public name -> module defining it
+_EXPORTS: dict[str, str] = {
+    "DatasetSample": "slam_datagen.datasets.merge_quality",
+    "build_merge_quality_dataset": "slam_datagen.datasets.merge_quality",
+    "iter_merge_quality_dataset": "slam_datagen.datasets.merge_quality",
+    "write_merge_quality_dataset": "slam_datagen.datasets.merge_quality",
+    "build_human_messages_dataset": "slam_datagen.datasets.human_messages",
+}
 
 __all__ = [
     "DatasetSample",
     "build_merge_quality_dataset",
+    "iter_merge_quality_dataset",
     "write_merge_quality_dataset",
     "build_human_messages_dataset",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,539 @@
+"""Columnar, NumPy-backed persona generation.
+
+``PersonalDataGenerator.generate`` builds personas one at a time through dozens
+of Faker calls. The sampler here produces every attribute as a whole column:
+checksum-bearing identifiers (SSN, IBAN, VIN, credit card, ABA routing number)
+are assembled from NumPy digit matrices, and name-like fields are sampled from
+the same en_US data tables Faker uses.
+"""
+
+from __future__ import annotations
+
+import re
+import string
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from dataclasses import dataclass
+from datetime import date
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from slam_datagen.personal_data import ATTRIBUTE_PATHS, PersonalData
+from slam_datagen.utils.typing import NestedStrDict
+
+if TYPE_CHECKING:
+    from faker import Faker
+
+Column = list[str]
+
+_ATTRIBUTE_PATH_PARTS: tuple[tuple[str, ...], ...] = tuple(
+    tuple(path.split("__")) for path in ATTRIBUTE_PATHS
+)
+
+
+def _codes(text: str | bytes) -> np.ndarray:
+    raw = text.encode("utf-8") if isinstance(text, str) else text
+    return np.frombuffer(raw, dtype=np.uint8)
+
+
+_DIGITS = _codes(string.digits)
+_PATTERN_ALPHABETS: dict[int, np.ndarray] = {
+    ord("#"): _DIGITS,
+    ord("%"): _DIGITS[1:],
+    ord("$"): _DIGITS[2:],
+    ord("?"): _codes(string.ascii_uppercase),
+}
+_ALPHANUMERIC = _codes(string.ascii_uppercase + string.digits)
+_VIN_ALPHABET = _codes("1234567890ABCDEFGHJKLMNPRSTUVWXYZ")  # I, O, Q are restricted
+_VIN_WEIGHTS = np.array([8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2])
+_HEX = _codes("0123456789abcdef")
+_BLOOD_GROUPS: tuple[str, ...] = ("A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-")
+_MAX_AGE_DAYS = 115 * 365
+_MAX_EXPIRE_DAYS = 10 * 365
+_TEMPLATE_TOKEN = re.compile(r"\{\{(\w+)\}\}")
+
+
+def _build_vin_transliteration() -> np.ndarray:
+    table = np.zeros(256, dtype=np.int64)
+    for char in "0123456789":
+        table[ord(char)] = int(char)
+    for offset, letters in ((64, "ABCDEFGHI"), (73, "JKLMNOPQR"), (81, "STUVWXYZ")):
+        for char in letters:
+            table[ord(char)] = ord(char) - offset
+    return table
+
+
+_VIN_TRANSLITERATION = _build_vin_transliteration()
+
+
+@dataclass
+class PersonalDataColumns:
+    """Columnar batch of personas that can be viewed as ``PersonalData`` rows.
+
+    ``identifiers`` is keyed by identifier name and ``attributes`` by the
+    flattened attribute path (see ``ATTRIBUTE_PATHS``).
+    """
+
+    identifiers: dict[str, Column]
+    attributes: dict[str, Column]
+
+    def __len__(self) -> int:
+        return len(self.identifiers["name"])
+
+    def __getitem__(self, idx: int) -> PersonalData:
+        row = range(len(self))[idx]
+        attributes: dict[str, NestedStrDict] = {}
+        for parts, path in zip(_ATTRIBUTE_PATH_PARTS, ATTRIBUTE_PATHS):
+            cursor: dict[str, Any] = attributes
+            for key in parts[:-1]:
+                cursor = cursor.setdefault(key, {})
+            cursor[parts[-1]] = self.attributes[path][row]
+
+        return PersonalData(
+            unique_identifiers={
+                name: column[row] for name, column in self.identifiers.items()
+            },
+            attributes=attributes,
+        )
+
+    def __iter__(self) -> Iterator[PersonalData]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def column(self, path: str) -> Column:
+        if path in self.identifiers:
+            return self.identifiers[path]
+        return self.attributes[path]
+
+
+class ColumnarSampler:
+    """Draws whole persona attribute columns from a seeded NumPy generator."""
+
+    def __init__(
+        self,
+        fake: Faker,
+        seed: int | None = None,
+        reference_date: date | None = None,
+    ) -> None:
+        self._rng = np.random.default_rng(seed)
+        # Dates of birth and card expiry dates count from this day, pinned
+        # once so the columns only depend on the seed
+        self.reference_date = date.today() if reference_date is None else reference_date
+        self._reference_day = np.datetime64(self.reference_date, "D")
+
+        locale = fake["en_US"]
+        person = locale.provider("faker.providers.person")
+        address = locale.provider("faker.providers.address")
+        internet = locale.provider("faker.providers.internet")
+        company = locale.provider("faker.providers.company")
+        bank = locale.provider("faker.providers.bank")
+
+        self._first_names, self._first_name_weights = _weighted(person.first_names)
+        self._last_names, self._last_name_weights = _weighted(person.last_names)
+        self._street_suffixes = tuple(address.street_suffixes)
+        self._city_prefixes = tuple(address.city_prefixes)
+        self._city_suffixes = tuple(address.city_suffixes)
+        self._states_abbr = tuple(address.states_abbr)
+        self._building_number_formats = tuple(address.building_number_formats)
+        self._secondary_address_formats = tuple(address.secondary_address_formats)
+        self._postcode_formats = tuple(address.postcode_formats)
+        self._street_name_formats = tuple(address.street_name_formats)
+        self._street_address_formats = tuple(address.street_address_formats)
+        self._city_formats = tuple(address.city_formats)
+        self._address_formats = tuple(
+            fmt for fmt in address.address_formats if "military" not in fmt
+        )
+        self._user_name_formats = tuple(internet.user_name_formats)
+        self._free_email_domains = tuple(internet.free_email_domains)
+        self._tlds = tuple(internet.tlds)
+        self._image_services = tuple(internet.image_placeholder_services)
+        self._company_formats = tuple(company.formats)
+        self._company_suffixes = tuple(company.company_suffixes)
+        self._bank_country = bank.country_code
+        self._bban_format = bank.bban_format
+        self._license_formats = tuple(
+            locale.provider("faker.providers.automotive").license_formats
+        )
+        self._passport_formats = tuple(
+            locale.provider("faker.providers.passport").passport_number_formats
+        )
+        self._phone_formats = tuple(
+            locale.provider("faker.providers.phone_number").formats
+        )
+        self._card_types = tuple(
+            locale.provider("faker.providers.credit_card").credit_card_types.values()
+        )
+
+        self._tokens: dict[str, Callable[[int], Column]] = {
+            "first_name": self._first_name,
+            "last_name": self._last_name,
+            "company_suffix": lambda n: self._choice(self._company_suffixes, n),
+            "street_suffix": lambda n: self._choice(self._street_suffixes, n),
+            "city_prefix": lambda n: self._choice(self._city_prefixes, n),
+            "city_suffix": lambda n: self._choice(self._city_suffixes, n),
+            "state_abbr": lambda n: self._choice(self._states_abbr, n),
+            "building_number": lambda n: self._bothify(
+                self._building_number_formats, n
+            ),
+            "secondary_address": lambda n: self._bothify(
+                self._secondary_address_formats, n
+            ),
+            "postcode": lambda n: self._bothify(self._postcode_formats, n),
+            "street_name": lambda n: self._render(self._street_name_formats, n),
+            "street_address": lambda n: self._render(self._street_address_formats, n),
+            "city": lambda n: self._render(self._city_formats, n),
+            "user_name": self._user_name,
+            "domain_name": self._domain_name,
+            "free_email_domain": lambda n: self._choice(self._free_email_domains, n),
+        }
+
+    def reseed(self, seed: int | None) -> None:
+        self._rng = np.random.default_rng(seed)
+
+    def sample(self, n: int) -> PersonalDataColumns:
+        if n < 0:
+            raise ValueError("n must be non-negative")
+
+        card_number, card_provider, card_security_code = self._credit_cards(n)
+        bban, iban = self._bban_and_iban(n)
+        identifiers = {
+            "name": _join(self._first_name(n), " ", self._last_name(n)),
+            "ssn": self._ssn(n),
+        }
+        attributes = {
+            "profile__sex": self._choice(("F", "M"), n),
+            "profile__blood_group": self._choice(_BLOOD_GROUPS, n),
+            "profile__date_of_birth": self._dates_before_reference(n, _MAX_AGE_DAYS),
+            "profile__photo": self._image_url(n),
+            "car__license_plate": self._bothify(self._license_formats, n),
+            "car__vin": self._vin(n),
+            "bank_account__bank_country": [self._bank_country] * n,
+            "bank_account__bban": bban,
+            "bank_account__aba": self._aba(n),
+            "bank_account__iban": iban,
+            "bank_account__swift": self._swift(n),
+            "bank_account__credit_card__expire": self._card_expire(n),
+            "bank_account__credit_card__number": card_number,
+            "bank_account__credit_card__provider": card_provider,
+            "bank_account__credit_card__security_code": card_security_code,
+            "contacts__phone": self._bothify(self._phone_formats, n),
+            "contacts__email": self._email(n),
+            "contacts__website": self._url(n),
+            "contacts__telegram": self._user_name(n),
+            "contacts__social_networks__vk": self._user_name(n),
+            "contacts__social_networks__twitter": self._user_name(n),
+            "contacts__social_networks__linkedin": self._user_name(n),
+            "contacts__social_networks__facebook": self._user_name(n),
+            "internet_access_point__ipv4": self._ipv4(n),
+            "internet_access_point__ipv6": self._hex_groups(n, groups=8, width=4),
+            "internet_access_point__mac": self._hex_groups(n, groups=6, width=2),
+            "passports__national_passport_number": self._bothify(
+                self._passport_formats, n
+            ),
+            "passports__international_passport_number": self._bothify(
+                self._passport_formats, n
+            ),
+            "work__location": self._location(n),
+            "work__company": self._render(self._company_formats, n),
+            "work__address": self._render(self._address_formats, n),
+            "home__address": self._render(self._address_formats, n),
+            "home__location": self._location(n),
+        }
+        return PersonalDataColumns(identifiers=identifiers, attributes=attributes)
+
+    def _choice(
+        self,
+        values: Sequence[str],
+        n: int,
+        weights: np.ndarray | None = None,
+    ) -> Column:
+        indices = self._rng.choice(len(values), size=n, p=weights)
+        return [values[idx] for idx in indices.tolist()]
+
+    def _first_name(self, n: int) -> Column:
+        return self._choice(self._first_names, n, self._first_name_weights)
+
+    def _last_name(self, n: int) -> Column:
+        return self._choice(self._last_names, n, self._last_name_weights)
+
+    def _pattern_codes(self, pattern: str, n: int) -> np.ndarray:
+        template = _codes(pattern)
+        codes = np.tile(template, (n, 1))
+        for pos, char in enumerate(template.tolist()):
+            alphabet = _PATTERN_ALPHABETS.get(char)
+            if alphabet is not None:
+                codes[:, pos] = alphabet[self._rng.integers(0, len(alphabet), size=n)]
+        return codes
+
+    def _bothify(self, formats: Sequence[str], n: int) -> Column:
+        return self._per_format(
+            formats, n, lambda fmt, m: _to_strings(self._pattern_codes(fmt, m))
+        )
+
+    def _render(self, templates: Sequence[str], n: int) -> Column:
+        return self._per_format(templates, n, self._render_template)
+
+    def _render_template(self, template: str, n: int, bothify: bool = False) -> Column:
+        pieces: list[Column] = []
+        for idx, part in enumerate(_TEMPLATE_TOKEN.split(template)):
+            if idx % 2:
+                pieces.append(self._tokens[part](n))
+            elif part and bothify:
+                pieces.append(_to_strings(self._pattern_codes(part, n)))
+            elif part:
+                pieces.append([part] * n)
+        if not pieces:
+            return [""] * n
+        return ["".join(parts) for parts in zip(*pieces)]
+
+    def _per_format(
+        self,
+        formats: Sequence[str],
+        n: int,
+        expand: Callable[[str, int], Column],
+    ) -> Column:
+        choice = self._rng.integers(0, len(formats), size=n)
+        result = np.empty(n, dtype=object)
+        for fmt_idx in np.unique(choice).tolist():
+            rows = np.flatnonzero(choice == fmt_idx)
+            result[rows] = expand(formats[fmt_idx], len(rows))
+        return result.tolist()
+
+    def _ssn(self, n: int) -> Column:
+        area = self._rng.integers(1, 899, size=n)
+        area += area >= 666
+        group = self._rng.integers(1, 100, size=n)
+        serial = self._rng.integers(1, 10000, size=n)
+        return _to_strings(
+            np.hstack(
+                [
+                    _zero_padded(area, 3),
+                    _constant(n, "-"),
+                    _zero_padded(group, 2),
+                    _constant(n, "-"),
+                    _zero_padded(serial, 4),
+                ]
+            )
+        )
+
+    def _dates_before_reference(self, n: int, max_days: int) -> Column:
+        days = self._rng.integers(0, max_days + 1, size=n)
+        dates = self._reference_day - days.astype("timedelta64[D]")
+        return np.datetime_as_string(dates, unit="D").tolist()
+
+    def _card_expire(self, n: int) -> Column:
+        days = self._rng.integers(0, _MAX_EXPIRE_DAYS + 1, size=n)
+        dates = self._reference_day + days.astype("timedelta64[D]")
+        months = np.datetime_as_string(dates, unit="M").tolist()
+        return [f"{month[5:7]}/{month[2:4]}" for month in months]
+
+    def _image_url(self, n: int) -> Column:
+        services = self._rng.integers(0, len(self._image_services), size=n).tolist()
+        widths = self._rng.integers(1, 1025, size=n).tolist()
+        heights = self._rng.integers(1, 1025, size=n).tolist()
+        return [
+            self._image_services[service].format(width=width, height=height)
+            for service, width, height in zip(services, widths, heights)
+        ]
+
+    def _vin(self, n: int) -> Column:
+        codes = _VIN_ALPHABET[self._rng.integers(0, len(_VIN_ALPHABET), size=(n, 17))]
+        codes[:, 13:] = _DIGITS[self._rng.integers(0, 10, size=(n, 4))]
+        checksum = (_VIN_TRANSLITERATION[codes] * _VIN_WEIGHTS).sum(axis=1) % 11
+        codes[:, 8] = np.where(checksum == 10, ord("X"), checksum + ord("0"))
+        return _to_strings(codes)
+
+    def _bban_and_iban(self, n: int) -> tuple[Column, Column]:
+        bban = self._pattern_codes(self._bban_format, n)
+        check = _iban_check_digits(bban, _constant(n, self._bank_country + "00"))
+        iban = np.hstack(
+            [_constant(n, self._bank_country), _zero_padded(check, 2), bban]
+        )
+        return _to_strings(bban), _to_strings(iban)
+
+    def _aba(self, n: int) -> Column:
+        fed = self._rng.integers(1, 13, size=n)
+        digits = np.hstack(
+            [_zero_padded(fed, 2) - ord("0"), self._rng.integers(0, 10, size=(n, 6))]
+        ).astype(np.int64)
+        weighted = (
+            3 * (digits[:, 0] + digits[:, 3] + digits[:, 6])
+            + 7 * (digits[:, 1] + digits[:, 4] + digits[:, 7])
+            + digits[:, 2]
+            + digits[:, 5]
+        )
+        check = (-weighted) % 10
+        return _to_strings(np.hstack([digits, check[:, None]]) + ord("0"))
+
+    def _swift(self, n: int) -> Column:
+        bank_code = _random_codes(self._rng, _PATTERN_ALPHABETS[ord("?")], n, 4)
+        location_code = _random_codes(self._rng, _ALPHANUMERIC, n, 2)
+        branch_code = _random_codes(self._rng, _ALPHANUMERIC, n, 3)
+        codes = _to_strings(
+            np.hstack(
+                [
+                    bank_code,
+                    _constant(n, self._bank_country),
+                    location_code,
+                    branch_code,
+                ]
+            )
+        )
+        primary_only = self._rng.random(size=n) < 0.5
+        return [
+            code[:8] if short else code
+            for code, short in zip(codes, primary_only.tolist())
+        ]
+
+    def _credit_cards(self, n: int) -> tuple[Column, Column, Column]:
+        choice = self._rng.integers(0, len(self._card_types), size=n)
+        numbers = np.empty(n, dtype=object)
+        providers = np.empty(n, dtype=object)
+        security_codes = np.empty(n, dtype=object)
+
+        for type_idx in np.unique(choice).tolist():
+            rows = np.flatnonzero(choice == type_idx)
+            card = self._card_types[type_idx]
+            digits = self._card_digits(card.prefixes, card.length, len(rows))
+            numbers[rows] = _to_strings(digits + ord("0"))
+            providers[rows] = card.name
+            security_codes[rows] = _to_strings(
+                _random_codes(self._rng, _DIGITS, len(rows), card.security_code_length)
+            )
+
+        return numbers.tolist(), providers.tolist(), security_codes.tolist()
+
+    def _card_digits(self, prefixes: Sequence[str], length: int, n: int) -> np.ndarray:
+        digits = self._rng.integers(0, 10, size=(n, length))
+        prefix_choice = self._rng.integers(0, len(prefixes), size=n)
+        for prefix_idx in np.unique(prefix_choice).tolist():
+            rows = np.flatnonzero(prefix_choice == prefix_idx)
+            for pos, char in enumerate(prefixes[prefix_idx]):
+                if char == "#":
+                    continue
+                if char == "%":
+                    digits[rows, pos] = self._rng.integers(1, 10, size=len(rows))
+                else:
+                    digits[rows, pos] = int(char)
+        digits[:, -1] = _luhn_check_digit(digits[:, :-1])
+        return digits
+
+    def _user_name(self, n: int) -> Column:
+        names = self._per_format(
+            self._user_name_formats,
+            n,
+            lambda fmt, m: self._render_template(fmt, m, bothify=True),
+        )
+        return [name.lower() for name in names]
+
+    def _domain_name(self, n: int) -> Column:
+        return _join(
+            [name.lower() for name in self._last_name(n)],
+            ".",
+            self._choice(self._tlds, n),
+        )
+
+    def _email(self, n: int) -> Column:
+        free_domain = self._rng.random(size=n) < 0.5
+        free = self._choice(self._free_email_domains, n)
+        own = self._domain_name(n)
+        domains = [
+            free_value if use_free else own_value
+            for free_value, own_value, use_free in zip(free, own, free_domain.tolist())
+        ]
+        return _join(self._user_name(n), "@", domains)
+
+    def _url(self, n: int) -> Column:
+        schemes = self._choice(("http://", "https://"), n)
+        www = self._choice(("www.", ""), n)
+        return _join(schemes, www, self._domain_name(n), "/")
+
+    def _ipv4(self, n: int) -> Column:
+        octets = self._rng.integers(0, 256, size=(n, 4))
+        first = self._rng.integers(1, 222, size=n)
+        first += first >= 10
+        first += first >= 127
+        octets[:, 0] = first
+        return [".".join(map(str, row)) for row in octets.tolist()]
+
+    def _hex_groups(self, n: int, groups: int, width: int) -> Column:
+        digits = _random_codes(self._rng, _HEX, n, groups * width)
+        parts = [digits[:, idx * width : (idx + 1) * width] for idx in range(groups)]
+        separators = [_constant(n, ":")] * (groups - 1)
+        interleaved = [part for pair in zip(parts, separators) for part in pair]
+        return _to_strings(np.hstack(interleaved + [parts[-1]]))
+
+    def _location(self, n: int) -> Column:
+        latitudes = self._rng.uniform(-90.0, 90.0, size=n).tolist()
+        longitudes = self._rng.uniform(-180.0, 180.0, size=n).tolist()
+        return [
+            f"({latitude:.6f}, {longitude:.6f})"
+            for latitude, longitude in zip(latitudes, longitudes)
+        ]
+
+
+def _weighted(elements: Sequence[str] | Mapping[str, float]) -> tuple[
+    tuple[str, ...],
+    np.ndarray | None,
+]:
+    if isinstance(elements, Mapping):
+        weights = np.fromiter(elements.values(), dtype=np.float64)
+        return tuple(elements.keys()), weights / weights.sum()
+    return tuple(elements), None
+
+
+def _random_codes(
+    rng: np.random.Generator,
+    alphabet: np.ndarray,
+    n: int,
+    width: int,
+) -> np.ndarray:
+    return alphabet[rng.integers(0, len(alphabet), size=(n, width))]
+
+
+def _constant(n: int, text: str) -> np.ndarray:
+    return np.tile(_codes(text), (n, 1))
+
+
+def _zero_padded(values: np.ndarray, width: int) -> np.ndarray:
+    powers = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    return (values[:, None] // powers % 10 + ord("0")).astype(np.uint8)
+
+
+def _to_strings(codes: np.ndarray) -> Column:
+    codes = np.ascontiguousarray(codes, dtype=np.uint8)
+    n, width = codes.shape
+    if width == 0:
+        return [""] * n
+    raw = codes.view(f"S{width}").ravel()
+    if codes.max(initial=0) < 128:
+        return raw.astype(f"U{width}").tolist()
+    return [value.decode("utf-8") for value in raw.tolist()]
+
+
+def _join(*parts: Column | str) -> Column:
+    columns = [part for part in parts if not isinstance(part, str)]
+    n = len(columns[0]) if columns else 0
+    expanded = [[part] * n if isinstance(part, str) else part for part in parts]
+    return ["".join(values) for values in zip(*expanded)]
+
+
+def _iban_check_digits(bban: np.ndarray, country_tail: np.ndarray) -> np.ndarray:
+    # ISO 13616: move the country code and "00" to the end, map letters to
+    # 10..35 and compute 98 - (number mod 97)
+    remainder = np.zeros(len(bban), dtype=np.int64)
+    for column in np.hstack([bban, country_tail]).T.astype(np.int64):
+        is_letter = column >= ord("A")
+        remainder = np.where(
+            is_letter,
+            (remainder * 100 + column - 55) % 97,
+            (remainder * 10 + column - ord("0")) % 97,
+        )
+    return 98 - remainder
+
+
+def _luhn_check_digit(payload: np.ndarray) -> np.ndarray:
+    reversed_digits = payload[:, ::-1].astype(np.int64)
+    reversed_digits[:, 0::2] *= 2
+    reversed_digits[reversed_digits > 9] -= 9
+    return (10 - reversed_digits.sum(axis=1) % 10) % 10
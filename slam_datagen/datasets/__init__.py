@@ -1,15 +1,57 @@
-"""Datasets helpers for slam_datagen."""
-
-from slam_datagen.datasets.human_messages import (build_human_messages_dataset,
-                                                  write_human_messages_dataset)
-from slam_datagen.datasets.merge_quality import (DatasetSample,
-                                                 build_merge_quality_dataset,
-                                                 write_merge_quality_dataset)
-
-__all__ = [
-    "DatasetSample",
-    "build_merge_quality_dataset",
-    "build_human_messages_dataset",
-    "write_merge_quality_dataset",
-    "write_human_messages_dataset",
-]
+"""Datasets helpers for slam_datagen.
+
+Public names are imported on first access: the merge-quality builders do not
+load the LLM stack of the human-messages builders, nor pyarrow.
+"""
+
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from slam_datagen.datasets.human_messages import (build_human_messages_dataset,
+                                                      write_human_messages_dataset)
+    from slam_datagen.datasets.merge_quality import (CompactSample, DatasetSample,
+                                                     build_merge_quality_dataset,
+                                                     iter_merge_quality_dataset,
+                                                     write_merge_quality_dataset)
+    from slam_datagen.datasets.parquet import (ParquetExporter,
+                                               write_merge_quality_parquet)
+    from slam_datagen.datasets.reader import (HumanMessagesDataset, JsonlDataset,
+                                              MergeQualityDataset)
+    from slam_datagen.datasets.settings import (HumanMessagesSettings,
+                                                MergeQualitySettings)
+
+# Public name -> module defining it
+_EXPORTS: dict[str, str] = {
+    "CompactSample": "slam_datagen.datasets.merge_quality",
+    "DatasetSample": "slam_datagen.datasets.merge_quality",
+    "HumanMessagesDataset": "slam_datagen.datasets.reader",
+    "HumanMessagesSettings": "slam_datagen.datasets.settings",
+    "JsonlDataset": "slam_datagen.datasets.reader",
+    "MergeQualityDataset": "slam_datagen.datasets.reader",
+    "MergeQualitySettings": "slam_datagen.datasets.settings",
+    "ParquetExporter": "slam_datagen.datasets.parquet",
+    "build_merge_quality_dataset": "slam_datagen.datasets.merge_quality",
+    "iter_merge_quality_dataset": "slam_datagen.datasets.merge_quality",
+    "build_human_messages_dataset": "slam_datagen.datasets.human_messages",
+    "write_merge_quality_dataset": "slam_datagen.datasets.merge_quality",
+    "write_merge_quality_parquet": "slam_datagen.datasets.parquet",
+    "write_human_messages_dataset": "slam_datagen.datasets.human_messages",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,393 @@
+"""Scoring of merge-quality predictions against the dataset ground truth.
+
+A predictions file is a JSON Lines file with one merged persona per line,
+shaped like the ground truth of a sample::
+
+    {"unique_identifiers": {"ssn": "..."}, "attributes": {"home": {...}}}
+
+``attributes`` may be nested or already flattened. Predictions are matched to
+samples by line index (``match_by="index"``) or by any ground-truth identifier
+found in ``unique_identifiers`` (``match_by="identifier"``).
+
+Every flattened attribute path is scored per sample: a predicted path with the
+ground-truth value is a true positive, any other predicted path a false
+positive and every ground-truth path not predicted correctly a false
+negative. Counts are kept in a single array indexed by chunk format and
+identifier type (of the target chunk or row holding the field), sparsity
+bucket (number of ground-truth fields), field and outcome, so breakdowns and
+precision / recall / F1 are numpy reductions over its axes. Dataset slices
+are scored on a process pool and their count arrays summed.
+"""
+
+from __future__ import annotations
+
+import json
+import xml.etree.ElementTree as ET
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from slam_datagen.datasets.reader import JsonlDataset
+from slam_datagen.datasets.validation import parse_chunk
+from slam_datagen.personal_data import ATTRIBUTE_PATHS, IDENTIFIER_FIELDS
+from slam_datagen.schema import PERSONA_SCHEMA
+
+MATCH_MODES: tuple[str, ...] = ("index", "identifier")
+DEFAULT_TASK_SIZE = 10000
+# Upper bounds of the sparsity buckets, in ground-truth fields per sample
+DEFAULT_SPARSITY_BUCKETS: tuple[int, ...] = (2, 4, 8, 16)
+
+# Ground-truth fields are attributed to the format and identifier type of
+# their target chunk or row; false positives outside the ground truth have
+# neither
+FORMATS: tuple[str, ...] = ("json", "xml", "markdown", "unattributed")
+IDENTIFIER_TYPES: tuple[str, ...] = (*IDENTIFIER_FIELDS, "none")
+# Predicted paths outside ATTRIBUTE_PATHS are counted under one extra field
+FIELDS: tuple[str, ...] = (*ATTRIBUTE_PATHS, "<unknown>")
+
+_TP, _FP, _FN = range(3)
+_FORMAT_INDEX = {name: idx for idx, name in enumerate(FORMATS)}
+_IDENTIFIER_INDEX = {name: idx for idx, name in enumerate(IDENTIFIER_TYPES)}
+_FIELD_INDEX = {name: idx for idx, name in enumerate(ATTRIBUTE_PATHS)}
+_UNATTRIBUTED = _FORMAT_INDEX["unattributed"]
+_NO_IDENTIFIER = _IDENTIFIER_INDEX["none"]
+_UNKNOWN_FIELD = len(ATTRIBUTE_PATHS)
+
+# Per-process state of the scoring workers
+_state: dict[str, Any] = {}
+
+
+def sparsity_labels(buckets: Sequence[int]) -> list[str]:
+    labels = []
+    lower = 0
+    for upper in buckets:
+        labels.append(f"{lower}-{upper}")
+        lower = upper + 1
+    labels.append(f"{lower}+")
+    return labels
+
+
+class EvaluationResult:
+    """Outcome counts with shape ``(format, sparsity, identifier, field, 3)``."""
+
+    def __init__(
+        self,
+        counts: np.ndarray,
+        sparsity_buckets: Sequence[int],
+        samples: int,
+        missing_predictions: int,
+        unmatched_predictions: int,
+        unparseable_chunks: int = 0,
+    ) -> None:
+        self.counts = counts
+        self.sparsity_buckets = tuple(sparsity_buckets)
+        self.samples = samples
+        self.missing_predictions = missing_predictions
+        self.unmatched_predictions = unmatched_predictions
+        self.unparseable_chunks = unparseable_chunks
+
+    def to_dict(self) -> dict[str, Any]:
+        counts = self.counts
+        by_field = counts.sum(axis=(0, 1, 2))
+        per_field = _scores(by_field)
+        supported = by_field[:, [_TP, _FN]].sum(axis=1) > 0
+        return {
+            "samples": self.samples,
+            "missing_predictions": self.missing_predictions,
+            "unmatched_predictions": self.unmatched_predictions,
+            "unparseable_chunks": self.unparseable_chunks,
+            "overall": {
+                **_score_dict(by_field.sum(axis=0)),
+                "macro_f1": (
+                    float(per_field[supported, 2].mean()) if supported.any() else 0.0
+                ),
+            },
+            "fields": _breakdown(FIELDS, by_field),
+            "by_format": _breakdown(FORMATS, counts.sum(axis=(1, 2, 3))),
+            "by_sparsity": _breakdown(
+                sparsity_labels(self.sparsity_buckets), counts.sum(axis=(0, 2, 3))
+            ),
+            "by_identifier_type": _breakdown(
+                IDENTIFIER_TYPES, counts.sum(axis=(0, 1, 3))
+            ),
+        }
+
+    def write(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as handle:
+            json.dump(self.to_dict(), handle, indent=2)
+        return path
+
+
+def evaluate_predictions(
+    dataset_path: str | Path,
+    predictions_path: str | Path,
+    match_by: str = "index",
+    num_workers: int = 1,
+    task_size: int = DEFAULT_TASK_SIZE,
+    sparsity_buckets: Sequence[int] = DEFAULT_SPARSITY_BUCKETS,
+) -> EvaluationResult:
+    """Score ``predictions_path`` against the merge-quality dataset.
+
+    Both paths are anything ``JsonlDataset`` opens (compressed files, shard
+    manifests). Samples without a prediction count as empty predictions.
+    """
+    if match_by not in MATCH_MODES:
+        raise ValueError(f"match_by must be one of {', '.join(MATCH_MODES)}")
+    if num_workers <= 0:
+        raise ValueError("num_workers must be positive")
+    if task_size <= 0:
+        raise ValueError("task_size must be positive")
+    buckets = tuple(int(bound) for bound in sparsity_buckets)
+    if list(buckets) != sorted(set(buckets)):
+        raise ValueError("sparsity_buckets must be strictly increasing")
+
+    # Opening both files once builds the offset indexes the workers reuse
+    with (
+        JsonlDataset(dataset_path) as dataset,
+        JsonlDataset(predictions_path) as predictions,
+    ):
+        samples = len(dataset)
+        num_predictions = len(predictions)
+        tasks = [
+            (dataset[start : start + task_size], start)
+            for start in range(0, samples, task_size)
+        ]
+
+        initargs = (Path(predictions_path), match_by, buckets)
+        counts = np.zeros(_shape(buckets), dtype=np.int64)
+        missing = 0
+        matched: set[int] = set()
+        unparseable = 0
+        if num_workers == 1:
+            _init_worker(*initargs)
+            results = map(_score_slice, tasks)
+            for task_counts, task_missing, task_matched, task_unparseable in results:
+                counts += task_counts
+                missing += task_missing
+                matched |= task_matched
+                unparseable += task_unparseable
+        else:
+            with ProcessPoolExecutor(
+                max_workers=num_workers, initializer=_init_worker, initargs=initargs
+            ) as executor:
+                for (
+                    task_counts,
+                    task_missing,
+                    task_matched,
+                    task_unparseable,
+                ) in executor.map(_score_slice, tasks):
+                    counts += task_counts
+                    missing += task_missing
+                    matched |= task_matched
+                    unparseable += task_unparseable
+    if match_by == "index":
+        unmatched = max(0, num_predictions - samples)
+    else:
+        # A prediction matched by several samples (shared names) counts once
+        unmatched = num_predictions - len(matched)
+    return EvaluationResult(counts, buckets, samples, missing, unmatched, unparseable)
+
+
+def _shape(buckets: tuple[int, ...]) -> tuple[int, ...]:
+    return (len(FORMATS), len(buckets) + 1, len(IDENTIFIER_TYPES), len(FIELDS), 3)
+
+
+def _identifier_lookup(predictions: JsonlDataset[Any]) -> dict[str, int]:
+    """Map ``"<type>\\0<value>"`` of every prediction identifier to its line.
+
+    Every worker builds its own lookup from the offset index of the predictions
+    file, so the parent neither decodes the predictions nor pickles the lookup
+    to the workers.
+    """
+    lookup: dict[str, int] = {}
+    for line_index in range(len(predictions)):
+        identifiers = predictions[line_index].get("unique_identifiers") or {}
+        for name, value in identifiers.items():
+            lookup.setdefault(f"{name}\0{value}", line_index)
+    return lookup
+
+
+def _init_worker(
+    predictions_path: Path,
+    match_by: str,
+    buckets: tuple[int, ...],
+) -> None:
+    previous = _state.get("predictions")
+    if previous is not None:
+        previous.close()
+    predictions = JsonlDataset(predictions_path, write_index=False)
+    _state["predictions"] = predictions
+    _state["lookup"] = (
+        _identifier_lookup(predictions) if match_by == "identifier" else None
+    )
+    _state["buckets"] = buckets
+
+
+def _score_slice(
+    task: tuple[JsonlDataset[Any], int],
+) -> tuple[np.ndarray, int, set[int], int]:
+    dataset, start = task
+    predictions: JsonlDataset[Any] = _state["predictions"]
+    lookup: dict[str, int] | None = _state["lookup"]
+    buckets: tuple[int, ...] = _state["buckets"]
+    shape = _shape(buckets)
+
+    codes: list[int] = []
+    missing = 0
+    unparseable = 0
+    matched: set[int] = set()
+    for offset in range(len(dataset)):
+        document = dataset[offset]
+        if lookup is None:
+            line_index = start + offset
+            if line_index >= len(predictions):
+                line_index = None
+        else:
+            line_index = _match_identifier(document, lookup)
+            if line_index is not None:
+                matched.add(line_index)
+        if line_index is None:
+            missing += 1
+            predicted: Mapping[str, str] = {}
+        else:
+            predicted = _predicted_attributes(predictions[line_index])
+        unparseable += _score_sample(document, predicted, buckets, shape, codes)
+
+    counts = np.bincount(
+        np.asarray(codes, dtype=np.int64), minlength=int(np.prod(shape))
+    ).reshape(shape)
+    return counts, missing, matched, unparseable
+
+
+def _match_identifier(
+    document: Mapping[str, Any], lookup: dict[str, int]
+) -> int | None:
+    identifiers = document["ground_truth"]["unique_identifiers"]
+    # SSNs are unique, names may be shared by several personas
+    for name in sorted(IDENTIFIER_FIELDS, key=lambda name: name != "ssn"):
+        value = identifiers.get(name)
+        if value is not None:
+            line_index = lookup.get(f"{name}\0{value}")
+            if line_index is not None:
+                return line_index
+    return None
+
+
+def _predicted_attributes(prediction: Mapping[str, Any]) -> dict[str, str]:
+    attributes = prediction.get("attributes") or {}
+    flat = PERSONA_SCHEMA.flatten(attributes)
+    for name in IDENTIFIER_FIELDS:
+        flat.pop(name, None)
+    return flat
+
+
+def _score_sample(
+    document: Mapping[str, Any],
+    predicted: Mapping[str, str],
+    buckets: tuple[int, ...],
+    shape: tuple[int, ...],
+    codes: list[int],
+) -> int:
+    """Append the outcome codes of one sample; returns its unparseable chunks."""
+    expected = PERSONA_SCHEMA.flatten(document["ground_truth"]["attributes"])
+    sparsity = bisect_left(buckets, len(expected))
+    sources, unparseable = _field_sources(document)
+    unattributed = (_UNATTRIBUTED, _NO_IDENTIFIER)
+
+    _, num_sparsity, num_identifiers, num_fields, _ = shape
+    format_stride = num_sparsity * num_identifiers * num_fields
+    sparsity_offset = sparsity * num_identifiers * num_fields
+
+    def code(source: tuple[int, int], field: int, outcome: int) -> int:
+        fmt, identifier = source
+        return (
+            fmt * format_stride + sparsity_offset + identifier * num_fields + field
+        ) * 3 + outcome
+
+    for path, value in expected.items():
+        source = sources.get(path, unattributed)
+        field = _FIELD_INDEX.get(path, _UNKNOWN_FIELD)
+        predicted_value = predicted.get(path)
+        if predicted_value == value:
+            codes.append(code(source, field, _TP))
+            continue
+        codes.append(code(source, field, _FN))
+        if predicted_value is not None:
+            codes.append(code(source, field, _FP))
+    for path in predicted.keys() - expected.keys():
+        codes.append(code(unattributed, _FIELD_INDEX.get(path, _UNKNOWN_FIELD), _FP))
+    return unparseable
+
+
+def _field_sources(
+    document: Mapping[str, Any],
+) -> tuple[dict[str, tuple[int, int]], int]:
+    """Format and identifier type of the target chunk or row of each field.
+
+    Also returns the number of target chunks that could not be parsed; their
+    fields stay unattributed.
+    """
+    identifiers = document["ground_truth"]["unique_identifiers"]
+    sources: dict[str, tuple[int, int]] = {}
+    unparseable = 0
+    for chunk in document["chunks"]:
+        owner = chunk["owner_id"]
+        if owner == "distractor":
+            continue
+        try:
+            records = parse_chunk(chunk)
+        except (ValueError, KeyError, TypeError, ET.ParseError):
+            unparseable += 1
+            continue
+        fmt = _FORMAT_INDEX.get(chunk["format"], _UNATTRIBUTED)
+        for record in records:
+            value = record.identifier_value
+            if owner == "target" or (
+                value is not None and value == identifiers.get(record.identifier_type)
+            ):
+                source = (
+                    fmt,
+                    _IDENTIFIER_INDEX.get(record.identifier_type, _NO_IDENTIFIER),
+                )
+                for path in record.fields:
+                    sources.setdefault(path, source)
+    return sources, unparseable
+
+
+def _scores(counts: np.ndarray) -> np.ndarray:
+    """Precision, recall and F1 along the last axis of ``(..., 3)`` counts."""
+    tp = counts[..., _TP].astype(np.float64)
+    fp = counts[..., _FP]
+    fn = counts[..., _FN]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.where(tp + fn > 0, tp / (tp + fn), 0.0)
+        f1 = np.where(
+            precision + recall > 0,
+            2 * precision * recall / (precision + recall),
+            0.0,
+        )
+    return np.stack([precision, recall, f1], axis=-1)
+
+
+def _score_dict(counts: np.ndarray) -> dict[str, Any]:
+    precision, recall, f1 = _scores(counts)
+    return {
+        "precision": float(precision),
+        "recall": float(recall),
+        "f1": float(f1),
+        "tp": int(counts[_TP]),
+        "fp": int(counts[_FP]),
+        "fn": int(counts[_FN]),
+    }
+
+
+def _breakdown(labels: Sequence[str], counts: np.ndarray) -> dict[str, dict[str, Any]]:
+    """Scores per label, skipping labels without any outcome."""
+    return {label: _score_dict(row) for label, row in zip(labels, counts) if row.any()}
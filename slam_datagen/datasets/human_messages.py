@@ -1,43 +1,51 @@
 from __future__ import annotations
 
-import json
 import random
 import string
+from collections.abc import Mapping
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Iterable
 
 from omegaconf import DictConfig
 
+from slam_datagen.datasets.settings import (HumanMessagesSettings,
+                                            resolve_human_messages_settings)
+from slam_datagen.io.serialization import Serializer, get_serializer
+from slam_datagen.io.splits import SplitWriter
+from slam_datagen.io.writer import DEFAULT_COMPRESSION_THREADS, open_writer
 from slam_datagen.llm.message_generator import MessageGenerator
+from slam_datagen.utils.seeding import derive_seed
 
 VALID_RANDOM_CHARACTERS = string.ascii_letters + string.digits
 
 
 def build_human_messages_dataset(
-    cfg: DictConfig,
+    cfg: DictConfig | HumanMessagesSettings,
     prompt_cfg: DictConfig,
     message_generator: MessageGenerator,
 ) -> list[dict[str, str]]:
-    rng = random.Random(cfg.random_seed)
-    dataset_size = int(cfg.dataset_size)
-    random_fraction = float(cfg.random_fraction)
-    random_count = int(dataset_size * random_fraction)
-    synthetic_batch_size = int(cfg.synthetic_batch_size)
-    if synthetic_batch_size <= 0:
-        msg = "synthetic_batch_size must be positive"
-        raise ValueError(msg)
-
+    settings = resolve_human_messages_settings(cfg)
     prompts = list(prompt_cfg.user_prompts_for_generation)
     if not prompts:
         msg = "user_prompts_for_generation must contain at least one prompt"
         raise ValueError(msg)
 
+    if settings.seeding == "per_sample":
+        return _build_per_sample(
+            settings=settings,
+            prompts=prompts,
+            message_generator=message_generator,
+        )
+
+    rng = random.Random(settings.random_seed)
+    dataset_size = settings.dataset_size
+    random_count = int(dataset_size * settings.random_fraction)
     samples: list[dict[str, str]] = []
 
     for _ in range(random_count):
         samples.append(
             {
-                "text": _generate_random_sequence(rng, cfg.random_length_range),
+                "text": _generate_random_sequence(rng, settings.random_length_range),
                 "type": "random",
             }
         )
@@ -45,7 +53,7 @@ def build_human_messages_dataset(
     synthetic_samples_target = dataset_size - random_count
     while synthetic_samples_target > 0:
         prompt = rng.choice(prompts)
-        batch = message_generator.generate_many(prompt, synthetic_batch_size)
+        batch = message_generator.generate_many(prompt, settings.synthetic_batch_size)
         for text in batch:
             samples.append({"text": text.strip(), "type": "synthetic"})
             synthetic_samples_target -= 1
@@ -59,22 +67,91 @@ def build_human_messages_dataset(
 def write_human_messages_dataset(
     samples: Iterable[dict[str, str]],
     output_file: str | Path,
+    serializer: str | Serializer = "stdlib",
+    compression: str = "none",
+    compression_threads: int = DEFAULT_COMPRESSION_THREADS,
+    shard_records: int | None = None,
+    shard_bytes: int | None = None,
+    first_index: int = 0,
+    splits: Mapping[str, float] | None = None,
 ) -> Path:
-    output_path = Path(output_file)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("w", encoding="utf-8") as handle:
+    """Write samples as JSON Lines; with ``splits``, samples are routed by the
+    hash of their text and the returned path is the splits index."""
+    encoder = get_serializer(serializer)
+    options: dict[str, Any] = {
+        "shard_records": shard_records,
+        "shard_bytes": shard_bytes,
+        "compression": compression,
+        "threads": compression_threads,
+    }
+    if splits is None:
+        with open_writer(output_file, first_index=first_index, **options) as writer:
+            for sample in samples:
+                writer.write(encoder.encode_human_message(sample))
+        return writer.path
+
+    with SplitWriter(output_file, splits, **options) as split_writer:
         for sample in samples:
-            handle.write(json.dumps(sample, ensure_ascii=False) + "\n")
-    return output_path
+            split_writer.write(encoder.encode_human_message(sample), sample["text"])
+    return split_writer.path
 
 
-def _generate_random_sequence(rng: random.Random, length_range: list[int]) -> str:
-    if not length_range or len(length_range) != 2:
-        msg = "random_length_range must be a two-element list"
-        raise ValueError(msg)
-    min_len, max_len = (int(length_range[0]), int(length_range[1]))
-    if min_len <= 0 or max_len < min_len:
-        msg = "random_length_range must contain positive ascending values"
-        raise ValueError(msg)
-    target_len = rng.randint(min_len, max_len)
+def _build_per_sample(
+    settings: HumanMessagesSettings,
+    prompts: list[str],
+    message_generator: MessageGenerator,
+) -> list[dict[str, str]]:
+    """Build samples whose type, random text and prompt depend on (seed, index).
+
+    Each index is random with probability ``random_fraction``, so the random
+    share is only matched in expectation. Synthetic indices are batched per
+    prompt and emitted in index order without a global shuffle.
+    """
+    first_index = settings.sample_offset
+    indices = range(first_index, first_index + settings.dataset_size)
+
+    samples: dict[int, dict[str, str]] = {}
+    pending: dict[str, list[int]] = {}
+    for index in indices:
+        rng = random.Random(derive_seed(settings.random_seed, "sample", index))
+        if rng.random() < settings.random_fraction:
+            samples[index] = {
+                "text": _generate_random_sequence(rng, settings.random_length_range),
+                "type": "random",
+            }
+            continue
+
+        prompt = rng.choice(prompts)
+        pending.setdefault(prompt, []).append(index)
+        if len(pending[prompt]) == settings.synthetic_batch_size:
+            _fill_synthetic(samples, pending.pop(prompt), prompt, message_generator)
+
+    for prompt, waiting in pending.items():
+        _fill_synthetic(samples, waiting, prompt, message_generator)
+
+    return [samples[index] for index in indices]
+
+
+def _fill_synthetic(
+    samples: dict[int, dict[str, str]],
+    indices: list[int],
+    prompt: str,
+    message_generator: MessageGenerator,
+) -> None:
+    waiting = list(indices)
+    while waiting:
+        batch = message_generator.generate_many(prompt, len(waiting))
+        if not batch:
+            msg = "message generator returned no messages"
+            raise ValueError(msg)
+        for index, text in zip(waiting, batch):
+            samples[index] = {"text": text.strip(), "type": "synthetic"}
+        waiting = waiting[len(batch) :]
+
+
+def _generate_random_sequence(
+    rng: random.Random,
+    length_range: tuple[int, int],
+) -> str:
+    target_len = rng.randint(*length_range)
     return "".join(rng.choice(VALID_RANDOM_CHARACTERS) for _ in range(target_len))
@@ -2,28 +2,48 @@ from __future__ import annotations
 
 import json
 import random
+import re
+from collections.abc import Iterable, Iterator, Mapping
 from dataclasses import asdict, dataclass
+from functools import partial
+from itertools import chain
+from json.encoder import encode_basestring  # type: ignore[attr-defined]
 from pathlib import Path
-from typing import Any
-
-from omegaconf import DictConfig, ListConfig
-
-from slam_datagen.personal_data import PersonalData, PersonalDataGenerator
+from typing import Any, Protocol
+
+from omegaconf import DictConfig
+
+from slam_datagen.datasets.settings import (SEEDING_MODES, MergeQualitySettings,
+                                            resolve_merge_quality_settings)
+from slam_datagen.io.serialization import Serializer, get_serializer
+from slam_datagen.io.splits import SplitWriter
+from slam_datagen.io.writer import DEFAULT_COMPRESSION_THREADS, open_writer
+from slam_datagen.persona_cache import PersonaStream
+from slam_datagen.personal_data import (LazyPersonalData, Persona, PersonalData,
+                                        PersonalDataGenerator)
+from slam_datagen.records import CompactFields, CompactPersona
+from slam_datagen.schema import PERSONA_SCHEMA
+from slam_datagen.utils.identifiers import IdentifierRegistry
+from slam_datagen.utils.seeding import derive_seed
 from slam_datagen.utils.typing import NestedStrDict
 
 SparseRecord = dict[str, str]
 
 _IDENTIFIER_TYPES: tuple[str, ...] = ("name", "ssn")
+# Draws per identifier (and per namespace) before uniqueness is given up
+_MAX_IDENTIFIER_DRAWS = 1000
+# JSON member "ssn" with its string value, as written by every serializer
+_SSN_MEMBER = re.compile(rb'"ssn": ?("(?:[^"\\]|\\.)*")')
 
 
-@dataclass
+@dataclass(slots=True)
 class Chunk:
     format: str
     owner_id: str
     content: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ChunkRow:
     identifier_type: str
     identifier_value: str
@@ -31,63 +51,494 @@ class ChunkRow:
     fields: SparseRecord
 
 
-@dataclass
+@dataclass(slots=True)
 class DatasetSample:
     ground_truth: PersonalData
     provided_identifiers: dict[str, str]
     chunks: list[Chunk]
 
 
-def build_merge_quality_dataset(
-    generator: PersonalDataGenerator,
-    cfg: DictConfig,
-) -> list[DatasetSample]:
-    rng = random.Random(cfg.random_seed)
-    formats = list(cfg.chunk_formats)
-
-    samples: list[DatasetSample] = []
-    for record in generator.generate(n=cfg.dataset_size):
-        sparse_record, flat_fields = _sparsify_record(record, cfg, rng)
-        provided_identifiers = {
-            "name": record.unique_identifiers["name"],
-            "ssn": record.unique_identifiers["ssn"],
-        }
+class CompactSample:
+    """Memory-compact form of a ``DatasetSample`` with rendered chunks only."""
+
+    __slots__ = ("ground_truth", "identifiers", "chunks")
 
-        chunks = _build_chunks_for_record(
-            source_record=record,
-            flat_fields=flat_fields,
-            generator=generator,
-            cfg=cfg,
-            rng=rng,
-            formats=formats,
+    def __init__(
+        self,
+        ground_truth: CompactPersona,
+        identifiers: CompactFields,
+        chunks: tuple[Chunk, ...],
+    ) -> None:
+        self.ground_truth = ground_truth
+        self.identifiers = identifiers
+        self.chunks = chunks
+
+    @classmethod
+    def from_sample(cls, sample: DatasetSample) -> CompactSample:
+        return cls(
+            ground_truth=CompactPersona.from_personal_data(sample.ground_truth),
+            identifiers=CompactFields.from_mapping(sample.provided_identifiers),
+            chunks=tuple(sample.chunks),
         )
 
-        samples.append(
-            DatasetSample(
-                ground_truth=sparse_record,
-                provided_identifiers=provided_identifiers,
-                chunks=chunks,
-            )
+    @property
+    def provided_identifiers(self) -> dict[str, str]:
+        return dict(self.identifiers)
+
+    def to_sample(self) -> DatasetSample:
+        return DatasetSample(
+            ground_truth=self.ground_truth.to_personal_data(),
+            provided_identifiers=self.provided_identifiers,
+            chunks=list(self.chunks),
         )
 
-    return samples
+
+@dataclass(slots=True)
+class PooledPersona:
+    record: Persona
+    flat_fields: Mapping[str, str] | None = None
+
+
+class PersonaSource(Protocol):
+    """Persona draws the builders make: a ``PersonalDataGenerator`` or a
+    ``PersonaStream`` reading one."""
+
+    def generate(self, n: int) -> list[Persona]: ...
+
+    def generate_identifier(self, name: str) -> str: ...
+
+
+class DistractorSource(Protocol):
+    def draw(
+        self,
+        n: int,
+        rng: random.Random,
+        target: PooledPersona | None = None,
+    ) -> list[PooledPersona]:
+        """Draw ``n`` distractors; ``target`` holds the fields the sample keeps."""
+        ...
+
+
+class FreshDistractors:
+    """Generates brand-new distractor personas on every draw."""
+
+    def __init__(self, generator: PersonaSource) -> None:
+        self._generator = generator
+
+    def draw(
+        self,
+        n: int,
+        rng: random.Random,
+        target: PooledPersona | None = None,
+    ) -> list[PooledPersona]:
+        return [PooledPersona(record=record) for record in self._generator.generate(n)]
+
+
+class DistractorPool:
+    """Bounded pool of pre-generated personas reused as distractors.
+
+    Each draw picks entries with the caller's ``rng``; every picked entry is
+    then replaced by a freshly generated persona with probability
+    ``refresh_rate``, so the pool slowly rotates instead of being regenerated
+    for every sample.
+    """
+
+    def __init__(
+        self,
+        generator: PersonaSource,
+        size: int,
+        refresh_rate: float,
+        precompute_flat: bool = True,
+    ) -> None:
+        if size <= 0:
+            raise ValueError("distractor_pool_size must be positive")
+        if not 0.0 <= refresh_rate <= 1.0:
+            raise ValueError("distractor_pool_refresh_rate must be within [0, 1]")
+
+        self._generator = generator
+        self._refresh_rate = refresh_rate
+        self._precompute_flat = precompute_flat
+        self._entries = [self._pooled(record) for record in generator.generate(n=size)]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def draw(
+        self,
+        n: int,
+        rng: random.Random,
+        target: PooledPersona | None = None,
+    ) -> list[PooledPersona]:
+        if n <= 0:
+            return []
+
+        if n > len(self._entries):
+            raise ValueError(
+                f"Cannot draw {n} distinct distractors from a pool of "
+                f"{len(self._entries)}"
+            )
+        # Without replacement: a chunk never holds the same distractor twice
+        indices = rng.sample(range(len(self._entries)), k=n)
+        picked = [self._entries[idx] for idx in indices]
+
+        stale = sorted({idx for idx in indices if rng.random() < self._refresh_rate})
+        if stale:
+            fresh = self._generator.generate(n=len(stale))
+            for idx, record in zip(stale, fresh):
+                self._entries[idx] = self._pooled(record)
+
+        return picked
+
+    def _pooled(self, record: Persona) -> PooledPersona:
+        flat_fields = flat_attributes(record) if self._precompute_flat else None
+        return PooledPersona(record=record, flat_fields=flat_fields)
+
+
+class HardNegativeDistractors:
+    """Distractors that collide with the target on chosen keys.
+
+    A fixed corpus of personas is indexed by collision key (``name_token``,
+    ``ssn_area``, ``ssn_suffix`` or a flattened attribute path) and value.
+    Every distractor draws a key from ``mix`` (``random`` meaning a uniform
+    corpus draw), takes one of the target's values for that key and picks a
+    corpus persona sharing it, so each lookup is a dictionary access. Draws
+    fall back to a uniform pick when the target has no value for the key, no
+    corpus persona shares it, or the match carries a target identifier.
+    """
+
+    def __init__(
+        self,
+        corpus: Iterable[Persona],
+        mix: Mapping[str, float],
+    ) -> None:
+        if not mix or sum(mix.values()) <= 0:
+            raise ValueError("hard_negative_mix must have a positive weight")
+        self._keys = list(mix)
+        self._weights = list(mix.values())
+        self._entries = [
+            PooledPersona(record=record, flat_fields=flat_attributes(record))
+            for record in corpus
+        ]
+        if not self._entries:
+            raise ValueError("hard_negative_corpus_size must be positive")
+        self._index: dict[str, dict[str, list[int]]] = {
+            key: {} for key in self._keys if key != "random"
+        }
+        for idx, entry in enumerate(self._entries):
+            for key, postings in self._index.items():
+                for value in _collision_values(key, entry):
+                    postings.setdefault(value, []).append(idx)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def draw(
+        self,
+        n: int,
+        rng: random.Random,
+        target: PooledPersona | None = None,
+    ) -> list[PooledPersona]:
+        picked = []
+        for _ in range(n):
+            entry = None
+            key = rng.choices(self._keys, weights=self._weights)[0]
+            if target is not None and key != "random":
+                entry = self._collision(key, target, rng)
+            if entry is None:
+                entry = self._entries[rng.randrange(len(self._entries))]
+            picked.append(entry)
+        return picked
+
+    def _collision(
+        self,
+        key: str,
+        target: PooledPersona,
+        rng: random.Random,
+    ) -> PooledPersona | None:
+        values = _collision_values(key, target)
+        if not values:
+            return None
+        candidates = self._index[key].get(rng.choice(values))
+        if not candidates:
+            return None
+        entry = self._entries[rng.choice(candidates)]
+        if _shares_identifier(entry.record, target.record.unique_identifiers):
+            return None
+        return entry
+
+
+class DistinctDistractors:
+    """Redraws distractors of ``source`` that carry a target identifier."""
+
+    def __init__(self, source: DistractorSource) -> None:
+        self._source = source
+
+    def draw(
+        self,
+        n: int,
+        rng: random.Random,
+        target: PooledPersona | None = None,
+    ) -> list[PooledPersona]:
+        picked = self._source.draw(n, rng, target)
+        if target is None:
+            return picked
+        identifiers = target.record.unique_identifiers
+        for idx, persona in enumerate(picked):
+            attempts = 0
+            while _shares_identifier(persona.record, identifiers):
+                attempts += 1
+                if attempts > _MAX_IDENTIFIER_DRAWS:
+                    raise ValueError(
+                        "Could not draw a distractor with distinct identifiers"
+                    )
+                persona = self._source.draw(1, rng, target)[0]
+            picked[idx] = persona
+        return picked
+
+
+class UniqueIdentifiers:
+    """Gives target personas identifiers that are unique across the run.
+
+    Identifiers already claimed in ``registry``, or outside its namespace,
+    are replaced by fresh values drawn from ``generator``; with ``N``
+    namespaces that is ``N`` draws per identifier on average.
+    """
+
+    def __init__(self, generator: PersonaSource, registry: IdentifierRegistry) -> None:
+        self._generator = generator
+        self._registry = registry
+        self.redrawn = 0
+
+    def claim(self, record: Persona) -> Persona:
+        identifiers = record.unique_identifiers
+        replaced = False
+        for name in _IDENTIFIER_TYPES:
+            value = self._registry.claim_drawn(
+                name,
+                identifiers[name],
+                partial(self._generator.generate_identifier, name),
+            )
+            if value != identifiers[name]:
+                identifiers[name] = value
+                replaced = True
+                self.redrawn += 1
+        return _with_identifiers(record, identifiers) if replaced else record
+
+
+def build_merge_quality_dataset(
+    generator: PersonalDataGenerator,
+    cfg: DictConfig | MergeQualitySettings,
+) -> list[DatasetSample]:
+    return list(iter_merge_quality_dataset(generator=generator, cfg=cfg))
+
+
+def iter_merge_quality_dataset(
+    generator: PersonalDataGenerator,
+    cfg: DictConfig | MergeQualitySettings,
+) -> Iterator[DatasetSample]:
+    """Yield merge-quality samples one by one.
+
+    ``cfg`` is resolved into ``MergeQualitySettings`` (and validated) when this
+    function is called, before the first sample is generated.
+
+    With ``seeding: sequential`` (default) target personas are generated in
+    batches of ``target_batch_size`` (1000 unless configured), so memory stays
+    bounded by the batch size rather than by ``dataset_size``. A null
+    ``target_batch_size`` generates all targets at once, which reproduces the
+    sample order of earlier releases.
+
+    With ``seeding: per_sample`` sample ``i`` only depends on
+    ``(random_seed, i)``; ``sample_offset`` selects the first index, so any
+    index range can be regenerated or appended to an existing dataset.
+
+    With ``seeding: streams`` targets, distractors and the hard-negative
+    corpus are read from persona streams of ``random_seed`` (see
+    ``slam_datagen.persona_cache``), so the personas do not depend on the
+    other settings and ``persona_cache_dir`` can replay them.
+    """
+    settings = resolve_merge_quality_settings(cfg)
+    if settings.seeding == "per_sample":
+        return _iter_per_sample(generator, settings)
+    if settings.seeding == "streams":
+        return _iter_streams(generator, settings)
+    return _iter_sequential(generator, settings)
 
 
 def write_merge_quality_dataset(
-    samples: list[DatasetSample],
+    samples: Iterable[DatasetSample | CompactSample],
     output_file: str | Path,
+    flush_every: int = 1000,
+    serializer: str | Serializer = "stdlib",
+    compression: str = "none",
+    compression_threads: int = DEFAULT_COMPRESSION_THREADS,
+    shard_records: int | None = None,
+    shard_bytes: int | None = None,
+    first_index: int = 0,
+    splits: Mapping[str, float] | None = None,
 ) -> Path:
-    output_path = Path(output_file)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+    """Write samples as JSON Lines; returns the path actually written.
+
+    The path carries the ``.gz`` / ``.zst`` suffix of ``compression``. With
+    ``shard_records`` or ``shard_bytes`` set, samples are split into numbered
+    shards and the returned path is their manifest; ``first_index`` is the
+    sample index recorded for the first line. With ``splits`` (split name to
+    ratio), every sample is routed by the hash of its ground-truth SSN to
+    ``<stem>.<split><suffix>`` and the returned path is the splits index.
+    """
+    if flush_every <= 0:
+        raise ValueError("flush_every must be positive")
+
+    encoder = get_serializer(serializer)
+    options: dict[str, Any] = {
+        "shard_records": shard_records,
+        "shard_bytes": shard_bytes,
+        "compression": compression,
+        "threads": compression_threads,
+    }
+    writer: Any = (
+        open_writer(output_file, first_index=first_index, **options)
+        if splits is None
+        else SplitWriter(output_file, splits, **options)
+    )
+    with writer:
+        for idx, sample in enumerate(samples, start=1):
+            line = encoder.encode_merge_quality_sample(sample)
+            if splits is None:
+                writer.write(line)
+            else:
+                writer.write(line, split_key(sample))
+            if idx % flush_every == 0:
+                writer.flush()
+
+    return writer.path
+
+
+def split_key(sample: DatasetSample | CompactSample) -> str:
+    """Split routing key: the SSN of the target persona."""
+    return sample.ground_truth.unique_identifiers["ssn"]
+
+
+def line_split_key(line: bytes) -> str:
+    """``split_key`` of an encoded sample, without decoding the whole line.
+
+    Every serializer writes ``ground_truth.unique_identifiers`` first, so the
+    first ``"ssn"`` member of the line is the target persona's.
+    """
+    match = _SSN_MEMBER.search(line)
+    if match is None:
+        raise ValueError("Encoded sample has no ground-truth SSN")
+    return json.loads(match.group(1))
+
+
+def _iter_sequential(
+    generator: PersonalDataGenerator,
+    settings: MergeQualitySettings,
+) -> Iterator[DatasetSample]:
+    distractors: DistractorSource
+    if settings.hard_negative_corpus_size > 0:
+        distractors = _make_hard_negative_source(generator, settings)
+    else:
+        distractors = _make_distractor_source(generator, settings)
+    yield from _iter_targets(generator, distractors, settings)
+
+
+def _iter_streams(
+    generator: PersonalDataGenerator,
+    settings: MergeQualitySettings,
+) -> Iterator[DatasetSample]:
+    def stream(name: str) -> PersonaStream:
+        return PersonaStream(
+            generator, settings.random_seed, name, settings.persona_cache_dir
+        )
+
+    distractors: DistractorSource
+    if settings.hard_negative_corpus_size > 0:
+        corpus = stream("hard_negative_corpus").generate(
+            n=settings.hard_negative_corpus_size
+        )
+        distractors = _hard_negative_distractors(corpus, settings)
+    else:
+        distractors = _make_distractor_source(stream("distractors"), settings)
+    yield from _iter_targets(stream("targets"), distractors, settings)
+
+
+def _iter_targets(
+    personas: PersonaSource,
+    distractors: DistractorSource,
+    settings: MergeQualitySettings,
+) -> Iterator[DatasetSample]:
+    rng = random.Random(settings.random_seed)
+    unique = None
+    if settings.unique_identifiers:
+        unique = UniqueIdentifiers(personas, _make_identifier_registry(settings))
+        distractors = DistinctDistractors(distractors)
+
+    for record in chain.from_iterable(_iter_target_batches(personas, settings)):
+        if unique is not None:
+            record = unique.claim(record)
+        yield _build_sample(record, distractors, settings, rng)
+
+
+def _iter_per_sample(
+    generator: PersonalDataGenerator,
+    settings: MergeQualitySettings,
+) -> Iterator[DatasetSample]:
+    distractors: DistractorSource
+    if settings.hard_negative_corpus_size > 0:
+        distractors = _make_hard_negative_source(generator, settings)
+    else:
+        distractors = FreshDistractors(generator)
+    first_index = settings.sample_offset
+
+    for index in range(first_index, first_index + settings.dataset_size):
+        generator.reseed(derive_seed(settings.random_seed, "persona", index))
+        rng = random.Random(derive_seed(settings.random_seed, "sample", index))
+        record = generator.generate(n=1)[0]
+        yield _build_sample(record, distractors, settings, rng)
+
+
+def _build_sample(
+    record: Persona,
+    distractors: DistractorSource,
+    settings: MergeQualitySettings,
+    rng: random.Random,
+) -> DatasetSample:
+    sparse_record, flat_fields = _sparsify_record(record, settings, rng)
+    provided_identifiers = {
+        "name": record.unique_identifiers["name"],
+        "ssn": record.unique_identifiers["ssn"],
+    }
+
+    chunks = _build_chunks_for_record(
+        source_record=record,
+        flat_fields=flat_fields,
+        distractors=distractors,
+        settings=settings,
+        rng=rng,
+    )
+
+    return DatasetSample(
+        ground_truth=sparse_record,
+        provided_identifiers=provided_identifiers,
+        chunks=chunks,
+    )
 
-    with output_path.open("w", encoding="utf-8") as handle:
-        for sample in samples:
-            handle.write(json.dumps(_serialize_sample(sample)) + "\n")
 
-    return output_path
+def _iter_target_batches(
+    generator: PersonaSource,
+    settings: MergeQualitySettings,
+) -> Iterator[list[Persona]]:
+    remaining = settings.dataset_size
+    batch_size = settings.target_batch_size or remaining
 
+    while remaining > 0:
+        batch = generator.generate(n=min(batch_size, remaining))
+        remaining -= len(batch)
+        yield batch
 
-def _serialize_sample(sample: DatasetSample) -> dict[str, Any]:
+
+def serialize_sample(sample: DatasetSample | CompactSample) -> dict[str, Any]:
+    """JSON document of ``sample``, as written to the dataset lines."""
     return {
         "ground_truth": {
             "unique_identifiers": sample.ground_truth.unique_identifiers,
@@ -98,22 +549,106 @@ def _serialize_sample(sample: DatasetSample) -> dict[str, Any]:
     }
 
 
+def deserialize_sample(document: Mapping[str, Any]) -> DatasetSample:
+    """``DatasetSample`` of a document written by ``serialize_sample``."""
+    ground_truth = document["ground_truth"]
+    return DatasetSample(
+        ground_truth=PersonalData(
+            unique_identifiers=ground_truth["unique_identifiers"],
+            attributes=ground_truth["attributes"],
+        ),
+        provided_identifiers=document["provided_identifiers"],
+        chunks=[Chunk(**chunk) for chunk in document["chunks"]],
+    )
+
+
+def _make_distractor_source(
+    generator: PersonaSource,
+    settings: MergeQualitySettings,
+) -> DistractorSource:
+    if settings.distractor_pool_size <= 0:
+        return FreshDistractors(generator)
+    return DistractorPool(
+        generator=generator,
+        size=settings.distractor_pool_size,
+        refresh_rate=settings.distractor_pool_refresh_rate,
+        precompute_flat=settings.distractor_pool_precompute_flat,
+    )
+
+
+def _make_hard_negative_source(
+    generator: PersonalDataGenerator,
+    settings: MergeQualitySettings,
+) -> HardNegativeDistractors:
+    # The corpus only depends on the seed, whatever the seeding mode
+    generator.reseed(derive_seed(settings.random_seed, "hard_negative_corpus"))
+    return _hard_negative_distractors(
+        generator.generate(n=settings.hard_negative_corpus_size), settings
+    )
+
+
+def _hard_negative_distractors(
+    corpus: list[Persona], settings: MergeQualitySettings
+) -> HardNegativeDistractors:
+    return HardNegativeDistractors(corpus=corpus, mix=dict(settings.hard_negative_mix))
+
+
+def _make_identifier_registry(settings: MergeQualitySettings) -> IdentifierRegistry:
+    return IdentifierRegistry(
+        namespace=settings.identifier_namespace,
+        num_namespaces=settings.identifier_namespaces,
+        exact=settings.identifier_exact,
+        bloom_capacity=settings.identifier_bloom_capacity,
+        bloom_error_rate=settings.identifier_bloom_error_rate,
+    )
+
+
+def _shares_identifier(record: Persona, identifiers: Mapping[str, str]) -> bool:
+    own = record.unique_identifiers
+    return any(own.get(name) == identifiers.get(name) for name in _IDENTIFIER_TYPES)
+
+
+def _with_identifiers(record: Persona, identifiers: dict[str, str]) -> Persona:
+    if isinstance(record, LazyPersonalData):
+        record.set_identifiers(identifiers)
+        return record
+    if isinstance(record, CompactPersona):
+        return CompactPersona(
+            CompactFields.from_mapping(identifiers), record.flat_attributes
+        )
+    return PersonalData(unique_identifiers=identifiers, attributes=record.attributes)
+
+
+def _collision_values(key: str, persona: PooledPersona) -> list[str]:
+    identifiers = persona.record.unique_identifiers
+    if key == "name_token":
+        return identifiers.get("name", "").lower().split()
+    if key == "ssn_area":
+        ssn = identifiers.get("ssn")
+        return [ssn[:3]] if ssn else []
+    if key == "ssn_suffix":
+        ssn = identifiers.get("ssn")
+        return [ssn[-4:]] if ssn else []
+    fields = persona.flat_fields
+    if fields is None:
+        fields = flat_attributes(persona.record)
+    value = fields.get(key)
+    return [value] if value else []
+
+
 def _build_chunks_for_record(
-    source_record: PersonalData,
+    source_record: Persona,
     flat_fields: SparseRecord,
-    generator: PersonalDataGenerator,
-    cfg: DictConfig,
+    distractors: DistractorSource,
+    settings: MergeQualitySettings,
     rng: random.Random,
-    formats: list[str],
 ) -> list[Chunk]:
     chunks: list[Chunk] = []
-    target_partitions = _partition_fields(flat_fields, formats, rng)
-
-    markdown_rows = getattr(cfg, "markdown_distractor_rows", 3)
-    markdown_chunk_count = max(1, getattr(cfg, "markdown_chunks_per_person", 1))
-    base_distractors = cfg.distractor_chunks_per_format
+    target_partitions = _partition_fields(flat_fields, settings.chunk_formats, rng)
+    # Hard-negative sources collide with the fields the sample keeps
+    target = PooledPersona(record=source_record, flat_fields=flat_fields)
 
-    for fmt in formats:
+    for fmt in settings.chunk_formats:
         identifier_type = _identifier_type(fmt=fmt, rng=rng)
         identifier_value = _identifier_value(identifier_type, source_record)
         target_fields = dict(target_partitions.get(fmt, {}))
@@ -124,11 +659,10 @@ def _build_chunks_for_record(
                     identifier_type=identifier_type,
                     target_fields=target_fields,
                     target_identifier_value=identifier_value,
-                    generator=generator,
-                    cfg=cfg,
+                    target=target,
+                    distractors=distractors,
+                    settings=settings,
                     rng=rng,
-                    rows_per_chunk=max(1, markdown_rows),
-                    chunk_count=markdown_chunk_count,
                 )
             )
             continue
@@ -144,14 +678,17 @@ def _build_chunks_for_record(
                 )
             )
 
-        distractors = generator.generate(n=base_distractors)
-        for distractor in distractors:
-            _, distractor_fields = _sparsify_record(distractor, cfg, rng)
-            distractor_partition = _partition_fields(distractor_fields, [fmt], rng)
+        for distractor in distractors.draw(
+            settings.distractor_chunks_per_format, rng, target
+        ):
+            distractor_fields = _sparsify_pooled(distractor, settings, rng)
+            distractor_partition = _partition_fields(distractor_fields, (fmt,), rng)
             rows.append(
                 ChunkRow(
                     identifier_type=identifier_type,
-                    identifier_value=_identifier_value(identifier_type, distractor),
+                    identifier_value=_identifier_value(
+                        identifier_type, distractor.record
+                    ),
                     owner_id="distractor",
                     fields=dict(distractor_partition.get(fmt, {})),
                 )
@@ -171,15 +708,15 @@ def _build_markdown_chunks(
     identifier_type: str,
     target_fields: SparseRecord,
     target_identifier_value: str,
-    generator: PersonalDataGenerator,
-    cfg: DictConfig,
+    target: PooledPersona,
+    distractors: DistractorSource,
+    settings: MergeQualitySettings,
     rng: random.Random,
-    rows_per_chunk: int,
-    chunk_count: int,
 ) -> list[Chunk]:
     chunks: list[Chunk] = []
 
-    target_probability = getattr(cfg, "markdown_target_row_probability", 0.5)
+    chunk_count = settings.markdown_chunks_per_person
+    target_probability = settings.markdown_target_row_probability
     must_include_target = bool(target_fields)
     forced_chunk_idx = rng.randrange(chunk_count) if must_include_target else None
 
@@ -201,10 +738,10 @@ def _build_markdown_chunks(
         rows.extend(
             _sample_markdown_distractors(
                 identifier_type=identifier_type,
-                generator=generator,
-                cfg=cfg,
+                target=target,
+                distractors=distractors,
+                settings=settings,
                 rng=rng,
-                count=rows_per_chunk,
             )
         )
 
@@ -216,15 +753,15 @@ def _build_markdown_chunks(
 
 def _sample_markdown_distractors(
     identifier_type: str,
-    generator: PersonalDataGenerator,
-    cfg: DictConfig,
+    target: PooledPersona,
+    distractors: DistractorSource,
+    settings: MergeQualitySettings,
     rng: random.Random,
-    count: int,
 ) -> list[ChunkRow]:
     distractor_rows: list[ChunkRow] = []
-    for persona in generator.generate(n=count):
-        _, fields = _sparsify_record(persona, cfg, rng)
-        identifier_value = _identifier_value(identifier_type, persona)
+    for persona in distractors.draw(settings.markdown_distractor_rows, rng, target):
+        fields = _sparsify_pooled(persona, settings, rng)
+        identifier_value = _identifier_value(identifier_type, persona.record)
         row_fields = dict(fields)
         if identifier_value:
             row_fields.setdefault(identifier_type, identifier_value)
@@ -240,19 +777,17 @@ def _sample_markdown_distractors(
 
 
 def _sparsify_record(
-    record: PersonalData,
-    cfg: DictConfig,
+    record: Persona,
+    settings: MergeQualitySettings,
     rng: random.Random,
 ) -> tuple[PersonalData, SparseRecord]:
-    flat_attrs = _flatten_attributes(record.attributes)
+    flat_attrs = flat_attributes(record)
     if not flat_attrs:
-        return record, {}
+        return _materialize(record), {}
 
-    range_cfg = getattr(cfg, "ground_truth_field_range", None)
-    keep = _sample_field_count(range_cfg, len(flat_attrs), rng)
-    selected_keys = rng.sample(list(flat_attrs.keys()), k=keep)
-    sparse_flat = {key: flat_attrs[key] for key in selected_keys}
-    sparse_attrs = _unflatten_attributes(sparse_flat)
+    # Lazy personas only generate the fields picked here
+    sparse_flat = _sparsify_flat(flat_attrs, settings, rng)
+    sparse_attrs = PERSONA_SCHEMA.unflatten(sparse_flat)
 
     sparse_record = PersonalData(
         unique_identifiers=record.unique_identifiers.copy(),
@@ -261,37 +796,60 @@ def _sparsify_record(
     return sparse_record, sparse_flat
 
 
-def _sample_field_count(range_cfg: Any, available: int, rng: random.Random) -> int:
+def _sparsify_pooled(
+    persona: PooledPersona,
+    settings: MergeQualitySettings,
+    rng: random.Random,
+) -> SparseRecord:
+    if persona.flat_fields is None:
+        return _sparsify_record(persona.record, settings, rng)[1]
+    if not persona.flat_fields:
+        return {}
+    return _sparsify_flat(persona.flat_fields, settings, rng)
+
+
+def _sparsify_flat(
+    flat_attrs: Mapping[str, str],
+    settings: MergeQualitySettings,
+    rng: random.Random,
+) -> SparseRecord:
+    keep = _sample_field_count(settings.ground_truth_field_range, len(flat_attrs), rng)
+    selected_keys = rng.sample(list(flat_attrs.keys()), k=keep)
+    return {key: flat_attrs[key] for key in selected_keys}
+
+
+def flat_attributes(record: Persona) -> Mapping[str, str]:
+    """Flattened attribute paths and values of any persona record."""
+    if isinstance(record, (LazyPersonalData, CompactPersona)):
+        return record.flat_attributes
+    return _flatten_attributes(record.attributes)
+
+
+def _materialize(record: Persona) -> PersonalData:
+    if isinstance(record, LazyPersonalData):
+        return record.materialize()
+    if isinstance(record, CompactPersona):
+        return record.to_personal_data()
+    return record
+
+
+def _sample_field_count(
+    field_range: tuple[int, int] | None,
+    available: int,
+    rng: random.Random,
+) -> int:
     if available == 0:
         return 0
 
-    range_pair = _as_range_pair(range_cfg)
-    if range_pair is None:
-        target = int(range_cfg) if range_cfg is not None else available
-        range_pair = (target, target)
-
-    min_fields, max_fields = range_pair
+    min_fields, max_fields = field_range or (available, available)
     lower = max(1, min(min_fields, available))
     upper = max(lower, min(max_fields, available))
     return rng.randint(lower, upper)
 
 
-def _as_range_pair(range_cfg: Any) -> tuple[int, int] | None:
-    if isinstance(range_cfg, ListConfig):
-        seq = list(range_cfg)
-    elif isinstance(range_cfg, (list, tuple)):
-        seq = list(range_cfg)
-    else:
-        return None
-
-    if len(seq) != 2:
-        return None
-    return int(seq[0]), int(seq[1])
-
-
 def _partition_fields(
     fields: SparseRecord,
-    formats: list[str],
+    formats: tuple[str, ...],
     rng: random.Random,
 ) -> dict[str, SparseRecord]:
     partitions: dict[str, SparseRecord] = {fmt: {} for fmt in formats}
@@ -307,60 +865,42 @@ def _partition_fields(
 
 
 def _build_json_chunk(row: ChunkRow) -> Chunk:
-    nested = _unflatten_attributes(_row_fields_with_identifier(row))
-    payload = {
-        "owner": row.owner_id,
-        "identifier_type": row.identifier_type,
-        "identifier_value": row.identifier_value,
-        "data": nested,
-    }
-    return Chunk(
-        format="json",
-        owner_id=row.owner_id,
-        content=json.dumps(payload, indent=2, ensure_ascii=False),
+    data = PERSONA_SCHEMA.render_json_object(_row_fields_with_identifier(row))
+    content = (
+        f'{{\n  "owner": {encode_basestring(row.owner_id)},'
+        f'\n  "identifier_type": {encode_basestring(row.identifier_type)},'
+        f'\n  "identifier_value": {encode_basestring(row.identifier_value)},'
+        f'\n  "data": {data}\n}}'
     )
+    return Chunk(format="json", owner_id=row.owner_id, content=content)
 
 
 def _build_xml_chunk(row: ChunkRow) -> Chunk:
-    data = _unflatten_attributes(_row_fields_with_identifier(row))
-    lines = ["<record>"]
-    for key in sorted(data):
-        lines.append(_dict_to_xml(key, data[key], indent=1))
-    lines.append("</record>")
+    body = PERSONA_SCHEMA.render_xml_body(_row_fields_with_identifier(row))
     return Chunk(
         format="xml",
         owner_id=row.owner_id,
-        content="\n".join(lines),
+        content=f"<record>\n{body}\n</record>" if body else "<record>\n</record>",
     )
 
 
 def _build_markdown_chunk(rows: list[ChunkRow], identifier_type: str) -> Chunk:
-    row_payloads: list[dict[str, Any]] = []
+    row_fields = [_row_fields_with_identifier(row) for row in rows]
     column_names: set[str] = set()
-    for row in rows:
-        fields = _sorted_dict(_row_fields_with_identifier(row))
-        column_names.update(fields.keys())
-        row_payloads.append(
-            {
-                "owner_id": row.owner_id,
-                "fields": fields,
-                "identifier_value": row.identifier_value,
-            }
-        )
-
-    ordered_columns = [identifier_type] + [
-        column for column in sorted(column_names) if column != identifier_type
+    for fields in row_fields:
+        column_names.update(fields)
+    column_names.discard(identifier_type)
+    ordered_columns = [identifier_type, *sorted(column_names)]
+
+    lines = [
+        "| " + " | ".join(ordered_columns) + " |",
+        "| " + " | ".join(["---"] * len(ordered_columns)) + " |",
     ]
-
-    header = "| " + " | ".join(ordered_columns) + " |"
-    separator = "| " + " | ".join(["---"] * len(ordered_columns)) + " |"
-    lines = [header, separator]
-    for payload in row_payloads:
-        fields = payload["fields"]
+    for fields in row_fields:
         row_values = [fields.get(column, "") for column in ordered_columns]
         lines.append("| " + " | ".join(row_values) + " |")
 
-    owner_states = {payload["owner_id"] for payload in row_payloads}
+    owner_states = {row.owner_id for row in rows}
     if owner_states == {"target"}:
         owner_id = "target"
     elif owner_states == {"distractor"}:
@@ -375,57 +915,8 @@ def _build_markdown_chunk(rows: list[ChunkRow], identifier_type: str) -> Chunk:
     )
 
 
-def _dict_to_xml(tag: str, value: Any, indent: int = 0) -> str:
-    prefix = "  " * indent
-    if isinstance(value, dict):
-        lines = [f"{prefix}<{tag}>"]
-        for key in sorted(value):
-            lines.append(_dict_to_xml(key, value[key], indent + 1))
-        lines.append(f"{prefix}</{tag}>")
-        return "\n".join(lines)
-    if isinstance(value, list):
-        raise ValueError("List values are not supported in XML chunks")
-    return f"{prefix}<{tag}>{_escape_xml(str(value))}</{tag}>"
-
-
 def _flatten_attributes(attributes: NestedStrDict | dict[str, Any]) -> SparseRecord:
-    flat: SparseRecord = {}
-
-    def _recurse(current: Any, path: str) -> None:
-        if isinstance(current, dict):
-            for key, value in current.items():
-                next_path = f"{path}__{key}" if path else key
-                _recurse(value, next_path)
-        else:
-            flat[path] = str(current)
-
-    _recurse(attributes, "")
-    return flat
-
-
-def _unflatten_attributes(flat: SparseRecord) -> dict[str, NestedStrDict]:
-    nested: dict[str, Any] = {}
-    for path, value in flat.items():
-        keys = path.split("__") if path else [path]
-        cursor: dict[str, Any] = nested
-        for key in keys[:-1]:
-            cursor = cursor.setdefault(key, {})  # type: ignore[assignment]
-        cursor[keys[-1]] = value
-    return nested
-
-
-def _sorted_dict(data: SparseRecord) -> SparseRecord:
-    return {key: data[key] for key in sorted(data)} if data else {}
-
-
-def _escape_xml(value: str) -> str:
-    return (
-        value.replace("&", "&amp;")
-        .replace("<", "&lt;")
-        .replace(">", "&gt;")
-        .replace('"', "&quot;")
-        .replace("'", "&apos;")
-    )
+    return PERSONA_SCHEMA.flatten(attributes)
 
 
 def _identifier_type(fmt: str, rng: random.Random) -> str:
@@ -434,7 +925,7 @@ def _identifier_type(fmt: str, rng: random.Random) -> str:
     return rng.choice(_IDENTIFIER_TYPES)
 
 
-def _identifier_value(identifier_type: str, record: PersonalData) -> str:
+def _identifier_value(identifier_type: str, record: Persona) -> str:
     if identifier_type in record.unique_identifiers:
         return record.unique_identifiers[identifier_type]
     if identifier_type == "email":
@@ -442,13 +933,8 @@ def _identifier_value(identifier_type: str, record: PersonalData) -> str:
     return ""
 
 
-def _extract_email(record: PersonalData) -> str | None:
-    contacts = record.attributes.get("contacts")
-    if isinstance(contacts, dict):
-        email = contacts.get("email")
-        if isinstance(email, str):
-            return email
-    return None
+def _extract_email(record: Persona) -> str | None:
+    return flat_attributes(record).get("contacts__email")
 
 
 def _row_fields_with_identifier(row: ChunkRow) -> SparseRecord:
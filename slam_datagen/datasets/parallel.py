@@ -0,0 +1,404 @@
+"""Process-pool sharded generation of the merge-quality dataset.
+
+``dataset_size`` is split into ``num_workers`` contiguous shards. Every shard
+runs in its own process with a ``PersonalDataGenerator`` and ``random.Random``
+seeded from ``derive_seed(random_seed, "shard", shard_index)``, so the merged
+output is byte-identical for a fixed ``(random_seed, num_workers)`` pair. With
+``seeding: per_sample`` shards only shift ``sample_offset`` and the output does
+not depend on ``num_workers`` at all.
+
+The same shards can be spread over several machines through a ``WorkQueue`` on
+a shared filesystem: the coordinator plans one task per shard, workers claim
+and generate them, and a final merge verifies shard checksums and writes a
+manifest next to the merged output. With ``output_shard_records`` or
+``output_shard_bytes`` set, the merge splits the output into numbered shards
+instead and the manifest lists them; with ``splits`` it routes every line to
+its train / validation / test split.
+
+With ``output_compression`` set, every shard is compressed in its own process
+and the merge concatenates compressed shards and their block indexes without
+recompressing them. With ``parquet_export`` every shard exports its own Parquet
+tables, numbered by the global sample index of its samples, and the merge
+concatenates them in shard order, so sample ids match a single-process run
+whatever the output splits.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from omegaconf import DictConfig, OmegaConf
+
+from slam_datagen.datasets.merge_quality import (iter_merge_quality_dataset,
+                                                 line_split_key,
+                                                 write_merge_quality_dataset)
+from slam_datagen.datasets.parquet import (ParquetExporter, concatenate_parquet_tables,
+                                           parquet_paths, tee_to_parquet)
+from slam_datagen.datasets.settings import MergeQualitySettings
+from slam_datagen.datasets.stats import MergeQualityStats, stats_path
+from slam_datagen.io.compression import (compressed_path, compression_of,
+                                         concatenate_outputs, count_records,
+                                         move_output, open_output, remove_output)
+from slam_datagen.io.splits import SplitWriter
+from slam_datagen.io.writer import ShardedWriter
+from slam_datagen.utils.seeding import derive_seed
+from slam_datagen.utils.work_queue import WorkQueue
+
+# Config keys that describe a particular run rather than the generated data
+_RUN_SPECIFIC_KEYS: tuple[str, ...] = (
+    "project_path",
+    "result_dir",
+    "hydra_root",
+    "hydra_dir",
+    "user_settings",
+    "output_file",
+    "preview_samples",
+    "num_workers",
+    "keep_shard_files",
+    "distributed",
+)
+
+
+@dataclass
+class ShardSpec:
+    index: int
+    count: int
+    start: int
+    size: int
+    output_file: Path
+
+
+def shard_ranges(total: int, num_shards: int) -> list[tuple[int, int]]:
+    """Split ``total`` items into ``num_shards`` contiguous ``(start, size)`` ranges."""
+    if num_shards <= 0:
+        raise ValueError("num_shards must be positive")
+    base, remainder = divmod(total, num_shards)
+    ranges: list[tuple[int, int]] = []
+    start = 0
+    for idx in range(num_shards):
+        size = base + (1 if idx < remainder else 0)
+        ranges.append((start, size))
+        start += size
+    return ranges
+
+
+def shard_output_file(output_file: str | Path, index: int, count: int) -> Path:
+    output_path = Path(output_file)
+    return output_path.with_name(
+        f"{output_path.stem}.shard-{index:05d}-of-{count:05d}{output_path.suffix}"
+    )
+
+
+def generate_merge_quality_dataset_parallel(
+    cfg: DictConfig,
+    num_workers: int,
+    keep_shard_files: bool = False,
+) -> Path:
+    """Generate the dataset in ``num_workers`` processes and merge shards in order."""
+    if num_workers <= 0:
+        raise ValueError("num_workers must be positive")
+    # Fail on invalid settings before any worker process is started
+    settings = MergeQualitySettings.from_config(cfg)
+
+    output_path = Path(cfg.output_file)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    container = OmegaConf.to_container(cfg, resolve=True)
+    shards = [
+        ShardSpec(
+            index=idx,
+            count=num_workers,
+            start=start,
+            size=size,
+            output_file=shard_output_file(output_path, idx, num_workers),
+        )
+        for idx, (start, size) in enumerate(shard_ranges(cfg.dataset_size, num_workers))
+    ]
+
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        shard_files = list(
+            executor.map(write_merge_quality_shard, [container] * len(shards), shards)
+        )
+
+    merged_path = _merge_outputs(shard_files, output_path, settings)
+    if settings.parquet_export:
+        shard_outputs = [shard.output_file for shard in shards]
+        concatenate_parquet_tables(shard_outputs, output_path)
+        if not keep_shard_files:
+            for shard_output in shard_outputs:
+                for table_path in parquet_paths(shard_output):
+                    table_path.unlink()
+    if not keep_shard_files:
+        for shard_file in shard_files:
+            remove_output(shard_file)
+    if settings.collect_stats:
+        stats = MergeQualityStats()
+        for shard in shards:
+            shard_stats = stats_path(shard.output_file)
+            stats.merge(MergeQualityStats.read(shard_stats))
+            if not keep_shard_files:
+                shard_stats.unlink()
+        stats.write(stats_path(output_path))
+
+    return merged_path
+
+
+def write_merge_quality_shard(container: Any, shard: ShardSpec) -> Path:
+    """Generate a single shard; runs inside a worker process."""
+    cfg = OmegaConf.create(container)
+    settings = MergeQualitySettings.from_config(shard_config(cfg, shard))
+    samples = iter_merge_quality_dataset(
+        generator=settings.persona_generator(), cfg=settings
+    )
+    stats = MergeQualityStats() if settings.collect_stats else None
+    if stats is not None:
+        samples = stats.track(samples)
+    exporter = None
+    if settings.parquet_export:
+        exporter = ParquetExporter(
+            shard.output_file,
+            row_group_size=settings.parquet_row_group_size,
+            first_index=shard_first_index(cfg, shard),
+        )
+        samples = tee_to_parquet(samples, exporter)
+    try:
+        written = write_merge_quality_dataset(
+            samples=samples,
+            output_file=shard.output_file,
+            flush_every=settings.flush_every,
+            serializer=settings.output.serializer,
+            # Output shards and splits are cut by the merge step, which
+            # recompresses them
+            compression=(
+                "none"
+                if settings.output.rewrites_output
+                else settings.output.compression
+            ),
+            compression_threads=settings.output.compression_threads,
+        )
+    finally:
+        if exporter is not None:
+            exporter.close()
+    if stats is not None:
+        stats.write(stats_path(shard.output_file))
+    return written
+
+
+def shard_first_index(cfg: DictConfig, shard: ShardSpec) -> int:
+    """Sample index of the first sample of ``shard`` in the merged output."""
+    return int(cfg.get("sample_offset", 0)) + shard.start
+
+
+def shard_config(cfg: DictConfig, shard: ShardSpec) -> DictConfig:
+    shard_cfg = cfg.copy()
+    shard_cfg.dataset_size = shard.size
+    if cfg.get("seeding", "sequential") == "per_sample":
+        # Samples are seeded by their global index; no per-shard seed is needed
+        shard_cfg.sample_offset = shard_first_index(cfg, shard)
+    else:
+        shard_cfg.random_seed = derive_seed(cfg.random_seed, "shard", shard.index)
+    if cfg.get("unique_identifiers", False):
+        # Every shard owns a disjoint identifier namespace of the run's one
+        shard_cfg.identifier_namespace = (
+            int(cfg.get("identifier_namespace", 0)) * shard.count + shard.index
+        )
+        shard_cfg.identifier_namespaces = (
+            int(cfg.get("identifier_namespaces", 1)) * shard.count
+        )
+    return shard_cfg
+
+
+def plan_merge_quality_tasks(cfg: DictConfig, queue: WorkQueue, num_tasks: int) -> None:
+    """Split the job into ``num_tasks`` shard tasks on the shared queue."""
+    MergeQualitySettings.from_config(cfg)
+    container = OmegaConf.to_container(cfg, resolve=True)
+    assert isinstance(container, dict)
+    job_config = {
+        key: value for key, value in container.items() if key not in _RUN_SPECIFIC_KEYS
+    }
+    payloads = [
+        {"start": start, "size": size}
+        for start, size in shard_ranges(cfg.dataset_size, num_tasks)
+    ]
+    queue.plan(
+        job={"dataset": "merge_quality", "num_tasks": num_tasks, "config": job_config},
+        payloads=payloads,
+    )
+
+
+def run_merge_quality_worker(queue: WorkQueue, worker_id: str) -> int:
+    """Claim and generate shard tasks until none is left; returns tasks completed."""
+    job = queue.job()
+    shards_dir = queue.root / "shards"
+    shards_dir.mkdir(parents=True, exist_ok=True)
+
+    completed = 0
+    while (task := queue.claim(worker_id)) is not None:
+        shard_name = _task_shard_name(task.index)
+        with queue.keep_alive(task):
+            tmp_path = shards_dir / f".{shard_name}.{worker_id}.tmp"
+            written = write_merge_quality_shard(
+                job["config"],
+                ShardSpec(
+                    index=task.index,
+                    count=job["num_tasks"],
+                    start=task.payload["start"],
+                    size=task.payload["size"],
+                    output_file=tmp_path,
+                ),
+            )
+            shard_path = move_output(
+                written,
+                compressed_path(shards_dir / shard_name, compression_of(written)),
+            )
+            if job["config"].get("parquet_export", False):
+                for tmp_table, table in zip(
+                    parquet_paths(tmp_path), parquet_paths(shards_dir / shard_name)
+                ):
+                    tmp_table.replace(table)
+            records, digest = _file_digest(shard_path)
+
+        result = {
+            "worker_id": worker_id,
+            "file": shard_path.name,
+            "start": task.payload["start"],
+            "records": records,
+            "bytes": shard_path.stat().st_size,
+            "sha256": digest,
+        }
+        if stats_path(tmp_path).exists():
+            # Shard statistics travel with the completion record
+            result["stats"] = MergeQualityStats.read(stats_path(tmp_path)).to_dict()
+            stats_path(tmp_path).unlink()
+        if queue.complete(task, result):
+            completed += 1
+    return completed
+
+
+def merge_merge_quality_tasks(queue: WorkQueue, output_file: str | Path) -> Path:
+    """Verify every shard task and concatenate them into ``output_file``.
+
+    A ``<output stem>.manifest.json`` with per-shard record counts, sizes,
+    sample index ranges and SHA-256 digests is written next to the output.
+    When the job splits its output into shards, the manifest of the output
+    shards is returned and lists the verified tasks under ``tasks``.
+    """
+    pending = queue.pending()
+    if pending:
+        raise ValueError(f"Tasks are not complete yet: {pending}")
+
+    tasks = {task.index: task for task in queue.tasks()}
+    results = queue.results()
+    shards: list[dict[str, Any]] = []
+    for index in sorted(tasks):
+        result = results[index]
+        shard_path = queue.root / "shards" / result["file"]
+        records, digest = _file_digest(shard_path)
+        if digest != result["sha256"] or records != tasks[index].payload["size"]:
+            raise ValueError(f"Shard {shard_path} does not match its completion record")
+        shards.append(
+            {
+                "index": index,
+                "file": result["file"],
+                "records": records,
+                "bytes": result["bytes"],
+                "sha256": digest,
+                "sample_range": [result["start"], result["start"] + records],
+            }
+        )
+
+    output_path = Path(output_file)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    shard_paths = [queue.root / "shards" / shard["file"] for shard in shards]
+    settings = MergeQualitySettings.from_config(OmegaConf.create(queue.job()["config"]))
+    merged_path = _merge_outputs(shard_paths, output_path, settings)
+    if settings.parquet_export:
+        concatenate_parquet_tables(
+            [
+                queue.root / "shards" / _task_shard_name(index)
+                for index in sorted(tasks)
+            ],
+            output_path,
+        )
+    if settings.collect_stats:
+        stats = MergeQualityStats()
+        for index in sorted(tasks):
+            stats.merge(MergeQualityStats.from_dict(results[index]["stats"]))
+        stats.write(stats_path(output_path))
+    if settings.output.rewrites_output:
+        # The output manifest or splits index lists the rewritten outputs;
+        # keep the verified tasks too
+        with merged_path.open(encoding="utf-8") as handle:
+            manifest = json.load(handle)
+        manifest["tasks"] = shards
+        with merged_path.open("w", encoding="utf-8") as handle:
+            json.dump(manifest, handle, indent=2)
+        return merged_path
+
+    records, digest = _file_digest(merged_path)
+    manifest = {
+        "output_file": merged_path.name,
+        "records": records,
+        "bytes": merged_path.stat().st_size,
+        "sha256": digest,
+        "shards": shards,
+    }
+    manifest_path = output_path.with_name(f"{output_path.stem}.manifest.json")
+    with manifest_path.open("w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2)
+    return merged_path
+
+
+def _task_shard_name(index: int) -> str:
+    return f"task-{index:05d}.jsonl"
+
+
+def _merge_outputs(
+    parts: list[Path], output_path: Path, settings: MergeQualitySettings
+) -> Path:
+    """Concatenate worker outputs, or route their lines to output shards or
+    splits."""
+    output = settings.output
+    if not output.rewrites_output:
+        return concatenate_outputs(
+            parts, compressed_path(output_path, compression_of(parts[0]))
+        )
+    options: dict[str, Any] = {
+        "shard_records": output.shard_records,
+        "shard_bytes": output.shard_bytes,
+        "compression": output.compression,
+        "threads": output.compression_threads,
+    }
+    split_ratios = output.split_ratios
+    if split_ratios is not None:
+        with SplitWriter(output_path, split_ratios, **options) as split_writer:
+            for part in parts:
+                with open_output(part) as handle:
+                    for line in handle:
+                        split_writer.write(line, line_split_key(line))
+        return split_writer.path
+
+    with ShardedWriter(
+        output_path, first_index=settings.sample_offset, **options
+    ) as writer:
+        for part in parts:
+            with open_output(part) as handle:
+                for line in handle:
+                    writer.write(line)
+    return writer.path
+
+
+def _file_digest(path: Path) -> tuple[int, str]:
+    digest = hashlib.sha256()
+    records = 0
+    with path.open("rb") as handle:
+        while block := handle.read(1 << 20):
+            digest.update(block)
+            records += block.count(b"\n")
+    if compression_of(path) != "none":
+        records = count_records(path)
+    return records, digest.hexdigest()
@@ -0,0 +1,239 @@
+"""Columnar Parquet export of the merge-quality dataset.
+
+Samples are normalized into two tables written next to each other:
+
+* ``<stem>.samples.parquet``: ``sample_id``, the ground-truth identifiers, the
+  provided identifiers (a map from identifier name to value) and one nullable
+  string column per flattened attribute path of ``ATTRIBUTE_PATHS``;
+* ``<stem>.chunks.parquet``: ``sample_id``, ``chunk_index``, ``format``,
+  ``owner_id`` and ``content`` of every chunk.
+
+Rows are buffered per column and flushed as a row group every
+``row_group_size`` rows, so samples can be streamed without holding the
+dataset in memory. Low-cardinality columns are dictionary-encoded. Requires the
+optional ``pyarrow`` package.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+from slam_datagen.datasets.merge_quality import (CompactSample, DatasetSample,
+                                                 flat_attributes)
+from slam_datagen.datasets.settings import DEFAULT_PARQUET_ROW_GROUP_SIZE
+from slam_datagen.personal_data import ATTRIBUTE_PATHS, IDENTIFIER_FIELDS
+
+DEFAULT_ROW_GROUP_SIZE = DEFAULT_PARQUET_ROW_GROUP_SIZE
+
+_CHUNK_COLUMNS: tuple[str, ...] = (
+    "sample_id",
+    "chunk_index",
+    "format",
+    "owner_id",
+    "content",
+)
+# Columns whose values repeat across rows; identifiers and chunk contents are
+# nearly unique and would only grow a dictionary page that is then abandoned
+_DICTIONARY_COLUMNS: tuple[str, ...] = ("format", "owner_id", *ATTRIBUTE_PATHS)
+
+
+def parquet_paths(output_file: str | Path) -> tuple[Path, Path]:
+    """Samples and chunks table paths for the dataset ``output_file``."""
+    output_path = Path(output_file)
+    return (
+        output_path.with_name(f"{output_path.stem}.samples.parquet"),
+        output_path.with_name(f"{output_path.stem}.chunks.parquet"),
+    )
+
+
+class ParquetExporter:
+    """Streams merge-quality samples into the samples and chunks tables."""
+
+    def __init__(
+        self,
+        output_file: str | Path,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        compression: str = "zstd",
+        first_index: int = 0,
+    ) -> None:
+        if row_group_size <= 0:
+            raise ValueError("row_group_size must be positive")
+        pa, pq = _import_pyarrow()
+        self._pa = pa
+        self.samples_path, self.chunks_path = parquet_paths(output_file)
+        self.samples_path.parent.mkdir(parents=True, exist_ok=True)
+        self._row_group_size = row_group_size
+        self._next_id = first_index
+        self._sample_schema = pa.schema(
+            [
+                ("sample_id", pa.int64()),
+                *((name, pa.string()) for name in IDENTIFIER_FIELDS),
+                ("provided_identifiers", pa.map_(pa.string(), pa.string())),
+                *((path, pa.string()) for path in ATTRIBUTE_PATHS),
+            ]
+        )
+        self._chunk_schema = pa.schema(
+            [
+                ("sample_id", pa.int64()),
+                ("chunk_index", pa.int32()),
+                ("format", pa.string()),
+                ("owner_id", pa.string()),
+                ("content", pa.string()),
+            ]
+        )
+        options = {
+            "compression": compression,
+            "use_dictionary": list(_DICTIONARY_COLUMNS),
+        }
+        self._sample_writer = pq.ParquetWriter(
+            self.samples_path, self._sample_schema, **options
+        )
+        self._chunk_writer = pq.ParquetWriter(
+            self.chunks_path, self._chunk_schema, **options
+        )
+        self._samples: dict[str, list[Any]] = {
+            name: [] for name in self._sample_schema.names
+        }
+        self._chunks: dict[str, list[Any]] = {name: [] for name in _CHUNK_COLUMNS}
+
+    def add(self, sample: DatasetSample | CompactSample) -> None:
+        sample_id = self._next_id
+        self._next_id += 1
+
+        columns = self._samples
+        columns["sample_id"].append(sample_id)
+        identifiers = sample.ground_truth.unique_identifiers
+        for name in IDENTIFIER_FIELDS:
+            columns[name].append(identifiers.get(name))
+        columns["provided_identifiers"].append(
+            list(sample.provided_identifiers.items())
+        )
+        attributes = flat_attributes(sample.ground_truth)
+        for path in ATTRIBUTE_PATHS:
+            columns[path].append(attributes.get(path))
+
+        chunks = self._chunks
+        for chunk_index, chunk in enumerate(sample.chunks):
+            chunks["sample_id"].append(sample_id)
+            chunks["chunk_index"].append(chunk_index)
+            chunks["format"].append(chunk.format)
+            chunks["owner_id"].append(chunk.owner_id)
+            chunks["content"].append(chunk.content)
+
+        if len(columns["sample_id"]) >= self._row_group_size:
+            self._write_samples()
+        if len(chunks["sample_id"]) >= self._row_group_size:
+            self._write_chunks()
+
+    def close(self) -> None:
+        if self._sample_writer is None:
+            return
+        self._write_samples()
+        self._write_chunks()
+        self._sample_writer.close()
+        self._chunk_writer.close()
+        self._sample_writer = self._chunk_writer = None
+
+    def __enter__(self) -> ParquetExporter:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def _write_samples(self) -> None:
+        self._write(self._sample_writer, self._sample_schema, self._samples)
+
+    def _write_chunks(self) -> None:
+        self._write(self._chunk_writer, self._chunk_schema, self._chunks)
+
+    def _write(self, writer: Any, schema: Any, columns: dict[str, list[Any]]) -> None:
+        if not columns["sample_id"]:
+            return
+        table = self._pa.Table.from_pydict(columns, schema=schema)
+        writer.write_table(table, row_group_size=self._row_group_size)
+        for values in columns.values():
+            values.clear()
+
+
+def write_merge_quality_parquet(
+    samples: Iterable[DatasetSample | CompactSample],
+    output_file: str | Path,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    compression: str = "zstd",
+    first_index: int = 0,
+) -> tuple[Path, Path]:
+    """Write samples to the samples and chunks tables of ``output_file``."""
+    with ParquetExporter(
+        output_file,
+        row_group_size=row_group_size,
+        compression=compression,
+        first_index=first_index,
+    ) as exporter:
+        for sample in samples:
+            exporter.add(sample)
+    return exporter.samples_path, exporter.chunks_path
+
+
+def concatenate_parquet_tables(
+    parts: Iterable[str | Path],
+    output_file: str | Path,
+    compression: str = "zstd",
+) -> tuple[Path, Path]:
+    """Concatenate the tables of the outputs ``parts`` into those of
+    ``output_file``, one row group at a time.
+
+    Parallel and distributed shards export their own tables with the sample ids
+    of the merged run, so the concatenation keeps them in shard order.
+    """
+    _, pq = _import_pyarrow()
+    part_paths = [parquet_paths(part) for part in parts]
+    outputs = parquet_paths(output_file)
+    outputs[0].parent.mkdir(parents=True, exist_ok=True)
+    for table, output_path in enumerate(outputs):
+        writer = None
+        try:
+            for paths in part_paths:
+                source = pq.ParquetFile(paths[table])
+                if writer is None:
+                    writer = pq.ParquetWriter(
+                        output_path,
+                        source.schema_arrow,
+                        compression=compression,
+                        use_dictionary=list(_DICTIONARY_COLUMNS),
+                    )
+                for group in range(source.num_row_groups):
+                    writer.write_table(source.read_row_group(group))
+        finally:
+            if writer is not None:
+                writer.close()
+    return outputs
+
+
+def tee_to_parquet(
+    samples: Iterable[DatasetSample | CompactSample],
+    exporter: ParquetExporter,
+) -> Iterator[DatasetSample | CompactSample]:
+    """Pass samples through while adding them to ``exporter``."""
+    for sample in samples:
+        exporter.add(sample)
+        yield sample
+
+
+def _import_pyarrow() -> tuple[Any, Any]:
+    try:
+        # pylint: disable=import-outside-toplevel
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ValueError(
+            "Parquet export requires the optional 'pyarrow' package"
+        ) from error
+    return pyarrow, pyarrow.parquet
@@ -0,0 +1,239 @@
+"""Random-access readers for the JSON Lines datasets.
+
+A reader opens an output file, or every shard listed by an output manifest,
+and serves records by index without loading the dataset into memory:
+
+* uncompressed files are memory-mapped and located through a line-offset index
+  (``<file>.offsets.npy``, one ``uint64`` start offset per line plus the file
+  size, after a header with the size and modification time of the indexed
+  file), built on first use and loaded with ``mmap_mode="r"`` afterwards;
+* compressed files are located through their block index and only the block
+  holding a record is decompressed.
+
+Records are decoded from JSON on access only, and slicing returns a view over
+the same files, so ``len()``, ``dataset[i]`` and ``dataset[i:j]`` are all
+O(1) in the dataset size.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+from bisect import bisect_right
+from collections.abc import Iterator, Sequence
+from functools import lru_cache
+from pathlib import Path
+from types import TracebackType
+from typing import Any, TypeVar, overload
+
+import numpy as np
+
+from slam_datagen.datasets.merge_quality import DatasetSample, deserialize_sample
+from slam_datagen.io.compression import (block_decompressor, compression_of,
+                                         read_block_index)
+from slam_datagen.io.writer import output_files
+
+_NEWLINE = ord("\n")
+# Bytes scanned at once while building an offset index
+_SCAN_SIZE = 64 << 20
+# Offset index header: size and modification time (ns) of the indexed file
+_INDEX_HEADER = 2
+# Decompressed blocks kept per compressed file
+_CACHED_BLOCKS = 4
+
+T = TypeVar("T")
+DatasetT = TypeVar("DatasetT", bound="JsonlDataset[Any]")
+
+
+def offset_index_path(path: str | Path) -> Path:
+    path = Path(path)
+    return path.with_name(f"{path.name}.offsets.npy")
+
+
+def build_offset_index(path: str | Path, write: bool = True) -> np.ndarray:
+    """Return the start offset of every line of ``path`` followed by its size.
+
+    The index is loaded from its sidecar when the size and modification time
+    recorded in its header match the file, and otherwise rebuilt and, with
+    ``write``, saved next to the file.
+    """
+    path = Path(path)
+    stat = path.stat()
+    size = stat.st_size
+    header = np.array([size, stat.st_mtime_ns], dtype=np.uint64)
+    index_path = offset_index_path(path)
+    if index_path.exists():
+        stored = np.load(index_path, mmap_mode="r")
+        if len(stored) > _INDEX_HEADER and np.array_equal(
+            stored[:_INDEX_HEADER], header
+        ):
+            return stored[_INDEX_HEADER:]
+
+    starts = [np.zeros(1, dtype=np.uint64)]
+    with path.open("rb") as handle:
+        position = 0
+        while block := handle.read(_SCAN_SIZE):
+            newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == _NEWLINE)
+            starts.append((newlines + position + 1).astype(np.uint64))
+            position += len(block)
+    offsets = np.concatenate(starts)
+    if offsets[-1] != size:
+        # The last line has no trailing newline
+        offsets = np.append(offsets, np.uint64(size))
+    if write:
+        try:
+            np.save(index_path, np.concatenate([header, offsets]))
+        except OSError:
+            pass
+    return offsets
+
+
+class _MappedFile:
+    """Lines of an uncompressed file, read through ``mmap``."""
+
+    def __init__(self, path: Path, write_index: bool) -> None:
+        self._offsets = build_offset_index(path, write=write_index)
+        self._map: mmap.mmap | None = None
+        if int(self._offsets[-1]):
+            with path.open("rb") as handle:
+                self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def line(self, index: int) -> bytes:
+        assert self._map is not None
+        return self._map[int(self._offsets[index]) : int(self._offsets[index + 1])]
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+
+
+class _BlockFile:
+    """Lines of a block-compressed file, read one decompressed block at a time."""
+
+    def __init__(self, path: Path) -> None:
+        index = read_block_index(path)
+        if index is None:
+            raise ValueError(f"Compressed output {path} has no block index")
+        self._path = path
+        self._blocks = index["blocks"]
+        self._first_records = [block["first_record"] for block in self._blocks]
+        self._records = sum(block["records"] for block in self._blocks)
+        self._decompress = block_decompressor(index["compression"])
+        self._handle = path.open("rb")  # pylint: disable=consider-using-with
+        self._lines = lru_cache(maxsize=_CACHED_BLOCKS)(self._read_block)
+
+    def __len__(self) -> int:
+        return self._records
+
+    def line(self, index: int) -> bytes:
+        block = bisect_right(self._first_records, index) - 1
+        return self._lines(block)[index - self._first_records[block]]
+
+    def close(self) -> None:
+        self._handle.close()
+
+    def _read_block(self, block: int) -> list[bytes]:
+        entry = self._blocks[block]
+        self._handle.seek(entry["offset"])
+        return self._decompress(self._handle.read(entry["length"])).splitlines(
+            keepends=True
+        )
+
+
+class JsonlDataset(Sequence[T]):
+    """Random-access sequence of the records of a JSON Lines output.
+
+    ``path`` is a ``.jsonl`` file (optionally ``.gz`` / ``.zst`` compressed
+    with a block index) or the ``<stem>.manifest.json`` of a sharded output.
+    Set ``write_index=False`` to never write offset index sidecars, e.g. on
+    read-only storage.
+    """
+
+    def __init__(self, path: str | Path, write_index: bool = True) -> None:
+        self.path = Path(path)
+        self._write_index = write_index
+        self._files = [
+            (
+                _MappedFile(file, write_index)
+                if compression_of(file) == "none"
+                else _BlockFile(file)
+            )
+            for file in output_files(self.path)
+        ]
+        self._starts = [0]
+        for file in self._files:
+            self._starts.append(self._starts[-1] + len(file))
+        self._indices = range(self._starts[-1])
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+
+    @overload
+    def __getitem__(self: DatasetT, index: slice) -> DatasetT: ...
+
+    def __getitem__(self, index: int | slice) -> Any:
+        if isinstance(index, slice):
+            view = object.__new__(type(self))
+            view.__dict__.update(self.__dict__)
+            view._indices = self._indices[index]
+            return view
+        return self._decode(self.raw(index))
+
+    def __iter__(self) -> Iterator[T]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def raw(self, index: int) -> bytes:
+        """Undecoded line ``index``, including its trailing newline."""
+        position = self._indices[index]
+        file = bisect_right(self._starts, position) - 1
+        return self._files[file].line(position - self._starts[file])
+
+    def close(self) -> None:
+        """Release the files; views created by slicing are closed too."""
+        for file in self._files:
+            file.close()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Memory maps and file handles are reopened by the receiving process,
+        # e.g. a data loader worker
+        return {
+            "path": self.path,
+            "write_index": self._write_index,
+            "indices": self._indices,
+        }
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(state["path"], state["write_index"])  # type: ignore[misc]
+        self._indices = state["indices"]
+
+    def __enter__(self: DatasetT) -> DatasetT:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def _decode(self, line: bytes) -> T:
+        return json.loads(line)
+
+
+class MergeQualityDataset(JsonlDataset[DatasetSample]):
+    """Merge-quality samples decoded into ``DatasetSample`` records."""
+
+    def _decode(self, line: bytes) -> DatasetSample:
+        return deserialize_sample(json.loads(line))
+
+
+class HumanMessagesDataset(JsonlDataset[dict[str, str]]):
+    """Human-message samples decoded into ``{"text", "type"}`` dicts."""
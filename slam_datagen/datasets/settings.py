@@ -0,0 +1,432 @@
+"""Validated, immutable settings of the dataset builders.
+
+Builders resolve their Hydra ``DictConfig`` into one of these dataclasses once,
+before any generation work starts, and pass plain attributes down the
+per-sample code paths instead of going through OmegaConf on every access.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+from omegaconf import DictConfig, ListConfig
+
+from slam_datagen.io.compression import check_compression
+from slam_datagen.io.serialization import SERIALIZER_BACKENDS
+from slam_datagen.io.splits import resolve_splits
+from slam_datagen.io.writer import DEFAULT_COMPRESSION_THREADS
+from slam_datagen.personal_data import (ATTRIBUTE_PATHS, PERSONA_BACKENDS,
+                                        PersonalDataGenerator)
+
+SEEDING_MODES: tuple[str, ...] = ("sequential", "per_sample")
+# "streams" draws targets and distractors from seed-derived persona streams
+MERGE_QUALITY_SEEDING_MODES: tuple[str, ...] = (*SEEDING_MODES, "streams")
+DEFAULT_TARGET_BATCH_SIZE = 1000
+DEFAULT_FLUSH_EVERY = 1000
+DEFAULT_PARQUET_ROW_GROUP_SIZE = 65536
+CHUNK_FORMATS: tuple[str, ...] = ("json", "xml", "markdown")
+# Collision keys of hard-negative distractors besides flattened attribute paths
+HARD_NEGATIVE_KEYS: tuple[str, ...] = ("random", "name_token", "ssn_area", "ssn_suffix")
+DEFAULT_HARD_NEGATIVE_MIX: tuple[tuple[str, float], ...] = (
+    ("name_token", 0.4),
+    ("ssn_area", 0.1),
+    ("ssn_suffix", 0.1),
+    ("work__company", 0.2),
+    ("random", 0.2),
+)
+
+
+@dataclass(frozen=True)
+class OutputSettings:
+    """How a builder writes its JSON Lines output."""
+
+    serializer: str = "stdlib"
+    compression: str = "none"
+    compression_threads: int = DEFAULT_COMPRESSION_THREADS
+    # Roll the output over to numbered shards; None disables either limit
+    shard_records: int | None = None
+    shard_bytes: int | None = None
+    # (split name, ratio) pairs; None writes a single output
+    splits: tuple[tuple[str, float], ...] | None = None
+
+    def __post_init__(self) -> None:
+        if self.serializer not in SERIALIZER_BACKENDS:
+            raise ValueError(f"Unsupported serializer '{self.serializer}'")
+        check_compression(self.compression)
+        if self.compression_threads <= 0:
+            raise ValueError("compression_threads must be positive")
+        for name in ("shard_records", "shard_bytes"):
+            value = getattr(self, name)
+            if value is not None and value <= 0:
+                raise ValueError(f"output_{name} must be positive")
+        if self.splits is not None:
+            resolve_splits(dict(self.splits))
+
+    @property
+    def split_ratios(self) -> dict[str, float] | None:
+        return None if self.splits is None else dict(self.splits)
+
+    @property
+    def rewrites_output(self) -> bool:
+        """Whether lines are routed to output shards or splits."""
+        return (
+            self.shard_records is not None
+            or self.shard_bytes is not None
+            or self.splits is not None
+        )
+
+    @classmethod
+    def from_config(cls, cfg: DictConfig) -> OutputSettings:
+        splits = getattr(cfg, "splits", None)
+        return cls(
+            serializer=str(getattr(cfg, "serializer", "stdlib")),
+            compression=str(getattr(cfg, "output_compression", "none")),
+            compression_threads=int(
+                getattr(cfg, "compression_threads", DEFAULT_COMPRESSION_THREADS)
+            ),
+            shard_records=_optional_int(getattr(cfg, "output_shard_records", None)),
+            shard_bytes=_optional_int(getattr(cfg, "output_shard_bytes", None)),
+            splits=(
+                None
+                if splits is None
+                else tuple((str(name), float(ratio)) for name, ratio in splits.items())
+            ),
+        )
+
+
+@dataclass(frozen=True)
+class MergeQualitySettings:
+    random_seed: int
+    dataset_size: int
+    chunk_formats: tuple[str, ...]
+    distractor_chunks_per_format: int
+    # (min, max) flattened attributes kept per persona; None keeps all of them
+    ground_truth_field_range: tuple[int, int] | None = None
+    markdown_distractor_rows: int = 3
+    markdown_chunks_per_person: int = 1
+    markdown_target_row_probability: float = 0.5
+    seeding: str = "sequential"
+    sample_offset: int = 0
+    distractor_pool_size: int = 0
+    distractor_pool_refresh_rate: float = 0.05
+    distractor_pool_precompute_flat: bool = True
+    # Size of the indexed corpus of hard-negative distractors; 0 disables them
+    hard_negative_corpus_size: int = 0
+    # (collision key, weight) pairs drawn for every hard-negative distractor
+    hard_negative_mix: tuple[tuple[str, float], ...] = DEFAULT_HARD_NEGATIVE_MIX
+    # Run-wide unique target identifiers; the namespace is set per parallel shard
+    unique_identifiers: bool = False
+    identifier_namespace: int = 0
+    identifier_namespaces: int = 1
+    identifier_exact: bool = True
+    # 0 disables the Bloom filter in front of the exact identifier sets
+    identifier_bloom_capacity: int = 0
+    identifier_bloom_error_rate: float = 0.001
+    # None generates all target personas in a single batch
+    target_batch_size: int | None = DEFAULT_TARGET_BATCH_SIZE
+    # Directory of the persona corpus cache; None disables caching
+    persona_cache_dir: str | None = None
+    # PersonalDataGenerator options
+    persona_backend: str = "faker"
+    lazy_attributes: bool = False
+    compact_records: bool = False
+    value_bank_dir: str | None = None
+    # ISO date the columnar backend draws dates from; None uses the current day
+    persona_reference_date: str | None = None
+    # Output writing, Parquet export and statistics of the generation scripts
+    output: OutputSettings = OutputSettings()
+    flush_every: int = DEFAULT_FLUSH_EVERY
+    parquet_export: bool = False
+    parquet_row_group_size: int = DEFAULT_PARQUET_ROW_GROUP_SIZE
+    collect_stats: bool = False
+
+    def __post_init__(self) -> None:
+        _check_seeding(self.seeding, MERGE_QUALITY_SEEDING_MODES)
+        _check_non_negative("dataset_size", self.dataset_size)
+        _check_non_negative("sample_offset", self.sample_offset)
+        if not self.chunk_formats:
+            raise ValueError("chunk_formats must contain at least one format")
+        for fmt in self.chunk_formats:
+            if fmt not in CHUNK_FORMATS:
+                raise ValueError(f"Unsupported format '{fmt}'")
+        _check_non_negative(
+            "distractor_chunks_per_format", self.distractor_chunks_per_format
+        )
+        if self.ground_truth_field_range is not None:
+            min_fields, max_fields = self.ground_truth_field_range
+            if min_fields < 0 or max_fields < min_fields:
+                raise ValueError(
+                    "ground_truth_field_range must contain non-negative ascending values"
+                )
+        if self.markdown_distractor_rows <= 0:
+            raise ValueError("markdown_distractor_rows must be positive")
+        if self.markdown_chunks_per_person <= 0:
+            raise ValueError("markdown_chunks_per_person must be positive")
+        _check_probability(
+            "markdown_target_row_probability", self.markdown_target_row_probability
+        )
+        _check_non_negative("distractor_pool_size", self.distractor_pool_size)
+        _check_probability(
+            "distractor_pool_refresh_rate", self.distractor_pool_refresh_rate
+        )
+        _check_non_negative("hard_negative_corpus_size", self.hard_negative_corpus_size)
+        if self.hard_negative_corpus_size > 0 and self.distractor_pool_size > 0:
+            raise ValueError(
+                "distractor_pool_size and hard_negative_corpus_size are mutually exclusive"
+            )
+        if 0 < self.distractor_pool_size < self.max_distractors_per_draw:
+            raise ValueError(
+                "distractor_pool_size must be at least the distractors drawn per "
+                f"chunk ({self.max_distractors_per_draw})"
+            )
+        for key, weight in self.hard_negative_mix:
+            if key not in HARD_NEGATIVE_KEYS and key not in ATTRIBUTE_PATHS:
+                raise ValueError(f"Unsupported hard-negative key '{key}'")
+            if weight < 0:
+                raise ValueError("hard_negative_mix weights must be non-negative")
+        if sum(weight for _, weight in self.hard_negative_mix) <= 0:
+            raise ValueError("hard_negative_mix must have a positive weight")
+        if self.identifier_namespaces <= 0:
+            raise ValueError("identifier_namespaces must be positive")
+        if not 0 <= self.identifier_namespace < self.identifier_namespaces:
+            raise ValueError(
+                "identifier_namespace must be within [0, identifier_namespaces)"
+            )
+        _check_non_negative("identifier_bloom_capacity", self.identifier_bloom_capacity)
+        if not self.identifier_exact and self.identifier_bloom_capacity <= 0:
+            raise ValueError(
+                "identifier_exact: false requires a positive identifier_bloom_capacity"
+            )
+        if not 0 < self.identifier_bloom_error_rate < 1:
+            raise ValueError("identifier_bloom_error_rate must be in (0, 1)")
+        if self.seeding == "per_sample" and self.unique_identifiers:
+            raise ValueError(
+                "unique_identifiers is not supported with per_sample seeding"
+            )
+        if self.target_batch_size is not None and self.target_batch_size <= 0:
+            raise ValueError("target_batch_size must be positive")
+        if self.seeding == "per_sample" and self.distractor_pool_size > 0:
+            raise ValueError(
+                "distractor_pool_size is not supported with per_sample seeding"
+            )
+        if self.seeding != "streams" and self.persona_cache_dir is not None:
+            # Only persona streams are independent of the other settings
+            raise ValueError("persona_cache_dir requires streams seeding")
+        if self.lazy_attributes and self.persona_cache_dir is not None:
+            raise ValueError("persona_cache_dir is not supported with lazy_attributes")
+        if self.persona_backend not in PERSONA_BACKENDS:
+            raise ValueError(f"Unsupported persona backend '{self.persona_backend}'")
+        if self.lazy_attributes and self.persona_backend != "faker":
+            raise ValueError("lazy_attributes is only supported by the faker backend")
+        if self.persona_backend == "value_bank" and self.value_bank_dir is None:
+            raise ValueError("persona_backend: value_bank requires value_bank_dir")
+        if self.persona_reference_date is not None:
+            if self.persona_backend != "columnar":
+                raise ValueError(
+                    "persona_reference_date is only used by the columnar backend"
+                )
+            try:
+                date.fromisoformat(self.persona_reference_date)
+            except ValueError as error:
+                raise ValueError(
+                    "persona_reference_date must be an ISO date (YYYY-MM-DD)"
+                ) from error
+        if self.flush_every <= 0:
+            raise ValueError("flush_every must be positive")
+        if self.parquet_row_group_size <= 0:
+            raise ValueError("parquet_row_group_size must be positive")
+
+    def persona_generator(self) -> PersonalDataGenerator:
+        """Persona generator configured by these settings."""
+        return PersonalDataGenerator(
+            seed=self.random_seed,
+            backend=self.persona_backend,
+            lazy=self.lazy_attributes,
+            compact=self.compact_records,
+            value_bank_dir=self.value_bank_dir,
+            reference_date=(
+                None
+                if self.persona_reference_date is None
+                else date.fromisoformat(self.persona_reference_date)
+            ),
+        )
+
+    @property
+    def max_distractors_per_draw(self) -> int:
+        """Most distractors drawn at once: the rows of one chunk or table."""
+        if "markdown" in self.chunk_formats:
+            return max(self.distractor_chunks_per_format, self.markdown_distractor_rows)
+        return self.distractor_chunks_per_format
+
+    @classmethod
+    def from_config(cls, cfg: DictConfig) -> MergeQualitySettings:
+        # Markdown row and chunk counts below one are treated as one; a missing
+        # target_batch_size takes the default and a null or zero one is unset
+        return cls(
+            random_seed=int(cfg.random_seed),
+            dataset_size=int(cfg.dataset_size),
+            chunk_formats=tuple(cfg.chunk_formats),
+            distractor_chunks_per_format=int(cfg.distractor_chunks_per_format),
+            ground_truth_field_range=_field_range(
+                getattr(cfg, "ground_truth_field_range", None)
+            ),
+            markdown_distractor_rows=max(
+                1, int(getattr(cfg, "markdown_distractor_rows", 3))
+            ),
+            markdown_chunks_per_person=max(
+                1, int(getattr(cfg, "markdown_chunks_per_person", 1))
+            ),
+            markdown_target_row_probability=float(
+                getattr(cfg, "markdown_target_row_probability", 0.5)
+            ),
+            seeding=str(getattr(cfg, "seeding", "sequential")),
+            sample_offset=int(getattr(cfg, "sample_offset", 0) or 0),
+            distractor_pool_size=int(getattr(cfg, "distractor_pool_size", 0) or 0),
+            distractor_pool_refresh_rate=float(
+                getattr(cfg, "distractor_pool_refresh_rate", 0.05)
+            ),
+            distractor_pool_precompute_flat=bool(
+                getattr(cfg, "distractor_pool_precompute_flat", True)
+            ),
+            hard_negative_corpus_size=int(
+                getattr(cfg, "hard_negative_corpus_size", 0) or 0
+            ),
+            hard_negative_mix=_hard_negative_mix(
+                getattr(cfg, "hard_negative_mix", None)
+            ),
+            unique_identifiers=bool(getattr(cfg, "unique_identifiers", False)),
+            identifier_namespace=int(getattr(cfg, "identifier_namespace", 0) or 0),
+            identifier_namespaces=int(getattr(cfg, "identifier_namespaces", 1) or 1),
+            identifier_exact=bool(getattr(cfg, "identifier_exact", True)),
+            identifier_bloom_capacity=int(
+                getattr(cfg, "identifier_bloom_capacity", 0) or 0
+            ),
+            identifier_bloom_error_rate=float(
+                getattr(cfg, "identifier_bloom_error_rate", 0.001)
+            ),
+            target_batch_size=_optional_int(
+                getattr(cfg, "target_batch_size", DEFAULT_TARGET_BATCH_SIZE) or None
+            ),
+            persona_cache_dir=_optional_str(getattr(cfg, "persona_cache_dir", None)),
+            persona_backend=str(getattr(cfg, "persona_backend", "faker")),
+            lazy_attributes=bool(getattr(cfg, "lazy_attributes", False)),
+            compact_records=bool(getattr(cfg, "compact_records", False)),
+            value_bank_dir=_optional_str(getattr(cfg, "value_bank_dir", None)),
+            persona_reference_date=_optional_str(
+                getattr(cfg, "persona_reference_date", None)
+            ),
+            output=OutputSettings.from_config(cfg),
+            flush_every=int(getattr(cfg, "flush_every", DEFAULT_FLUSH_EVERY)),
+            parquet_export=bool(getattr(cfg, "parquet_export", False)),
+            parquet_row_group_size=int(
+                getattr(cfg, "parquet_row_group_size", DEFAULT_PARQUET_ROW_GROUP_SIZE)
+            ),
+            collect_stats=bool(getattr(cfg, "collect_stats", False)),
+        )
+
+
+@dataclass(frozen=True)
+class HumanMessagesSettings:
+    random_seed: int
+    dataset_size: int
+    random_fraction: float
+    random_length_range: tuple[int, int]
+    synthetic_batch_size: int
+    seeding: str = "sequential"
+    sample_offset: int = 0
+    output: OutputSettings = OutputSettings()
+
+    def __post_init__(self) -> None:
+        _check_seeding(self.seeding)
+        _check_non_negative("dataset_size", self.dataset_size)
+        _check_non_negative("sample_offset", self.sample_offset)
+        _check_probability("random_fraction", self.random_fraction)
+        min_len, max_len = self.random_length_range
+        if min_len <= 0 or max_len < min_len:
+            raise ValueError(
+                "random_length_range must contain positive ascending values"
+            )
+        if self.synthetic_batch_size <= 0:
+            raise ValueError("synthetic_batch_size must be positive")
+
+    @classmethod
+    def from_config(cls, cfg: DictConfig) -> HumanMessagesSettings:
+        length_range = _as_pair(cfg.random_length_range)
+        if length_range is None:
+            raise ValueError("random_length_range must be a two-element list")
+        return cls(
+            random_seed=int(cfg.random_seed),
+            dataset_size=int(cfg.dataset_size),
+            random_fraction=float(cfg.random_fraction),
+            random_length_range=length_range,
+            synthetic_batch_size=int(cfg.synthetic_batch_size),
+            seeding=str(getattr(cfg, "seeding", "sequential")),
+            sample_offset=int(getattr(cfg, "sample_offset", 0) or 0),
+            output=OutputSettings.from_config(cfg),
+        )
+
+
+def resolve_merge_quality_settings(
+    cfg: DictConfig | MergeQualitySettings,
+) -> MergeQualitySettings:
+    if isinstance(cfg, MergeQualitySettings):
+        return cfg
+    return MergeQualitySettings.from_config(cfg)
+
+
+def resolve_human_messages_settings(
+    cfg: DictConfig | HumanMessagesSettings,
+) -> HumanMessagesSettings:
+    if isinstance(cfg, HumanMessagesSettings):
+        return cfg
+    return HumanMessagesSettings.from_config(cfg)
+
+
+def _field_range(range_cfg: Any) -> tuple[int, int] | None:
+    if range_cfg is None:
+        return None
+    pair = _as_pair(range_cfg)
+    if pair is not None:
+        return pair
+    if isinstance(range_cfg, (ListConfig, list, tuple)):
+        raise ValueError(
+            "ground_truth_field_range must be a number or a [min, max] pair"
+        )
+    return int(range_cfg), int(range_cfg)
+
+
+def _hard_negative_mix(mix_cfg: Any) -> tuple[tuple[str, float], ...]:
+    if mix_cfg is None:
+        return DEFAULT_HARD_NEGATIVE_MIX
+    return tuple((str(key), float(weight)) for key, weight in mix_cfg.items())
+
+
+def _as_pair(value: Any) -> tuple[int, int] | None:
+    if not isinstance(value, (ListConfig, list, tuple)) or len(value) != 2:
+        return None
+    return int(value[0]), int(value[1])
+
+
+def _optional_int(value: Any) -> int | None:
+    return None if value is None else int(value)
+
+
+def _optional_str(value: Any) -> str | None:
+    return None if value is None else str(value)
+
+
+def _check_seeding(seeding: str, modes: tuple[str, ...] = SEEDING_MODES) -> None:
+    if seeding not in modes:
+        raise ValueError(f"Unsupported seeding mode '{seeding}'")
+
+
+def _check_non_negative(name: str, value: int) -> None:
+    if value < 0:
+        raise ValueError(f"{name} must be non-negative")
+
+
+def _check_probability(name: str, value: float) -> None:
+    if not 0.0 <= value <= 1.0:
+        raise ValueError(f"{name} must be within [0, 1]")
@@ -0,0 +1,166 @@
+"""Streaming statistics of the merge-quality dataset.
+
+``MergeQualityStats`` is updated sample by sample while the dataset is being
+written, so QA distributions come without a second pass over the output:
+
+* ``field_counts``: histogram of ground-truth attribute fields kept per sample;
+* ``field_coverage``: how many samples keep each flattened attribute path;
+* ``provided_identifiers``: how often each identifier is given for the target;
+* ``chunks_per_sample`` / ``chunks``: chunk count histogram and chunks per
+  format and ``owner_id`` (``target``, ``distractor`` or ``mixed``);
+* ``chunk_length``: quantile sketch of chunk lengths in characters per format.
+
+All state is counters and mergeable sketches, so statistics of parallel shards
+are combined with ``merge`` into the statistics of the whole dataset.
+"""
+
+from __future__ import annotations
+
+import json
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+from slam_datagen.datasets.merge_quality import (CompactSample, DatasetSample,
+                                                 flat_attributes)
+from slam_datagen.utils.sketches import DEFAULT_RELATIVE_ACCURACY, QuantileSketch
+
+SampleT = DatasetSample | CompactSample
+
+_QUANTILES: tuple[float, ...] = (0.01, 0.1, 0.5, 0.9, 0.99)
+
+
+def stats_path(output_file: str | Path) -> Path:
+    output_path = Path(output_file)
+    return output_path.with_name(f"{output_path.stem}.stats.json")
+
+
+class MergeQualityStats:
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.samples = 0
+        self.field_counts: Counter[int] = Counter()
+        self.field_coverage: Counter[str] = Counter()
+        self.provided_identifiers: Counter[str] = Counter()
+        self.chunks_per_sample: Counter[int] = Counter()
+        self.chunks: dict[str, Counter[str]] = {}
+        self.chunk_length: dict[str, QuantileSketch] = {}
+
+    def update(self, sample: SampleT) -> None:
+        self.samples += 1
+        attributes = flat_attributes(sample.ground_truth)
+        self.field_counts[len(attributes)] += 1
+        self.field_coverage.update(attributes.keys())
+        self.provided_identifiers.update(sample.provided_identifiers.keys())
+        self.chunks_per_sample[len(sample.chunks)] += 1
+        for chunk in sample.chunks:
+            owners = self.chunks.get(chunk.format)
+            if owners is None:
+                owners = self.chunks[chunk.format] = Counter()
+                self.chunk_length[chunk.format] = QuantileSketch(self.relative_accuracy)
+            owners[chunk.owner_id] += 1
+            self.chunk_length[chunk.format].add(len(chunk.content))
+
+    def track(self, samples: Iterable[SampleT]) -> Iterator[SampleT]:
+        """Pass samples through while updating the statistics."""
+        for sample in samples:
+            self.update(sample)
+            yield sample
+
+    def merge(self, other: MergeQualityStats) -> None:
+        self.samples += other.samples
+        self.field_counts.update(other.field_counts)
+        self.field_coverage.update(other.field_coverage)
+        self.provided_identifiers.update(other.provided_identifiers)
+        self.chunks_per_sample.update(other.chunks_per_sample)
+        for fmt, owners in other.chunks.items():
+            self.chunks.setdefault(fmt, Counter()).update(owners)
+            if fmt in self.chunk_length:
+                self.chunk_length[fmt].merge(other.chunk_length[fmt])
+            else:
+                self.chunk_length[fmt] = QuantileSketch.from_dict(
+                    other.chunk_length[fmt].to_dict()
+                )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Mergeable state plus a human-readable ``summary``."""
+        return {
+            "samples": self.samples,
+            "relative_accuracy": self.relative_accuracy,
+            "field_counts": _int_keys(self.field_counts),
+            "field_coverage": dict(sorted(self.field_coverage.items())),
+            "provided_identifiers": dict(sorted(self.provided_identifiers.items())),
+            "chunks_per_sample": _int_keys(self.chunks_per_sample),
+            "chunks": {
+                fmt: dict(sorted(owners.items()))
+                for fmt, owners in sorted(self.chunks.items())
+            },
+            "chunk_length": {
+                fmt: sketch.to_dict()
+                for fmt, sketch in sorted(self.chunk_length.items())
+            },
+            "summary": self._summary(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> MergeQualityStats:
+        stats = cls(data["relative_accuracy"])
+        stats.samples = data["samples"]
+        stats.field_counts = Counter(
+            {int(key): count for key, count in data["field_counts"].items()}
+        )
+        stats.field_coverage = Counter(data["field_coverage"])
+        stats.provided_identifiers = Counter(data["provided_identifiers"])
+        stats.chunks_per_sample = Counter(
+            {int(key): count for key, count in data["chunks_per_sample"].items()}
+        )
+        stats.chunks = {fmt: Counter(owners) for fmt, owners in data["chunks"].items()}
+        stats.chunk_length = {
+            fmt: QuantileSketch.from_dict(sketch)
+            for fmt, sketch in data["chunk_length"].items()
+        }
+        return stats
+
+    def write(self, path: str | Path) -> Path:
+        path = Path(path)
+        with path.open("w", encoding="utf-8") as handle:
+            json.dump(self.to_dict(), handle, indent=2)
+        return path
+
+    @classmethod
+    def read(cls, path: str | Path) -> MergeQualityStats:
+        with Path(path).open(encoding="utf-8") as handle:
+            return cls.from_dict(json.load(handle))
+
+    def _summary(self) -> dict[str, Any]:
+        owners: Counter[str] = Counter()
+        for counts in self.chunks.values():
+            owners.update(counts)
+        total_chunks = sum(owners.values())
+        return {
+            "mean_fields": _mean(self.field_counts),
+            "mean_chunks": _mean(self.chunks_per_sample),
+            "owner_ratio": {
+                owner: count / total_chunks for owner, count in sorted(owners.items())
+            },
+            "field_coverage": {
+                path: count / self.samples
+                for path, count in sorted(self.field_coverage.items())
+            },
+            "chunk_length_quantiles": {
+                fmt: {str(q): sketch.quantile(q) for q in _QUANTILES}
+                for fmt, sketch in sorted(self.chunk_length.items())
+            },
+        }
+
+
+def _int_keys(counter: Counter[int]) -> dict[str, int]:
+    return {str(key): count for key, count in sorted(counter.items())}
+
+
+def _mean(histogram: Counter[int]) -> float | None:
+    total = sum(histogram.values())
+    if not total:
+        return None
+    return sum(value * count for value, count in histogram.items()) / total
@@ -0,0 +1,270 @@
+"""Consistency checks of written merge-quality datasets.
+
+Every chunk is parsed back into flat records (JSON ``data`` objects, XML
+``<record>`` bodies and markdown table rows) and each sample is checked
+against its ground truth:
+
+* ``malformed_chunk``: the chunk content cannot be parsed;
+* ``missing_identifier``: a target chunk (or target markdown row) does not
+  carry the target identifier, or carries another value;
+* ``provided_identifier``: a provided identifier differs from the ground truth;
+* ``identifier_collision``: a distractor record carries a target identifier
+  value, or several rows of a mixed markdown table do;
+* ``missing_field`` / ``extra_field``: the fields of the target records do
+  not union to the ground-truth attributes;
+* ``conflicting_value``: a target record holds another value than the ground
+  truth for one of its fields.
+
+``validate_merge_quality_dataset`` runs the checks over slices of the dataset
+on a process pool and reports violations with their sample indices.
+"""
+
+from __future__ import annotations
+
+import json
+import xml.etree.ElementTree as ET
+from collections import Counter
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from slam_datagen.datasets.reader import JsonlDataset
+from slam_datagen.personal_data import IDENTIFIER_FIELDS
+from slam_datagen.schema import PATH_SEPARATOR, PERSONA_SCHEMA
+
+DEFAULT_TASK_SIZE = 10000
+DEFAULT_MAX_VIOLATIONS = 1000
+
+_MARKDOWN_ROW_SEPARATOR = " |\n| "
+_MARKDOWN_CELL_SEPARATOR = " | "
+
+
+@dataclass(frozen=True, slots=True)
+class Violation:
+    sample_index: int
+    check: str
+    detail: str
+    chunk_index: int | None = None
+
+
+@dataclass(slots=True)
+class ValidationReport:
+    samples: int = 0
+    violating_samples: int = 0
+    counts: Counter[str] = field(default_factory=Counter)
+    violations: list[Violation] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.counts
+
+    def add(self, violations: list[Violation], max_violations: int) -> None:
+        # Slices never share samples, so distinct indices can be counted per call
+        self.violating_samples += len({v.sample_index for v in violations})
+        for violation in violations:
+            self.counts[violation.check] += 1
+            if len(self.violations) < max_violations:
+                self.violations.append(violation)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "violating_samples": self.violating_samples,
+            "counts": dict(sorted(self.counts.items())),
+            "violations": [asdict(violation) for violation in self.violations],
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class ParsedRecord:
+    """Flat fields of one record of a chunk, identifier keys included."""
+
+    identifier_type: str
+    fields: dict[str, str]
+
+    @property
+    def identifier_value(self) -> str | None:
+        return self.fields.get(self.identifier_type)
+
+
+def parse_json_chunk(content: str) -> list[ParsedRecord]:
+    document = json.loads(content)
+    fields = PERSONA_SCHEMA.flatten(document["data"])
+    identifier_type = document["identifier_type"]
+    if document.get("identifier_value") != fields.get(identifier_type):
+        raise ValueError("identifier_value does not match the data object")
+    return [ParsedRecord(identifier_type, fields)]
+
+
+def parse_xml_chunk(content: str) -> list[ParsedRecord]:
+    root = ET.fromstring(content)
+    if root.tag != "record":
+        raise ValueError(f"Unexpected root element '{root.tag}'")
+    fields: dict[str, str] = {}
+    pending = [(element, element.tag) for element in reversed(root)]
+    while pending:
+        element, path = pending.pop()
+        children = list(element)
+        if children:
+            pending.extend(
+                (child, f"{path}{PATH_SEPARATOR}{child.tag}")
+                for child in reversed(children)
+            )
+        else:
+            fields[path] = element.text or ""
+    identifier_type = next((name for name in IDENTIFIER_FIELDS if name in fields), "")
+    return [ParsedRecord(identifier_type, fields)]
+
+
+def parse_markdown_chunk(content: str) -> list[ParsedRecord]:
+    """Parse table rows; the first column holds the row identifier.
+
+    Rows are split on the ``" |\\n| "`` row boundary rather than on newlines,
+    since values such as addresses span several lines. Empty cells are absent
+    fields.
+    """
+    if not content.startswith("| ") or not content.endswith(" |"):
+        raise ValueError("Markdown table rows must start with '| ' and end with ' |'")
+    rows = content[2:-2].split(_MARKDOWN_ROW_SEPARATOR)
+    if len(rows) < 2:
+        raise ValueError("Markdown table has no separator row")
+    columns = rows[0].split(_MARKDOWN_CELL_SEPARATOR)
+    records = []
+    for row in rows[2:]:
+        cells = row.split(_MARKDOWN_CELL_SEPARATOR)
+        if len(cells) != len(columns):
+            raise ValueError(
+                f"Markdown row has {len(cells)} cells for {len(columns)} columns"
+            )
+        fields = {column: cell for column, cell in zip(columns, cells) if cell}
+        records.append(ParsedRecord(columns[0], fields))
+    return records
+
+
+_PARSERS = {
+    "json": parse_json_chunk,
+    "xml": parse_xml_chunk,
+    "markdown": parse_markdown_chunk,
+}
+
+
+def parse_chunk(chunk: Mapping[str, str]) -> list[ParsedRecord]:
+    parser = _PARSERS.get(chunk["format"])
+    if parser is None:
+        raise ValueError(f"Unsupported format '{chunk['format']}'")
+    return parser(chunk["content"])
+
+
+def validate_sample(document: Mapping[str, Any], sample_index: int) -> list[Violation]:
+    """Check one serialized sample; returns its violations."""
+    violations: list[Violation] = []
+
+    def report(check: str, detail: str, chunk_index: int | None = None) -> None:
+        violations.append(Violation(sample_index, check, detail, chunk_index))
+
+    ground_truth = document["ground_truth"]
+    identifiers: Mapping[str, str] = ground_truth["unique_identifiers"]
+    expected = PERSONA_SCHEMA.flatten(ground_truth["attributes"])
+    for name, value in document["provided_identifiers"].items():
+        if identifiers.get(name) != value:
+            report("provided_identifier", f"{name}={value!r}")
+
+    found: dict[str, str] = {}
+    for chunk_index, chunk in enumerate(document["chunks"]):
+        try:
+            records = parse_chunk(chunk)
+        except (ValueError, KeyError, TypeError, ET.ParseError) as error:
+            report("malformed_chunk", f"{chunk['format']}: {error}", chunk_index)
+            continue
+
+        owner = chunk["owner_id"]
+        targets = []
+        for record in records:
+            value = record.identifier_value
+            is_target = value is not None and value == identifiers.get(
+                record.identifier_type
+            )
+            if owner == "target" or (owner == "mixed" and is_target):
+                targets.append(record)
+            elif is_target:
+                report(
+                    "identifier_collision",
+                    f"{owner} record carries target {record.identifier_type}",
+                    chunk_index,
+                )
+        if owner == "mixed" and len(targets) > 1:
+            report(
+                "identifier_collision",
+                f"{len(targets)} rows carry the target identifier",
+                chunk_index,
+            )
+        if owner in {"target", "mixed"} and not targets:
+            report("missing_identifier", "no target record", chunk_index)
+
+        for record in targets:
+            identifier_type = record.identifier_type
+            if record.identifier_value != identifiers.get(identifier_type):
+                report(
+                    "missing_identifier",
+                    f"{identifier_type or 'identifier'} missing or different",
+                    chunk_index,
+                )
+            for path, value in record.fields.items():
+                if path in IDENTIFIER_FIELDS:
+                    continue
+                if path not in expected:
+                    report("extra_field", path, chunk_index)
+                elif value != expected[path]:
+                    report("conflicting_value", path, chunk_index)
+                else:
+                    found[path] = value
+
+    for path in expected.keys() - found.keys():
+        report("missing_field", path)
+    return violations
+
+
+def validate_merge_quality_dataset(
+    path: str | Path,
+    num_workers: int = 1,
+    task_size: int = DEFAULT_TASK_SIZE,
+    max_violations: int = DEFAULT_MAX_VIOLATIONS,
+) -> ValidationReport:
+    """Validate every sample of the dataset at ``path``.
+
+    ``path`` is anything ``JsonlDataset`` opens (compressed files, shard
+    manifests). The dataset is cut into slices of ``task_size`` samples that
+    are validated on ``num_workers`` processes; at most ``max_violations``
+    violations are kept in the report, while ``counts`` covers all of them.
+    """
+    if num_workers <= 0:
+        raise ValueError("num_workers must be positive")
+    if task_size <= 0:
+        raise ValueError("task_size must be positive")
+
+    report = ValidationReport()
+    # Opening the dataset once builds the offset indexes the workers reuse
+    with JsonlDataset(path) as dataset:
+        tasks = [
+            (dataset[start : start + task_size], start)
+            for start in range(0, len(dataset), task_size)
+        ]
+        report.samples = len(dataset)
+        if num_workers == 1:
+            for task in tasks:
+                report.add(_validate_slice(task), max_violations)
+            return report
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            for violations in executor.map(_validate_slice, tasks):
+                report.add(violations, max_violations)
+    return report
+
+
+def _validate_slice(task: tuple[JsonlDataset[Any], int]) -> list[Violation]:
+    dataset, start = task
+    violations: list[Violation] = []
+    for offset in range(len(dataset)):
+        violations.extend(validate_sample(dataset[offset], start + offset))
+    return violations
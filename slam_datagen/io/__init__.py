@@ -0,0 +1,25 @@
+"""Output encoding and writing helpers for slam_datagen datasets."""
+
+from slam_datagen.io.compression import (COMPRESSIONS, block_index_path, open_output,
+                                         read_block_index)
+from slam_datagen.io.serialization import (BYTE_COMPATIBLE_SERIALIZERS,
+                                           SERIALIZER_BACKENDS, Serializer,
+                                           check_byte_compatible, get_serializer)
+from slam_datagen.io.shuffle import shuffle_jsonl
+from slam_datagen.io.writer import BlockWriter, ShardedWriter, output_files
+
+__all__ = [
+    "BYTE_COMPATIBLE_SERIALIZERS",
+    "COMPRESSIONS",
+    "SERIALIZER_BACKENDS",
+    "BlockWriter",
+    "Serializer",
+    "ShardedWriter",
+    "block_index_path",
+    "check_byte_compatible",
+    "get_serializer",
+    "open_output",
+    "output_files",
+    "read_block_index",
+    "shuffle_jsonl",
+]
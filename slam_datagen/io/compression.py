@@ -0,0 +1,191 @@
+"""Block compression of JSON Lines outputs.
+
+Compressed outputs are sequences of independent blocks: gzip members or zstd
+frames, each holding whole lines. Concatenated blocks form a regular
+``.gz`` / ``.zst`` file, and the ``<output>.blocks.json`` sidecar lists the
+compressed and uncompressed offsets and the records of every block, so a
+reader can seek to any record by decompressing a single block.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import os
+import shutil
+import threading
+from collections.abc import Callable, Iterable
+from functools import partial
+from pathlib import Path
+from typing import Any, BinaryIO
+
+COMPRESSIONS: tuple[str, ...] = ("none", "gzip", "zstd")
+
+_SUFFIXES: dict[str, str] = {"gzip": ".gz", "zstd": ".zst"}
+_DEFAULT_LEVELS: dict[str, int] = {"gzip": 6, "zstd": 3}
+
+
+def check_compression(compression: str) -> None:
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unsupported output compression '{compression}'")
+
+
+def compressed_path(path: str | Path, compression: str) -> Path:
+    """Append the suffix of ``compression`` to ``path`` unless it is already there."""
+    check_compression(compression)
+    path = Path(path)
+    suffix = _SUFFIXES.get(compression, "")
+    if not suffix or path.name.endswith(suffix):
+        return path
+    return path.with_name(path.name + suffix)
+
+
+def compression_of(path: str | Path) -> str:
+    name = Path(path).name
+    for compression, suffix in _SUFFIXES.items():
+        if name.endswith(suffix):
+            return compression
+    return "none"
+
+
+def block_index_path(path: str | Path) -> Path:
+    path = Path(path)
+    return path.with_name(f"{path.name}.blocks.json")
+
+
+def block_compressor(
+    compression: str, level: int | None = None
+) -> Callable[[bytes], bytes]:
+    """Return a thread-safe function compressing one block into a gzip member
+    or a zstd frame."""
+    check_compression(compression)
+    if compression == "none":
+        raise ValueError("Uncompressed outputs have no block compressor")
+    level = _DEFAULT_LEVELS[compression] if level is None else level
+    if compression == "gzip":
+        # mtime=0 keeps the compressed bytes reproducible
+        return partial(gzip.compress, compresslevel=level, mtime=0)
+
+    zstandard = _import_zstandard()
+    # Compressor objects must not be shared between threads
+    local = threading.local()
+
+    def _compress(block: bytes) -> bytes:
+        compressor = getattr(local, "compressor", None)
+        if compressor is None:
+            compressor = local.compressor = zstandard.ZstdCompressor(level=level)
+        return compressor.compress(block)
+
+    return _compress
+
+
+def block_decompressor(compression: str) -> Callable[[bytes], bytes]:
+    check_compression(compression)
+    if compression == "none":
+        return bytes
+    if compression == "gzip":
+        return gzip.decompress
+    zstandard = _import_zstandard()
+    return lambda block: zstandard.ZstdDecompressor().decompress(block)
+
+
+def open_output(path: str | Path) -> BinaryIO:
+    """Open an output for reading, decompressing it according to its suffix."""
+    compression = compression_of(path)
+    if compression == "gzip":
+        return gzip.open(path, "rb")  # type: ignore[return-value]
+    if compression == "zstd":
+        zstandard = _import_zstandard()
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            open(path, "rb"),  # pylint: disable=consider-using-with
+            read_across_frames=True,
+            closefd=True,
+        )
+        return io.BufferedReader(reader)  # type: ignore[arg-type]
+    return open(path, "rb")  # pylint: disable=consider-using-with
+
+
+def read_block_index(path: str | Path) -> dict[str, Any] | None:
+    index_path = block_index_path(path)
+    if not index_path.exists():
+        return None
+    with index_path.open(encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def write_block_index(
+    path: str | Path, compression: str, blocks: list[dict[str, int]]
+) -> Path:
+    index_path = block_index_path(path)
+    with index_path.open("w", encoding="utf-8") as handle:
+        json.dump({"compression": compression, "blocks": blocks}, handle)
+    return index_path
+
+
+def count_records(path: str | Path) -> int:
+    """Number of lines of an output, read from its block index when it has one."""
+    index = read_block_index(path)
+    if index is not None:
+        return sum(block["records"] for block in index["blocks"])
+    records = 0
+    with open_output(path) as handle:
+        while block := handle.read(1 << 20):
+            records += block.count(b"\n")
+    return records
+
+
+def concatenate_outputs(parts: Iterable[str | Path], output_file: str | Path) -> Path:
+    """Concatenate outputs of the same compression, merging their block indexes."""
+    output_path = Path(output_file)
+    blocks: list[dict[str, int]] = []
+    compression: str | None = None
+    offset = raw_offset = first_record = 0
+    with output_path.open("wb") as merged:
+        for part in parts:
+            index = read_block_index(part)
+            if index is not None:
+                compression = index["compression"]
+                for block in index["blocks"]:
+                    blocks.append(
+                        {
+                            **block,
+                            "offset": block["offset"] + offset,
+                            "raw_offset": block["raw_offset"] + raw_offset,
+                            "first_record": block["first_record"] + first_record,
+                        }
+                    )
+                if index["blocks"]:
+                    last = index["blocks"][-1]
+                    raw_offset += last["raw_offset"] + last["raw_length"]
+                    first_record += last["first_record"] + last["records"]
+            with open(part, "rb") as handle:
+                shutil.copyfileobj(handle, merged)
+            offset = merged.tell()
+    if compression is not None:
+        write_block_index(output_path, compression, blocks)
+    return output_path
+
+
+def move_output(source: str | Path, destination: str | Path) -> Path:
+    """Atomically rename an output together with its block index."""
+    if block_index_path(source).exists():
+        os.replace(block_index_path(source), block_index_path(destination))
+    os.replace(source, destination)
+    return Path(destination)
+
+
+def remove_output(path: str | Path) -> None:
+    Path(path).unlink()
+    block_index_path(path).unlink(missing_ok=True)
+
+
+def _import_zstandard() -> Any:
+    try:
+        # pylint: disable-next=import-outside-toplevel
+        import zstandard
+    except ImportError as error:
+        raise ValueError(
+            "zstd compression requires the optional 'zstandard' package"
+        ) from error
+    return zstandard
@@ -0,0 +1,145 @@
+"""JSON Lines encoders for the dataset writers.
+
+The ``stdlib`` serializer assembles every line by hand from the C string
+encoders of the ``json`` module instead of building intermediate dicts with
+``dataclasses.asdict``; its output is byte-identical to the
+``json.dumps(...) + "\\n"`` lines written by earlier releases. The optional
+``orjson`` and ``msgspec`` serializers encode the same JSON documents, which
+any JSON reader parses to the same values, but not the same bytes: neither
+library can emit the ``", "`` / ``": "`` separators or the ``\\uXXXX`` escapes
+of ``json.dumps``, so they write compact separators and raw UTF-8. Where lines
+must match those of an earlier run, e.g. when appending to a dataset,
+``check_byte_compatible`` rejects them.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Callable, Mapping
+from json.encoder import encode_basestring_ascii  # type: ignore[attr-defined]
+from typing import TYPE_CHECKING, Any, Protocol
+
+if TYPE_CHECKING:
+    from slam_datagen.datasets.merge_quality import CompactSample, DatasetSample
+
+SERIALIZER_BACKENDS: tuple[str, ...] = ("stdlib", "orjson", "msgspec")
+# Serializers writing the bytes of ``json.dumps`` with its default formatting
+BYTE_COMPATIBLE_SERIALIZERS: tuple[str, ...] = ("stdlib",)
+
+
+class Serializer(Protocol):
+    name: str
+
+    def encode_merge_quality_sample(
+        self, sample: DatasetSample | CompactSample
+    ) -> bytes: ...
+
+    def encode_human_message(self, sample: Mapping[str, str]) -> bytes: ...
+
+
+class StdlibSerializer:
+    name = "stdlib"
+
+    def __init__(self) -> None:
+        self._encode_ascii = json.JSONEncoder().encode
+        self._encode_unicode = json.JSONEncoder(ensure_ascii=False).encode
+
+    def encode_merge_quality_sample(
+        self, sample: DatasetSample | CompactSample
+    ) -> bytes:
+        encode = self._encode_ascii
+        chunks = ", ".join(
+            '{"format": '
+            + encode_basestring_ascii(chunk.format)
+            + ', "owner_id": '
+            + encode_basestring_ascii(chunk.owner_id)
+            + ', "content": '
+            + encode_basestring_ascii(chunk.content)
+            + "}"
+            for chunk in sample.chunks
+        )
+        line = (
+            '{"ground_truth": {"unique_identifiers": '
+            + encode(sample.ground_truth.unique_identifiers)
+            + ', "attributes": '
+            + encode(sample.ground_truth.attributes)
+            + '}, "provided_identifiers": '
+            + encode(sample.provided_identifiers)
+            + ', "chunks": ['
+            + chunks
+            + "]}\n"
+        )
+        return line.encode("ascii")
+
+    def encode_human_message(self, sample: Mapping[str, str]) -> bytes:
+        return (self._encode_unicode(sample) + "\n").encode("utf-8")
+
+
+class _DocumentSerializer:
+    """Encodes lines through a third-party ``dumps``-like callable."""
+
+    name: str
+
+    def __init__(self, dumps: Callable[[Any], bytes]) -> None:
+        self._dumps = dumps
+
+    def encode_merge_quality_sample(
+        self, sample: DatasetSample | CompactSample
+    ) -> bytes:
+        document = {
+            "ground_truth": {
+                "unique_identifiers": sample.ground_truth.unique_identifiers,
+                "attributes": sample.ground_truth.attributes,
+            },
+            "provided_identifiers": sample.provided_identifiers,
+            "chunks": [
+                {
+                    "format": chunk.format,
+                    "owner_id": chunk.owner_id,
+                    "content": chunk.content,
+                }
+                for chunk in sample.chunks
+            ],
+        }
+        return self._dumps(document) + b"\n"
+
+    def encode_human_message(self, sample: Mapping[str, str]) -> bytes:
+        return self._dumps(dict(sample)) + b"\n"
+
+
+def check_byte_compatible(name: str, option: str) -> None:
+    """Reject serializer ``name`` when ``option`` needs ``json.dumps`` bytes."""
+    if name not in BYTE_COMPATIBLE_SERIALIZERS:
+        raise ValueError(
+            f"{option} requires a byte-compatible serializer "
+            f"({', '.join(BYTE_COMPATIBLE_SERIALIZERS)}), not '{name}'"
+        )
+
+
+def get_serializer(name: str | Serializer = "stdlib") -> Serializer:
+    """Return the serializer called ``name``; serializer instances pass through."""
+    if not isinstance(name, str):
+        return name
+    if name == "stdlib":
+        return StdlibSerializer()
+    if name not in SERIALIZER_BACKENDS:
+        raise ValueError(f"Unsupported serializer '{name}'")
+
+    # Optional dependencies are only imported when requested
+    # pylint: disable=import-outside-toplevel
+    try:
+        if name == "orjson":
+            import orjson
+
+            serializer = _DocumentSerializer(orjson.dumps)
+        else:
+            import msgspec
+
+            serializer = _DocumentSerializer(msgspec.json.Encoder().encode)
+    except ImportError as error:
+        raise ValueError(
+            f"Serializer '{name}' requires the optional '{name}' package"
+        ) from error
+    # pylint: enable=import-outside-toplevel
+    serializer.name = name
+    return serializer
@@ -0,0 +1,116 @@
+"""Seeded external-memory shuffle of JSON Lines outputs.
+
+Lines are shuffled in two passes so that memory is bounded by the size of a
+bucket rather than of the dataset:
+
+1. scatter: every line is appended to one of ``num_buckets`` temporary bucket
+   files chosen uniformly at random;
+2. gather: buckets are loaded one at a time, shuffled in memory and written
+   to the output in bucket order.
+
+Uniform scattering followed by uniform in-bucket shuffles yields a uniform
+random permutation of the lines. Both passes draw from RNGs derived from
+``seed``, so the output is reproducible for a given seed and bucket count.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from slam_datagen.io.compression import compression_of, open_output, read_block_index
+from slam_datagen.io.writer import open_writer, output_files
+from slam_datagen.utils.seeding import derive_seed
+
+DEFAULT_BUCKET_BYTES = 256 << 20
+# Pending bytes per bucket before they are appended to its file
+_BUCKET_BUFFER_BYTES = 1 << 20
+
+
+def shuffle_jsonl(
+    input_file: str | Path,
+    output_file: str | Path,
+    seed: int,
+    bucket_bytes: int = DEFAULT_BUCKET_BYTES,
+    num_buckets: int | None = None,
+    tmp_dir: str | Path | None = None,
+    **writer_options: Any,
+) -> Path:
+    """Shuffle the lines of ``input_file`` into ``output_file``.
+
+    ``input_file`` may be compressed or the manifest of a sharded output. By
+    default the number of buckets is chosen so that a bucket holds about
+    ``bucket_bytes`` uncompressed bytes. Buckets are created in ``tmp_dir``
+    (by default next to ``output_file``) and removed once written.
+    ``writer_options`` (``compression``, ``shard_records``...) are passed to
+    the output writer; returns the path it reports.
+    """
+    if bucket_bytes <= 0:
+        raise ValueError("bucket_bytes must be positive")
+    inputs = output_files(input_file)
+    if num_buckets is None:
+        total = sum(_uncompressed_size(path) for path in inputs)
+        num_buckets = max(1, math.ceil(total / bucket_bytes))
+    if num_buckets <= 0:
+        raise ValueError("num_buckets must be positive")
+
+    output_path = Path(output_file)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(
+        prefix=f".{output_path.name}.shuffle-", dir=tmp_dir or output_path.parent
+    ) as bucket_dir:
+        buckets = [Path(bucket_dir) / f"bucket-{idx:05d}" for idx in range(num_buckets)]
+        _scatter(inputs, buckets, random.Random(derive_seed(seed, "scatter")))
+        # Shuffled lines are no longer consecutive samples: no index ranges
+        with open_writer(output_path, first_index=None, **writer_options) as writer:
+            for idx, bucket in enumerate(buckets):
+                if not bucket.exists():
+                    continue
+                lines = bucket.read_bytes().splitlines(keepends=True)
+                bucket.unlink()
+                random.Random(derive_seed(seed, "bucket", idx)).shuffle(lines)
+                for line in lines:
+                    writer.write(line)
+    return writer.path
+
+
+def _scatter(inputs: list[Path], buckets: list[Path], rng: random.Random) -> None:
+    pending: list[list[bytes]] = [[] for _ in buckets]
+    pending_bytes = [0] * len(buckets)
+    choose = rng.randrange
+    num_buckets = len(buckets)
+    for path in inputs:
+        with open_output(path) as handle:
+            for line in handle:
+                if not line.endswith(b"\n"):
+                    line += b"\n"
+                idx = choose(num_buckets)
+                pending[idx].append(line)
+                pending_bytes[idx] += len(line)
+                if pending_bytes[idx] >= _BUCKET_BUFFER_BYTES:
+                    _append(buckets[idx], pending[idx])
+                    pending_bytes[idx] = 0
+    for bucket, lines in zip(buckets, pending):
+        _append(bucket, lines)
+
+
+def _append(bucket: Path, lines: list[bytes]) -> None:
+    if not lines:
+        return
+    with bucket.open("ab") as handle:
+        handle.write(b"".join(lines))
+    lines.clear()
+
+
+def _uncompressed_size(path: Path) -> int:
+    if compression_of(path) == "none":
+        return path.stat().st_size
+    index = read_block_index(path)
+    if index is None or not index["blocks"]:
+        # Without a block index, assume a typical JSON compression ratio
+        return 4 * path.stat().st_size
+    last = index["blocks"][-1]
+    return last["raw_offset"] + last["raw_length"]
@@ -0,0 +1,128 @@
+"""Deterministic routing of records into train / validation / test splits.
+
+Every record is assigned to a split by a stable hash of its key (the persona
+SSN, the message text...), so records sharing a key always land in the same
+split, whichever process writes them and in whatever order.
+"""
+
+from __future__ import annotations
+
+import json
+from bisect import bisect_right
+from collections.abc import Mapping
+from hashlib import blake2b
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+from slam_datagen.io.writer import BlockWriter, ShardedWriter, open_writer
+
+# Ratios must sum to one up to this tolerance
+_RATIO_TOLERANCE = 1e-6
+_HASH_SCALE = float(1 << 64)
+
+
+def resolve_splits(splits: Mapping[str, float]) -> dict[str, float]:
+    """Validate split ratios; they must be positive and sum to one."""
+    resolved = {str(name): float(ratio) for name, ratio in splits.items()}
+    if not resolved:
+        raise ValueError("splits must not be empty")
+    for name, ratio in resolved.items():
+        if not name or "/" in name or name.startswith("."):
+            raise ValueError(f"Invalid split name '{name}'")
+        if ratio <= 0:
+            raise ValueError(f"Split '{name}' must have a positive ratio")
+    if abs(sum(resolved.values()) - 1.0) > _RATIO_TOLERANCE:
+        raise ValueError("Split ratios must sum to 1")
+    return resolved
+
+
+def split_file(output_file: str | Path, name: str) -> Path:
+    """``<stem>.<name><suffix>`` next to ``output_file``."""
+    output_path = Path(output_file)
+    return output_path.with_name(f"{output_path.stem}.{name}{output_path.suffix}")
+
+
+def splits_index_path(output_file: str | Path) -> Path:
+    output_path = Path(output_file)
+    return output_path.with_name(f"{output_path.stem}.splits.json")
+
+
+class SplitRouter:
+    """Maps record keys to split names through a stable 64-bit hash."""
+
+    def __init__(self, splits: Mapping[str, float]) -> None:
+        self.splits = resolve_splits(splits)
+        self._names = list(self.splits)
+        self._bounds: list[float] = []
+        total = 0.0
+        for ratio in list(self.splits.values())[:-1]:
+            total += ratio
+            self._bounds.append(total)
+
+    def __call__(self, key: str) -> str:
+        digest = blake2b(key.encode("utf-8"), digest_size=8).digest()
+        position = int.from_bytes(digest, "little") / _HASH_SCALE
+        return self._names[bisect_right(self._bounds, position)]
+
+
+class SplitWriter:
+    """Routes keyed lines to one writer per split.
+
+    Split ``name`` is written to ``<stem>.<name><suffix>`` (compressed or
+    sharded according to ``writer_options``), and ``close`` writes
+    ``<stem>.splits.json`` with the ratio, output path and record count of
+    every split; ``path`` points to that index. A split holds scattered sample
+    indexes, so the manifests of sharded splits carry no ``sample_range``.
+    """
+
+    def __init__(
+        self,
+        output_file: str | Path,
+        splits: Mapping[str, float],
+        **writer_options: Any,
+    ) -> None:
+        self._route = SplitRouter(splits)
+        self.path = splits_index_path(output_file)
+        self._writers: dict[str, BlockWriter | ShardedWriter] = {
+            name: open_writer(
+                split_file(output_file, name), first_index=None, **writer_options
+            )
+            for name in self._route.splits
+        }
+        self._closed = False
+
+    def write(self, line: bytes, key: str) -> None:
+        self._writers[self._route(key)].write(line)
+
+    def flush(self) -> None:
+        for writer in self._writers.values():
+            writer.flush()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        for writer in self._writers.values():
+            writer.close()
+        index = {
+            name: {
+                "ratio": self._route.splits[name],
+                "file": writer.path.name,
+                "records": writer.records,
+            }
+            for name, writer in self._writers.items()
+        }
+        with self.path.open("w", encoding="utf-8") as handle:
+            json.dump({"splits": index}, handle, indent=2)
+
+    def __enter__(self) -> SplitWriter:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
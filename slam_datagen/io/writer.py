@@ -0,0 +1,304 @@
+"""Block-buffered writer for JSON Lines outputs."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+from slam_datagen.io.compression import (block_compressor, compressed_path,
+                                         write_block_index)
+
+DEFAULT_BLOCK_SIZE = 1 << 20
+DEFAULT_COMPRESSION_THREADS = 4
+
+
+class BlockWriter:
+    """Collects encoded lines and writes them to ``path`` in large blocks.
+
+    Lines are joined in memory until ``block_size`` bytes are pending, so the
+    file receives one ``write`` call per block instead of one per line.
+
+    With ``compression`` set to ``gzip`` or ``zstd``, the compression suffix is
+    appended to ``path`` and every block is compressed independently on a pool
+    of ``threads`` background threads while the caller keeps producing lines.
+    Compressed blocks are written in order and described in the block index
+    sidecar written on ``close``.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        compression: str = "none",
+        threads: int = DEFAULT_COMPRESSION_THREADS,
+    ):
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+        if threads <= 0:
+            raise ValueError("threads must be positive")
+        self.path = compressed_path(path, compression)
+        self.compression = compression
+        self._compress = (
+            None if compression == "none" else block_compressor(compression)
+        )
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._block_size = block_size
+        self._pending: list[bytes] = []
+        self._pending_bytes = 0
+        self.records = 0
+        # Uncompressed bytes received through ``write``
+        self.raw_bytes = 0
+        self._digest = hashlib.sha256()
+        self._executor: ThreadPoolExecutor | None = None
+        # Blocks handed to the pool, bounded to keep memory flat when the
+        # compressor falls behind
+        self._in_flight: deque[tuple[Future[bytes], int, int]] = deque()
+        self._max_in_flight = 2 * threads
+        self._threads = threads
+        self._blocks: list[dict[str, int]] = []
+        self._raw_offset = 0
+        self._first_record = 0
+        self._handle = self.path.open("wb")
+
+    def write(self, line: bytes) -> None:
+        self._pending.append(line)
+        self._pending_bytes += len(line)
+        self.raw_bytes += len(line)
+        self.records += 1
+        if self._pending_bytes >= self._block_size:
+            self._write_block()
+
+    def flush(self) -> None:
+        """Write pending lines and flush the file.
+
+        Compressed blocks still being compressed are written by a later call
+        instead of blocking the caller.
+        """
+        self._write_block()
+        while self._in_flight and self._in_flight[0][0].done():
+            self._drain(len(self._in_flight) - 1)
+        self._handle.flush()
+
+    def hexdigest(self) -> str:
+        """SHA-256 of the bytes written to the file so far."""
+        return self._digest.hexdigest()
+
+    def close(self) -> None:
+        if self._handle.closed:
+            return
+        try:
+            self._write_block()
+            self._drain(0)
+        finally:
+            self._handle.close()
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+        if self._compress is not None:
+            write_block_index(self.path, self.compression, self._blocks)
+
+    def __enter__(self) -> BlockWriter:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def _write_block(self) -> None:
+        if not self._pending:
+            return
+        block = b"".join(self._pending)
+        records = len(self._pending)
+        self._pending.clear()
+        self._pending_bytes = 0
+        if self._compress is None:
+            self._handle.write(block)
+            self._digest.update(block)
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self._threads, thread_name_prefix="block-compressor"
+            )
+        self._in_flight.append(
+            (self._executor.submit(self._compress, block), len(block), records)
+        )
+        self._drain(self._max_in_flight)
+
+    def _drain(self, limit: int) -> None:
+        """Write compressed blocks until at most ``limit`` are in flight."""
+        while len(self._in_flight) > limit:
+            future, raw_length, records = self._in_flight.popleft()
+            data = future.result()
+            self._blocks.append(
+                {
+                    "offset": self._handle.tell(),
+                    "length": len(data),
+                    "raw_offset": self._raw_offset,
+                    "raw_length": raw_length,
+                    "first_record": self._first_record,
+                    "records": records,
+                }
+            )
+            self._handle.write(data)
+            self._digest.update(data)
+            self._raw_offset += raw_length
+            self._first_record += records
+
+
+class ShardedWriter:
+    """Writes lines to numbered ``BlockWriter`` shards and lists them in a manifest.
+
+    A new shard is started once the current one holds ``shard_records`` lines
+    or ``shard_bytes`` uncompressed bytes. Shards are named
+    ``<stem>.part-00000<suffix>`` next to ``path`` and ``close`` writes
+    ``<stem>.manifest.json`` with the record count, size, SHA-256 digest and
+    sample index range of every shard, so readers can split shards without
+    scanning them. ``first_index`` is the sample index of the first line;
+    ``None`` leaves the ranges out, for lines that are not consecutive
+    samples.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        shard_records: int | None = None,
+        shard_bytes: int | None = None,
+        first_index: int | None = 0,
+        **writer_options: Any,
+    ):
+        if shard_records is None and shard_bytes is None:
+            raise ValueError("shard_records or shard_bytes must be set")
+        if (shard_records is not None and shard_records <= 0) or (
+            shard_bytes is not None and shard_bytes <= 0
+        ):
+            raise ValueError("Shard limits must be positive")
+        base = Path(path)
+        self.path = manifest_path(base)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._base = base
+        self._shard_records = shard_records
+        self._shard_bytes = shard_bytes
+        self._next_index = first_index
+        self._writer_options = writer_options
+        self._writer: BlockWriter | None = None
+        self.shards: list[dict[str, Any]] = []
+        self.records = 0
+        self._closed = False
+
+    def write(self, line: bytes) -> None:
+        if self._writer is None:
+            self._writer = BlockWriter(
+                shard_file(self._base, len(self.shards)), **self._writer_options
+            )
+        self._writer.write(line)
+        self.records += 1
+        if (
+            self._shard_records is not None
+            and self._writer.records >= self._shard_records
+        ) or (
+            self._shard_bytes is not None
+            and self._writer.raw_bytes >= self._shard_bytes
+        ):
+            self._finish_shard()
+
+    def flush(self) -> None:
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._finish_shard()
+        manifest = {
+            "records": self.records,
+            "bytes": sum(shard["bytes"] for shard in self.shards),
+            "shards": self.shards,
+        }
+        with self.path.open("w", encoding="utf-8") as handle:
+            json.dump(manifest, handle, indent=2)
+
+    def __enter__(self) -> ShardedWriter:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def _finish_shard(self) -> None:
+        writer, self._writer = self._writer, None
+        if writer is None:
+            return
+        writer.close()
+        shard = {
+            "index": len(self.shards),
+            "file": writer.path.name,
+            "records": writer.records,
+            "bytes": writer.path.stat().st_size,
+            "sha256": writer.hexdigest(),
+        }
+        if self._next_index is not None:
+            start = self._next_index
+            self._next_index += writer.records
+            shard["sample_range"] = [start, self._next_index]
+        self.shards.append(shard)
+
+
+def open_writer(
+    path: str | Path,
+    shard_records: int | None = None,
+    shard_bytes: int | None = None,
+    first_index: int | None = 0,
+    **writer_options: Any,
+) -> BlockWriter | ShardedWriter:
+    """Return a ``ShardedWriter`` when a shard limit is set, else a ``BlockWriter``."""
+    if shard_records is None and shard_bytes is None:
+        return BlockWriter(path, **writer_options)
+    return ShardedWriter(
+        path,
+        shard_records=shard_records,
+        shard_bytes=shard_bytes,
+        first_index=first_index,
+        **writer_options,
+    )
+
+
+def shard_file(path: str | Path, index: int) -> Path:
+    path = Path(path)
+    return path.with_name(f"{path.stem}.part-{index:05d}{path.suffix}")
+
+
+def manifest_path(path: str | Path) -> Path:
+    path = Path(path)
+    return path.with_name(f"{path.stem}.manifest.json")
+
+
+def output_files(path: str | Path) -> list[Path]:
+    """Data files of an output: the shards listed by a manifest, the files of
+    every split listed by a splits index, or ``path`` itself."""
+    path = Path(path)
+    if path.name.endswith(".splits.json"):
+        with path.open(encoding="utf-8") as handle:
+            splits = json.load(handle)["splits"]
+        return [
+            file
+            for split in splits.values()
+            for file in output_files(path.with_name(split["file"]))
+        ]
+    if not path.name.endswith(".manifest.json"):
+        return [path]
+    with path.open(encoding="utf-8") as handle:
+        manifest = json.load(handle)
+    return [path.with_name(shard["file"]) for shard in manifest["shards"]]
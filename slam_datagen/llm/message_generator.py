@@ -1,9 +1,27 @@
 from __future__ import annotations
 
-from typing import Protocol
+from typing import TYPE_CHECKING, Any, Protocol
 
-from pydantic_ai import Agent
-from pydantic_ai.models import Model
+if TYPE_CHECKING:
+    from pydantic_ai import Agent
+    from pydantic_ai.models import Model
+
+
+def __getattr__(name: str) -> Any:
+    # pydantic_ai is slow to import: it is only loaded once an agent is built
+    if name == "Agent":
+        # pylint: disable-next=import-outside-toplevel
+        from pydantic_ai import Agent
+
+        globals()["Agent"] = Agent
+        return Agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _agent_class() -> type[Agent]:
+    # Looked up on the module rather than imported here, so it can be patched
+    agent_class = globals().get("Agent")
+    return agent_class if agent_class is not None else __getattr__("Agent")
 
 
 class MessageGenerator(Protocol):
@@ -18,7 +36,7 @@ class MessageGeneratorViaLlm:
     """Generic helper for generating text via a pydantic-ai Agent."""
 
     def __init__(self, model: Model, system_prompt: str) -> None:
-        self._agent = Agent(model, system_prompt=system_prompt)
+        self._agent = _agent_class()(model, system_prompt=system_prompt)
 
     def generate(self, user_prompt: str) -> str:
         result = self._agent.run_sync(user_prompt)
@@ -0,0 +1,197 @@
+"""Seed-derived persona streams and their on-disk block cache.
+
+With ``seeding: streams`` a merge-quality run draws its target personas, its
+distractor personas and its hard-negative corpus from separate persona
+streams. Persona ``i`` of a stream belongs to block ``i // block_size``, which
+is generated by reseeding the generator with
+``derive_seed(seed, "persona_stream", stream, block)``. A stream therefore only
+depends on the seed: not on how many personas a run takes from it, in which
+batches, or how many it takes from the other streams. Every point of a sweep
+over chunk, distractor or sparsification settings reads the same personas.
+
+With a cache directory, every generated block is saved as gzip-compressed
+JSON Lines of persona values: plain strings, so reading a cache file never
+runs code from it. Blocks are keyed by the seed, the persona backend, the value
+bank directory, the Faker version, the block size, the day dates are drawn from
+and ``PERSONA_SCHEMA_VERSION``. Later runs read every block they need from the
+cache instead of calling the generator, with identical output.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from datetime import date
+from hashlib import blake2b
+from pathlib import Path
+
+from slam_datagen.personal_data import (ATTRIBUTE_PATHS, IDENTIFIER_FIELDS,
+                                        PERSONA_SCHEMA_VERSION, Persona, PersonalData,
+                                        PersonalDataGenerator, build_attributes)
+from slam_datagen.schema import PERSONA_SCHEMA
+from slam_datagen.utils.seeding import derive_seed
+
+PERSONA_BLOCK_SIZE = 256
+
+# Identifier values followed by attribute values, in layout order
+PersonaValues = tuple[str, ...]
+
+
+def persona_cache_path(
+    directory: str | Path,
+    generator: PersonalDataGenerator,
+    seed: int,
+    block_size: int = PERSONA_BLOCK_SIZE,
+) -> Path:
+    """Directory of the cached persona blocks of ``seed`` in ``directory``."""
+    # Imported lazily, like the generator's own Faker instance
+    # pylint: disable-next=import-outside-toplevel
+    from faker import VERSION as FAKER_VERSION
+
+    key = {
+        "schema_version": PERSONA_SCHEMA_VERSION,
+        "seed": seed,
+        "backend": generator.backend,
+        "faker_version": FAKER_VERSION,
+        "block_size": block_size,
+        "reference_date": _reference_date(generator),
+        "value_bank_dir": (
+            None
+            if generator.value_bank_dir is None
+            else str(Path(generator.value_bank_dir).resolve())
+        ),
+    }
+    digest = blake2b(
+        json.dumps(key, sort_keys=True).encode("utf-8"), digest_size=8
+    ).hexdigest()
+    return Path(directory) / (
+        f"personas-v{PERSONA_SCHEMA_VERSION}-{generator.backend}-{seed}-{digest}"
+    )
+
+
+def _reference_date(generator: PersonalDataGenerator) -> str | None:
+    # Columnar dates count from the generator's reference date and Faker's from
+    # the current day; value banks store drawn dates
+    if generator.backend == "columnar":
+        return generator.reference_date.isoformat()
+    if generator.backend == "faker":
+        return date.today().isoformat()
+    return None
+
+
+class PersonaStream:
+    """The personas of the stream ``name`` of ``seed``, read in order.
+
+    ``replayed`` counts the personas read from cached blocks and ``generated``
+    the personas of the blocks generated by this stream.
+    """
+
+    def __init__(
+        self,
+        generator: PersonalDataGenerator,
+        seed: int,
+        name: str,
+        cache_dir: str | Path | None = None,
+        block_size: int = PERSONA_BLOCK_SIZE,
+    ) -> None:
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+        if cache_dir is not None and generator.lazy:
+            raise ValueError("Persona caching does not support lazy personas")
+        self.name = name
+        self._generator = generator
+        self._seed = seed
+        self._block_size = block_size
+        self._directory = (
+            None
+            if cache_dir is None
+            else persona_cache_path(cache_dir, generator, seed, block_size)
+        )
+        self._block: list[Persona] = []
+        self._block_index = -1
+        self._block_cached = False
+        self._position = 0
+        self._identifiers = 0
+        self.replayed = 0
+        self.generated = 0
+
+    def generate(self, n: int) -> list[Persona]:
+        """The next ``n`` personas of the stream."""
+        personas: list[Persona] = []
+        while len(personas) < n:
+            block, offset = divmod(self._position, self._block_size)
+            if block != self._block_index:
+                self._load(block)
+            taken = self._block[offset : offset + n - len(personas)]
+            personas.extend(taken)
+            self._position += len(taken)
+            if self._block_cached:
+                self.replayed += len(taken)
+        return personas
+
+    def generate_identifier(self, name: str) -> str:
+        """Draw the next replacement value of the identifier ``name``."""
+        self._generator.reseed(
+            derive_seed(
+                self._seed, "persona_stream", self.name, "identifier", self._identifiers
+            )
+        )
+        self._identifiers += 1
+        return self._generator.generate_identifier(name)
+
+    def _load(self, block: int) -> None:
+        path = (
+            None
+            if self._directory is None
+            else self._directory / f"{self.name}-{block:06d}.jsonl.gz"
+        )
+        self._block_index = block
+        self._block_cached = path is not None and path.exists()
+        if self._block_cached:
+            assert path is not None
+            self._block = [self._persona(values) for values in _read_block(path)]
+            return
+        self._generator.reseed(
+            derive_seed(self._seed, "persona_stream", self.name, block)
+        )
+        self._block = self._generator.generate(self._block_size)
+        self.generated += len(self._block)
+        if path is not None:
+            _write_block(path, [_persona_values(record) for record in self._block])
+
+    def _persona(self, values: PersonaValues) -> Persona:
+        split = len(IDENTIFIER_FIELDS)
+        if self._generator.compact:
+            # Imported lazily: the records module depends on personal_data
+            # pylint: disable-next=import-outside-toplevel
+            from slam_datagen.records import CompactPersona
+
+            return CompactPersona.from_values(values[:split], values[split:])
+        return PersonalData(
+            unique_identifiers=dict(zip(IDENTIFIER_FIELDS, values[:split])),
+            attributes=build_attributes(dict(zip(ATTRIBUTE_PATHS, values[split:]))),
+        )
+
+
+def _persona_values(record: Persona) -> PersonaValues:
+    identifiers = record.unique_identifiers
+    flat = PERSONA_SCHEMA.flatten(record.attributes)
+    return tuple(identifiers[name] for name in IDENTIFIER_FIELDS) + tuple(
+        flat[path] for path in ATTRIBUTE_PATHS
+    )
+
+
+def _read_block(path: Path) -> list[PersonaValues]:
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        return [tuple(json.loads(line)) for line in handle]
+
+
+def _write_block(path: Path, block: list[PersonaValues]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Concurrent jobs of a sweep may write the same block: write, then rename
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=1) as handle:
+        for values in block:
+            handle.write(json.dumps(values, separators=(",", ":")) + "\n")
+    os.replace(tmp_path, path)
@@ -1,125 +1,424 @@
+from __future__ import annotations
+
+import random
+from collections.abc import Callable, Iterator, Mapping
 from dataclasses import dataclass
 from datetime import date
 from decimal import Decimal
-from typing import TypeAlias
-
-from faker import Faker
-from faker.providers import (automotive, bank, company, credit_card, internet, misc,
-                             passport, person, phone_number, profile)
+from hashlib import blake2b
+from typing import TYPE_CHECKING, Any, TypeAlias, cast
 
 from slam_datagen.utils.typing import NestedStrDict
 
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from faker import Faker
+
+    from slam_datagen.columnar import ColumnarSampler, PersonalDataColumns
+    from slam_datagen.records import CompactPersona
+    from slam_datagen.value_bank import ValueBankSampler
+
 ProfileValue: TypeAlias = str | tuple[Decimal, Decimal] | list[str] | date
 
+IDENTIFIER_FIELDS: tuple[str, ...] = ("name", "ssn")
+
+# Version of the generated persona layout and values; bump it whenever a change
+# makes the generator produce other personas for the same seed, so that cached
+# persona blocks are not reused
+PERSONA_SCHEMA_VERSION = 1
+
+# Flattened ("__"-joined) attribute paths in the order produced by
+# PersonalDataGenerator.generate
+ATTRIBUTE_PATHS: tuple[str, ...] = (
+    "profile__sex",
+    "profile__blood_group",
+    "profile__date_of_birth",
+    "profile__photo",
+    "car__license_plate",
+    "car__vin",
+    "bank_account__bank_country",
+    "bank_account__bban",
+    "bank_account__aba",
+    "bank_account__iban",
+    "bank_account__swift",
+    "bank_account__credit_card__expire",
+    "bank_account__credit_card__number",
+    "bank_account__credit_card__provider",
+    "bank_account__credit_card__security_code",
+    "contacts__phone",
+    "contacts__email",
+    "contacts__website",
+    "contacts__telegram",
+    "contacts__social_networks__vk",
+    "contacts__social_networks__twitter",
+    "contacts__social_networks__linkedin",
+    "contacts__social_networks__facebook",
+    "internet_access_point__ipv4",
+    "internet_access_point__ipv6",
+    "internet_access_point__mac",
+    "passports__national_passport_number",
+    "passports__international_passport_number",
+    "work__location",
+    "work__company",
+    "work__address",
+    "home__address",
+    "home__location",
+)
+
+PERSONA_BACKENDS: tuple[str, ...] = ("faker", "columnar", "value_bank")
+# Backends that produce whole attribute columns at once
+_COLUMN_BACKENDS: tuple[str, ...] = ("columnar", "value_bank")
+
+FieldProducer: TypeAlias = Callable[["Faker"], str]
 
-@dataclass
+
+@dataclass(slots=True)
 class PersonalData:
     unique_identifiers: dict[str, str]
     attributes: dict[str, NestedStrDict]
 
 
+def _profile_value(fake: Faker, field: str) -> str:
+    profile_value = fake.profile(fields=[field])[field]
+    if isinstance(profile_value, tuple):
+        latitude, longitude = profile_value
+        return f"({float(latitude):.6f}, {float(longitude):.6f})"
+    if isinstance(profile_value, list):
+        return ", ".join(map(str, profile_value))
+    if isinstance(profile_value, date):
+        return profile_value.isoformat()
+    return str(profile_value)
+
+
+# One producer per identifier / flattened attribute path
+_FIELD_PRODUCERS: dict[str, FieldProducer] = {
+    "name": lambda fake: " ".join([fake.first_name(), fake.last_name()]),
+    "ssn": lambda fake: _profile_value(fake, "ssn"),
+    "profile__sex": lambda fake: _profile_value(fake, "sex"),
+    "profile__blood_group": lambda fake: _profile_value(fake, "blood_group"),
+    "profile__date_of_birth": lambda fake: fake.passport_dob().isoformat(),
+    "profile__photo": lambda fake: fake.image_url(),
+    "car__license_plate": lambda fake: fake.license_plate(),
+    "car__vin": lambda fake: fake.vin(),
+    "bank_account__bank_country": lambda fake: fake.bank_country(),
+    "bank_account__bban": lambda fake: fake.bban(),
+    "bank_account__aba": lambda fake: fake.aba(),
+    "bank_account__iban": lambda fake: fake.iban(),
+    "bank_account__swift": lambda fake: fake.swift(),
+    "bank_account__credit_card__expire": lambda fake: fake.credit_card_expire(),
+    "bank_account__credit_card__number": lambda fake: fake.credit_card_number(),
+    "bank_account__credit_card__provider": lambda fake: fake.credit_card_provider(),
+    "bank_account__credit_card__security_code": lambda fake: (
+        fake.credit_card_security_code()
+    ),
+    "contacts__phone": lambda fake: fake.phone_number(),
+    "contacts__email": lambda fake: fake.ascii_email(),
+    "contacts__website": lambda fake: fake.url(),
+    "contacts__telegram": lambda fake: fake.user_name(),
+    "contacts__social_networks__vk": lambda fake: fake.user_name(),
+    "contacts__social_networks__twitter": lambda fake: fake.user_name(),
+    "contacts__social_networks__linkedin": lambda fake: fake.user_name(),
+    "contacts__social_networks__facebook": lambda fake: fake.user_name(),
+    "internet_access_point__ipv4": lambda fake: fake.ipv4(),
+    "internet_access_point__ipv6": lambda fake: fake.ipv6(),
+    "internet_access_point__mac": lambda fake: fake.mac_address(),
+    "passports__national_passport_number": lambda fake: fake.passport_number(),
+    "passports__international_passport_number": lambda fake: fake.passport_number(),
+    "work__location": lambda fake: _profile_value(fake, "current_location"),
+    "work__company": lambda fake: _profile_value(fake, "company"),
+    "work__address": lambda fake: fake.address(),
+    "home__address": lambda fake: fake.address(),
+    "home__location": lambda fake: _profile_value(fake, "current_location"),
+}
+
+# Order in which PersonalDataGenerator.generate draws fields from Faker; the
+# email is drawn first so that seeded output matches earlier releases
+_GENERATION_ORDER: tuple[str, ...] = (
+    "contacts__email",
+    *IDENTIFIER_FIELDS,
+    *(path for path in ATTRIBUTE_PATHS if path != "contacts__email"),
+)
+
+_ATTRIBUTE_PATH_PARTS: tuple[tuple[str, ...], ...] = tuple(
+    tuple(path.split("__")) for path in ATTRIBUTE_PATHS
+)
+
+_FIELD_SALTS: dict[str, int] = {
+    path: int.from_bytes(blake2b(path.encode(), digest_size=8).digest(), "little")
+    for path in _FIELD_PRODUCERS
+}
+
+
+def produce_field(fake: Faker, path: str) -> str:
+    """Draw the value of the identifier or attribute ``path`` from ``fake``."""
+    return _FIELD_PRODUCERS[path](fake)
+
+
+def build_attributes(flat: Mapping[str, str]) -> dict[str, NestedStrDict]:
+    """Nest flattened attribute values following the ``ATTRIBUTE_PATHS`` layout."""
+    attributes: dict[str, NestedStrDict] = {}
+    for parts, path in zip(_ATTRIBUTE_PATH_PARTS, ATTRIBUTE_PATHS):
+        if path not in flat:
+            continue
+        cursor: dict[str, Any] = attributes
+        for key in parts[:-1]:
+            cursor = cursor.setdefault(key, {})
+        cursor[parts[-1]] = flat[path]
+    return attributes
+
+
+class LazyPersonalData:
+    """Persona whose fields are only generated when they are accessed.
+
+    Every field is drawn from a Faker instance reseeded from the persona seed
+    and the field path, so a value does not depend on which other fields have
+    been accessed before it.
+    """
+
+    __slots__ = ("seed", "_generator", "_values", "flat_attributes")
+
+    def __init__(self, generator: PersonalDataGenerator, seed: int) -> None:
+        self.seed = seed
+        self._generator = generator
+        self._values: dict[str, str] = {}
+        self.flat_attributes = LazyAttributes(self)
+
+    def field(self, path: str) -> str:
+        value = self._values.get(path)
+        if value is None:
+            value = self._generator.generate_field(self.seed, path)
+            self._values[path] = value
+        return value
+
+    @property
+    def unique_identifiers(self) -> dict[str, str]:
+        return {name: self.field(name) for name in IDENTIFIER_FIELDS}
+
+    def set_identifiers(self, identifiers: Mapping[str, str]) -> None:
+        """Override identifier values, e.g. after a uniqueness check."""
+        for name in IDENTIFIER_FIELDS:
+            if name in identifiers:
+                self._values[name] = identifiers[name]
+
+    @property
+    def attributes(self) -> dict[str, NestedStrDict]:
+        return build_attributes(self.flat_attributes)
+
+    def materialize(self, paths: tuple[str, ...] = ATTRIBUTE_PATHS) -> PersonalData:
+        return PersonalData(
+            unique_identifiers=self.unique_identifiers,
+            attributes=build_attributes({path: self.field(path) for path in paths}),
+        )
+
+
+class LazyAttributes(Mapping[str, str]):
+    """Read-only flattened attribute view backed by a ``LazyPersonalData``."""
+
+    __slots__ = ("_persona",)
+
+    def __init__(self, persona: LazyPersonalData) -> None:
+        self._persona = persona
+
+    def __getitem__(self, path: str) -> str:
+        if path not in _FIELD_SALTS or path in IDENTIFIER_FIELDS:
+            raise KeyError(path)
+        return self._persona.field(path)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(ATTRIBUTE_PATHS)
+
+    def __len__(self) -> int:
+        return len(ATTRIBUTE_PATHS)
+
+
+Persona: TypeAlias = "PersonalData | LazyPersonalData | CompactPersona"
+
+
 class PersonalDataGenerator:
-    def __init__(self, seed: int | None = None) -> None:
-        self.fake = Faker(["en_US"])
-        if seed is not None:
-            self.fake.seed_instance(seed)
-        self.fake.add_provider(automotive)
-        self.fake.add_provider(bank)
-        self.fake.add_provider(company)
-        self.fake.add_provider(credit_card)
-        self.fake.add_provider(internet)
-        self.fake.add_provider(misc)
-        self.fake.add_provider(passport)
-        self.fake.add_provider(person)
-        self.fake.add_provider(phone_number)
-        self.fake.add_provider(profile)
-
-    def generate(self, n: int) -> list[PersonalData]:
-        data: list[PersonalData] = []
-        for _ in range(n):
-            email = self.fake.ascii_email()
-            unique_identifiers = {
-                "name": " ".join([self.fake.first_name(), self.fake.last_name()]),
-                "ssn": self._generate_from_profile("ssn"),
-            }
+    def __init__(
+        self,
+        seed: int | None = None,
+        backend: str = "faker",
+        lazy: bool = False,
+        compact: bool = False,
+        value_bank_dir: str | Path | None = None,
+        reference_date: date | None = None,
+    ) -> None:
+        if backend not in PERSONA_BACKENDS:
+            raise ValueError(f"Unsupported persona backend '{backend}'")
+        if lazy and backend != "faker":
+            raise ValueError("Lazy personas are only supported by the faker backend")
+        if backend == "value_bank" and value_bank_dir is None:
+            raise ValueError("The value_bank backend requires value_bank_dir")
+        self.seed = seed
+        self.backend = backend
+        self.lazy = lazy
+        self.compact = compact
+        self.value_bank_dir = value_bank_dir
+        # Day the columnar backend draws dates from; None pins the current day
+        # once, when the generator is created
+        self.reference_date = date.today() if reference_date is None else reference_date
+        self._columnar_sampler: ColumnarSampler | ValueBankSampler | None = None
+        self._persona_seeds = random.Random(seed)
+        self._field_fake: Faker | None = None
+        # Faker and its providers are only set up on first use
+        self._fake: Faker | None = None
 
-            attributes: dict[str, NestedStrDict] = {
-                "profile": {
-                    "sex": self._generate_from_profile("sex"),
-                    "blood_group": self._generate_from_profile("blood_group"),
-                    "date_of_birth": self.fake.passport_dob().isoformat(),
-                    "photo": self.fake.image_url(),
-                },
-                "car": {
-                    "license_plate": self.fake.license_plate(),
-                    "vin": self.fake.vin(),
-                },
-                "bank_account": {
-                    "bank_country": self.fake.bank_country(),
-                    "bban": self.fake.bban(),
-                    "aba": self.fake.aba(),
-                    "iban": self.fake.iban(),
-                    "swift": self.fake.swift(),
-                    "credit_card": {
-                        "expire": self.fake.credit_card_expire(),
-                        "number": self.fake.credit_card_number(),
-                        "provider": self.fake.credit_card_provider(),
-                        "security_code": self.fake.credit_card_security_code(),
-                    },
-                },
-                "contacts": {
-                    "phone": self.fake.phone_number(),
-                    "email": email,
-                    "website": self.fake.url(),
-                    "telegram": self.fake.user_name(),
-                    "social_networks": {
-                        "vk": self.fake.user_name(),
-                        "twitter": self.fake.user_name(),
-                        "linkedin": self.fake.user_name(),
-                        "facebook": self.fake.user_name(),
-                    },
-                },
-                "internet_access_point": {
-                    "ipv4": self.fake.ipv4(),
-                    "ipv6": self.fake.ipv6(),
-                    "mac": self.fake.mac_address(),
-                },
-                "passports": {
-                    "national_passport_number": self.fake.passport_number(),
-                    "international_passport_number": self.fake.passport_number(),
-                },
-                "work": {
-                    "location": self._generate_from_profile("current_location"),
-                    "company": self._generate_from_profile("company"),
-                    "address": self.fake.address(),
-                },
-                "home": {
-                    "address": self.fake.address(),
-                    "location": self._generate_from_profile("current_location"),
-                },
-            }
+    @property
+    def fake(self) -> Faker:
+        if self._fake is None:
+            self._fake = _new_faker()
+            if self.seed is not None:
+                self._fake.seed_instance(self.seed)
+        return self._fake
+
+    def reseed(self, seed: int) -> None:
+        """Restart every random stream of the generator from ``seed``."""
+        self.seed = seed
+        if self._fake is not None:
+            self._fake.seed_instance(seed)
+        self._persona_seeds.seed(seed)
+        if self._columnar_sampler is not None:
+            self._columnar_sampler.reseed(seed)
 
+    def generate(self, n: int) -> list[Persona]:
+        if self.lazy:
+            return list(self.generate_lazy(n))
+        if self.compact:
+            return list(self.generate_compact(n))
+        if self.backend in _COLUMN_BACKENDS:
+            return list(self.generate_columns(n))
+
+        data: list[Persona] = []
+        for values in self._iter_flat_values(n):
             data.append(
                 PersonalData(
-                    unique_identifiers=unique_identifiers, attributes=attributes
+                    unique_identifiers={
+                        name: values[name] for name in IDENTIFIER_FIELDS
+                    },
+                    attributes=build_attributes(values),
                 )
             )
 
         return data
 
+    def generate_compact(self, n: int) -> list[CompactPersona]:
+        """Generate ``n`` personas as compact records.
+
+        Values are the same as the ones ``generate`` returns for the same seed
+        and backend; only the record representation differs.
+        """
+        # Imported lazily: the records module depends on this module
+        # pylint: disable-next=import-outside-toplevel
+        from slam_datagen.records import CompactPersona
+
+        if self.backend in _COLUMN_BACKENDS:
+            columns = self.generate_columns(n)
+            identifiers = zip(
+                *(columns.identifiers[name] for name in IDENTIFIER_FIELDS)
+            )
+            attributes = zip(*(columns.attributes[path] for path in ATTRIBUTE_PATHS))
+            return [
+                CompactPersona.from_values(row_identifiers, row_attributes)
+                for row_identifiers, row_attributes in zip(identifiers, attributes)
+            ]
+
+        return [
+            CompactPersona.from_values(
+                tuple(values[name] for name in IDENTIFIER_FIELDS),
+                tuple(values[path] for path in ATTRIBUTE_PATHS),
+            )
+            for values in self._iter_flat_values(n)
+        ]
+
+    def generate_lazy(self, n: int) -> list[LazyPersonalData]:
+        return [
+            LazyPersonalData(self, seed=self._persona_seeds.getrandbits(64))
+            for _ in range(n)
+        ]
+
+    def generate_field(self, persona_seed: int, path: str) -> str:
+        """Generate a single field of the persona identified by ``persona_seed``."""
+        if self._field_fake is None:
+            self._field_fake = _new_faker()
+        self._field_fake.seed_instance(persona_seed ^ _FIELD_SALTS[path])
+        return _FIELD_PRODUCERS[path](self._field_fake)
+
+    def generate_identifier(self, name: str) -> str:
+        """Draw a fresh value of the identifier ``name``.
+
+        Values come from the Faker stream, or from the identifier bank with the
+        ``value_bank`` backend.
+        """
+        if name not in IDENTIFIER_FIELDS:
+            raise ValueError(f"Unknown identifier '{name}'")
+        if self.backend == "value_bank":
+            if self._columnar_sampler is None:
+                self._columnar_sampler = self._new_column_sampler()
+            sampler = cast("ValueBankSampler", self._columnar_sampler)
+            return sampler.sample_field(name, 1)[0]
+        return _FIELD_PRODUCERS[name](self.fake)
+
+    def generate_columns(self, n: int) -> PersonalDataColumns:
+        """Generate ``n`` personas at once as a columnar batch.
+
+        Columns are produced by NumPy-backed samplers (or, with the
+        ``value_bank`` backend, sampled from precomputed value banks) seeded
+        from ``seed``, so the values differ from the row-wise Faker output for
+        the same seed.
+        """
+        if self._columnar_sampler is None:
+            self._columnar_sampler = self._new_column_sampler()
+        return self._columnar_sampler.sample(n)
+
+    def _new_column_sampler(self) -> ColumnarSampler | ValueBankSampler:
+        # Imported lazily: the samplers depend on NumPy and on this module
+        # pylint: disable=import-outside-toplevel
+        if self.backend == "value_bank":
+            from slam_datagen.value_bank import ValueBankSampler
+
+            assert self.value_bank_dir is not None
+            return ValueBankSampler(self.value_bank_dir, seed=self.seed)
+        from slam_datagen.columnar import ColumnarSampler
+
+        return ColumnarSampler(
+            self.fake, seed=self.seed, reference_date=self.reference_date
+        )
+
+    def _iter_flat_values(self, n: int) -> Iterator[dict[str, str]]:
+        for _ in range(n):
+            yield {
+                path: _FIELD_PRODUCERS[path](self.fake) for path in _GENERATION_ORDER
+            }
+
     def _generate_from_profile(self, field: str) -> str:
-        profile_value = self.fake.profile(fields=[field])[field]
-        if isinstance(profile_value, tuple):
-            latitude, longitude = profile_value
-            return f"({float(latitude):.6f}, {float(longitude):.6f})"
-        if isinstance(profile_value, list):
-            return ", ".join(map(str, profile_value))
-        if isinstance(profile_value, date):
-            return profile_value.isoformat()
-        return str(profile_value)
+        return _profile_value(self.fake, field)
 
     # print(fake.url())  # internet
     # print(fake.image_url())  # internet
     # print(fake.password())  # misc
     # print(fake.uuid4())  # misc
     # print(fake.passport_dob())  # passport
+
+
+def _new_faker() -> Faker:
+    # Faker is imported on first use: it is slow to import, and runs with the
+    # columnar or value_bank backend do not need its providers
+    # pylint: disable=import-outside-toplevel
+    from faker import Faker
+    from faker.providers import (automotive, bank, company, credit_card, internet, misc,
+                                 passport, person, phone_number, profile)
+
+    fake = Faker(["en_US"])
+    fake.add_provider(automotive)
+    fake.add_provider(bank)
+    fake.add_provider(company)
+    fake.add_provider(credit_card)
+    fake.add_provider(internet)
+    fake.add_provider(misc)
+    fake.add_provider(passport)
+    fake.add_provider(person)
+    fake.add_provider(phone_number)
+    fake.add_provider(profile)
+    return fake
@@ -0,0 +1,124 @@
+"""Compact persona records backed by field ids of the compiled schema.
+
+A ``PersonalData`` keeps nested dicts whose keys (``credit_card``,
+``social_networks``...) are repeated in every record. A ``CompactPersona``
+stores its fields as an ``array`` of ``PERSONA_SCHEMA`` field ids next to a
+tuple of values; personas with the full attribute layout share a single id
+array. Compact records convert back to ``PersonalData`` on demand.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterator, Mapping
+
+from slam_datagen.personal_data import ATTRIBUTE_PATHS, IDENTIFIER_FIELDS, PersonalData
+from slam_datagen.schema import PERSONA_SCHEMA
+from slam_datagen.utils.typing import NestedStrDict
+
+# Field ids are unsigned 16-bit integers
+_ID_TYPECODE = "H"
+
+
+class CompactFields(Mapping[str, str]):
+    """Read-only flattened fields stored as parallel id / value arrays."""
+
+    __slots__ = ("_ids", "_values")
+
+    def __init__(self, ids: array[int], values: tuple[str, ...]) -> None:
+        if len(ids) != len(values):
+            raise ValueError("Field ids and values must have the same length")
+        self._ids = ids
+        self._values = values
+
+    @classmethod
+    def from_mapping(cls, fields: Mapping[str, str]) -> CompactFields:
+        if isinstance(fields, CompactFields):
+            return fields
+        field_id = PERSONA_SCHEMA.field_id
+        return cls(
+            array(_ID_TYPECODE, [field_id(path) for path in fields]),
+            tuple(fields.values()),
+        )
+
+    def __getitem__(self, path: str) -> str:
+        if path not in PERSONA_SCHEMA:
+            raise KeyError(path)
+        try:
+            return self._values[self._ids.index(PERSONA_SCHEMA.field_id(path))]
+        except ValueError:
+            raise KeyError(path) from None
+
+    def __iter__(self) -> Iterator[str]:
+        return map(PERSONA_SCHEMA.path, self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+# Shared by every persona generated with the full layout
+IDENTIFIER_IDS: array[int] = array(
+    _ID_TYPECODE, [PERSONA_SCHEMA.field_id(name) for name in IDENTIFIER_FIELDS]
+)
+ATTRIBUTE_IDS: array[int] = array(
+    _ID_TYPECODE, [PERSONA_SCHEMA.field_id(path) for path in ATTRIBUTE_PATHS]
+)
+
+
+class CompactPersona:
+    """Persona with compact identifiers and flattened attributes."""
+
+    __slots__ = ("identifiers", "flat_attributes")
+
+    def __init__(self, identifiers: CompactFields, flat_attributes: CompactFields):
+        self.identifiers = identifiers
+        self.flat_attributes = flat_attributes
+
+    @classmethod
+    def from_values(
+        cls,
+        identifiers: tuple[str, ...],
+        attributes: tuple[str, ...],
+    ) -> CompactPersona:
+        """Build a persona from values in the full layout order."""
+        return cls(
+            CompactFields(IDENTIFIER_IDS, identifiers),
+            CompactFields(ATTRIBUTE_IDS, attributes),
+        )
+
+    @classmethod
+    def from_personal_data(cls, record: PersonalData) -> CompactPersona:
+        return cls(
+            CompactFields.from_mapping(record.unique_identifiers),
+            CompactFields.from_mapping(PERSONA_SCHEMA.flatten(record.attributes)),
+        )
+
+    @property
+    def unique_identifiers(self) -> dict[str, str]:
+        return dict(self.identifiers)
+
+    @property
+    def attributes(self) -> dict[str, NestedStrDict]:
+        return PERSONA_SCHEMA.unflatten(self.flat_attributes)
+
+    def to_personal_data(self) -> PersonalData:
+        return PersonalData(
+            unique_identifiers=self.unique_identifiers,
+            attributes=self.attributes,
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactPersona):
+            return NotImplemented
+        return dict(self.identifiers) == dict(other.identifiers) and list(
+            self.flat_attributes.items()
+        ) == list(other.flat_attributes.items())
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(identifiers={dict(self.identifiers)!r}, "
+            f"flat_attributes={dict(self.flat_attributes)!r})"
+        )
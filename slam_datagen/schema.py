@@ -0,0 +1,237 @@
+"""Compiled layout of flattened persona fields.
+
+Chunk renderers work on flattened (``"__"``-joined) field paths. Splitting
+paths, rebuilding nested dicts and re-sorting keys for every rendered row is
+avoided by compiling every path once: its parts, its prefixes and the JSON and
+XML fragments needed to open and close each nesting level. Rendering a row is
+then a single sort of the compiled paths followed by flat string assembly.
+
+Every compiled path also gets a small integer id so compact records can store
+field ids instead of keys. The declared paths (the ``PersonalDataGenerator``
+layout for ``PERSONA_SCHEMA``) are numbered up front in XML tag order, so their
+ids never depend on which paths were rendered first. Paths missing from the
+layout (custom identifiers, hand-written records) are compiled on first use and
+numbered after them.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from json.encoder import encode_basestring  # type: ignore[attr-defined]
+from typing import Any, TypeAlias
+
+from slam_datagen.personal_data import ATTRIBUTE_PATHS, IDENTIFIER_FIELDS
+from slam_datagen.utils.typing import NestedStrDict
+
+PATH_SEPARATOR = "__"
+
+# Indentation depth of the keys of the "data" object in JSON chunks
+_JSON_DATA_DEPTH = 2
+# Indentation depth of the children of <record> in XML chunks
+_XML_RECORD_DEPTH = 1
+
+
+@dataclass(frozen=True)
+class CompiledPath:
+    path: str
+    # Small integer id: rank in the sorted declared paths, then compilation
+    # order for paths compiled on first use
+    field_id: int
+    parts: tuple[str, ...]
+    # "__"-joined paths of the enclosing objects, outermost first
+    ancestors: tuple[str, ...]
+    # Opening and closing fragments (XML: lines) of every enclosing object
+    json_groups: tuple[tuple[str, str], ...]
+    xml_groups: tuple[tuple[str, str], ...]
+    json_leaf: str
+    xml_leaf_open: str
+    xml_leaf_close: str
+
+
+# Nested rendering: leaves are rendered strings, objects are
+# (opening fragment, children, closing fragment) triples
+_Group: TypeAlias = list["str | tuple[str, _Group, str]"]
+
+
+class AttributeSchema:
+    def __init__(self, paths: Iterable[str]) -> None:
+        self._compiled: dict[str, CompiledPath] = {}
+        self._paths: list[str] = []
+        for path in sorted(dict.fromkeys(paths), key=_path_parts):
+            self.compile(path)
+        # Field id, which is also the XML tag rank, of every declared path
+        self._declared: dict[str, int] = {
+            path: compiled.field_id for path, compiled in self._compiled.items()
+        }
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._compiled
+
+    def compile(self, path: str) -> CompiledPath:
+        compiled = self._compiled.get(path)
+        if compiled is not None:
+            return compiled
+
+        parts = _path_parts(path)
+        json_keys = [
+            "  " * (depth + _JSON_DATA_DEPTH) + encode_basestring(part) + ": "
+            for depth, part in enumerate(parts)
+        ]
+        xml_indents = [
+            "  " * (depth + _XML_RECORD_DEPTH) for depth in range(len(parts))
+        ]
+        compiled = CompiledPath(
+            path=path,
+            field_id=len(self._paths),
+            parts=parts,
+            ancestors=tuple(
+                PATH_SEPARATOR.join(parts[: depth + 1])
+                for depth in range(len(parts) - 1)
+            ),
+            json_groups=tuple(
+                (f"{key}{{\n", "\n" + "  " * (depth + _JSON_DATA_DEPTH) + "}")
+                for depth, key in enumerate(json_keys[:-1])
+            ),
+            xml_groups=tuple(
+                (f"{indent}<{part}>", f"{indent}</{part}>")
+                for indent, part in zip(xml_indents, parts[:-1])
+            ),
+            json_leaf=json_keys[-1],
+            xml_leaf_open=f"{xml_indents[-1]}<{parts[-1]}>",
+            xml_leaf_close=f"</{parts[-1]}>",
+        )
+        self._compiled[path] = compiled
+        self._paths.append(path)
+        return compiled
+
+    def field_id(self, path: str) -> int:
+        compiled = self._compiled.get(path) or self.compile(path)
+        return compiled.field_id
+
+    def path(self, field_id: int) -> str:
+        return self._paths[field_id]
+
+    def unflatten(self, flat: Mapping[str, str]) -> dict[str, NestedStrDict]:
+        """Nest flattened fields, keeping their insertion order at every level."""
+        nested: dict[str, Any] = {}
+        for path, value in flat.items():
+            parts = self.compile(path).parts
+            cursor: dict[str, Any] = nested
+            for key in parts[:-1]:
+                cursor = cursor.setdefault(key, {})
+            cursor[parts[-1]] = value
+        return nested
+
+    def flatten(self, nested: Mapping[str, Any]) -> dict[str, str]:
+        """Flatten nested fields depth-first, keeping their key order."""
+        flat: dict[str, str] = {}
+        pending = [("", iter(nested.items()))]
+        while pending:
+            prefix, items = pending[-1]
+            for key, value in items:
+                path = f"{prefix}{PATH_SEPARATOR}{key}" if prefix else key
+                if isinstance(value, Mapping):
+                    pending.append((path, iter(value.items())))
+                    break
+                flat[path] = str(value)
+            else:
+                pending.pop()
+        return flat
+
+    def render_json_object(self, fields: Mapping[str, str]) -> str:
+        """Render ``fields`` as the indented ``data`` object of a JSON chunk.
+
+        The output matches ``json.dumps(..., indent=2, ensure_ascii=False)`` of
+        the unflattened fields nested under a top-level key: keys keep their
+        first-appearance order at every level.
+        """
+        if not fields:
+            return "{}"
+
+        compiled_paths = self._compiled
+        root: _Group = []
+        groups: dict[str, _Group] = {"": root}
+        for path, value in fields.items():
+            compiled = compiled_paths.get(path) or self.compile(path)
+            leaves = groups.get(compiled.ancestors[-1] if compiled.ancestors else "")
+            if leaves is None:
+                leaves = _open_groups(groups, compiled.ancestors, compiled.json_groups)
+            leaves.append(compiled.json_leaf + encode_basestring(value))
+        closing = "\n" + "  " * (_JSON_DATA_DEPTH - 1) + "}"
+        return "{\n" + _join_group(root, ",\n") + closing
+
+    def render_xml_body(self, fields: Mapping[str, str]) -> str:
+        """Render ``fields`` as the ``<record>`` body, tags sorted at every level."""
+        compiled_paths = self._compiled
+        if self._declared.keys() >= fields.keys():
+            ordered = sorted(fields, key=self._declared.__getitem__)
+        else:
+            ordered = sorted(fields, key=lambda path: self.compile(path).parts)
+
+        lines: list[str] = []
+        ancestors: tuple[str, ...] = ()
+        groups: tuple[tuple[str, str], ...] = ()
+        for path in ordered:
+            compiled = compiled_paths[path]
+            if compiled.ancestors != ancestors:
+                # Sorted paths sharing an ancestor are contiguous: close the
+                # objects left behind and open the new ones
+                depth = 0
+                for previous, current in zip(ancestors, compiled.ancestors):
+                    if previous != current:
+                        break
+                    depth += 1
+                lines.extend(closing for _, closing in reversed(groups[depth:]))
+                lines.extend(opening for opening, _ in compiled.xml_groups[depth:])
+                ancestors, groups = compiled.ancestors, compiled.xml_groups
+            lines.append(
+                compiled.xml_leaf_open
+                + escape_xml(fields[path])
+                + compiled.xml_leaf_close
+            )
+        lines.extend(closing for _, closing in reversed(groups))
+        return "\n".join(lines)
+
+
+def _path_parts(path: str) -> tuple[str, ...]:
+    return tuple(path.split(PATH_SEPARATOR)) if path else (path,)
+
+
+def escape_xml(value: str) -> str:
+    return (
+        value.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+        .replace('"', "&quot;")
+        .replace("'", "&apos;")
+    )
+
+
+def _open_groups(
+    groups: dict[str, _Group],
+    ancestors: tuple[str, ...],
+    fragments: tuple[tuple[str, str], ...],
+) -> _Group:
+    parent = groups[""]
+    for ancestor, (opening, closing) in zip(ancestors, fragments):
+        children = groups.get(ancestor)
+        if children is None:
+            children = groups[ancestor] = []
+            parent.append((opening, children, closing))
+        parent = children
+    return parent
+
+
+def _join_group(group: _Group, separator: str) -> str:
+    return separator.join(
+        (
+            item
+            if isinstance(item, str)
+            else item[0] + _join_group(item[1], separator) + item[2]
+        )
+        for item in group
+    )
+
+
+PERSONA_SCHEMA = AttributeSchema((*IDENTIFIER_FIELDS, *ATTRIBUTE_PATHS))
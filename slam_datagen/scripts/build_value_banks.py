@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import hydra
+from omegaconf import DictConfig
+
+from slam_datagen.utils.common import get_config_path
+from slam_datagen.value_bank import DEFAULT_BATCH_SIZE, build_value_banks
+
+CONFIG_NAME = "config_build_value_banks"
+
+
+def build_banks(cfg: DictConfig) -> None:
+    fields = cfg.get("fields")
+    manifest_path = build_value_banks(
+        output_dir=cfg.output_dir,
+        size=cfg.bank_size,
+        seed=cfg.random_seed,
+        backend=cfg.get("backend", "faker"),
+        fields=list(fields) if fields is not None else None,
+        batch_size=cfg.get("batch_size", DEFAULT_BATCH_SIZE),
+    )
+    print(f"Value banks written to {manifest_path.parent}")
+
+
+if __name__ == "__main__":
+    hydra.main(
+        config_path=str(get_config_path()),
+        config_name=CONFIG_NAME,
+        version_base="1.3",
+    )(build_banks)()
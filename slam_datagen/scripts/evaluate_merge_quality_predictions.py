@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import hydra
+from omegaconf import DictConfig
+
+from slam_datagen.datasets.evaluation import (DEFAULT_SPARSITY_BUCKETS,
+                                              DEFAULT_TASK_SIZE, EvaluationResult,
+                                              evaluate_predictions)
+from slam_datagen.utils.common import get_config_path
+
+CONFIG_NAME = "config_evaluate_merge_quality_predictions"
+
+
+def evaluate_merge_quality_predictions(cfg: DictConfig) -> EvaluationResult:
+    result = evaluate_predictions(
+        cfg.dataset_file,
+        cfg.predictions_file,
+        match_by=cfg.get("match_by", "index"),
+        num_workers=cfg.get("num_workers", 1),
+        task_size=cfg.get("task_size", DEFAULT_TASK_SIZE),
+        sparsity_buckets=cfg.get("sparsity_buckets", DEFAULT_SPARSITY_BUCKETS),
+    )
+    report = result.to_dict()
+    overall = report["overall"]
+    print(
+        f"Scored {report['samples']} samples "
+        f"({report['missing_predictions']} without prediction, "
+        f"{report['unmatched_predictions']} unmatched predictions)"
+    )
+    print(
+        f"  precision {overall['precision']:.4f}  recall {overall['recall']:.4f}  "
+        f"f1 {overall['f1']:.4f}  macro f1 {overall['macro_f1']:.4f}"
+    )
+    for breakdown in ("by_format", "by_sparsity", "by_identifier_type"):
+        for label, scores in report[breakdown].items():
+            print(f"  {breakdown} {label}: f1 {scores['f1']:.4f}")
+    report_file = cfg.get("report_file")
+    if report_file:
+        print(f"Evaluation report written to {result.write(report_file)}")
+    return result
+
+
+if __name__ == "__main__":
+    hydra.main(
+        config_path=str(get_config_path()),
+        config_name=CONFIG_NAME,
+        version_base="1.3",
+    )(evaluate_merge_quality_predictions)()
@@ -5,6 +5,8 @@ from omegaconf import DictConfig
 
 from slam_datagen.datasets.human_messages import (build_human_messages_dataset,
                                                   write_human_messages_dataset)
+from slam_datagen.datasets.settings import HumanMessagesSettings
+from slam_datagen.io.serialization import check_byte_compatible
 from slam_datagen.llm.message_generator import MessageGeneratorViaLlm
 from slam_datagen.utils.common import get_config_path
 
@@ -12,6 +14,11 @@ CONFIG_NAME = "config_generate_human_messages"
 
 
 def generate_human_messages(cfg: DictConfig) -> None:
+    # Invalid options fail here, before the LLM is set up
+    settings = HumanMessagesSettings.from_config(cfg)
+    if settings.sample_offset > 0:
+        # Appended lines must match the ones of the run they extend
+        check_byte_compatible(settings.output.serializer, "sample_offset")
     prompt_cfg = cfg.human_message_prompts
     model = hydra.utils.instantiate(cfg.llm)
     message_generator = MessageGeneratorViaLlm(
@@ -20,14 +27,22 @@ def generate_human_messages(cfg: DictConfig) -> None:
     )
 
     samples = build_human_messages_dataset(
-        cfg=cfg,
+        cfg=settings,
         prompt_cfg=prompt_cfg,
         message_generator=message_generator,
     )
 
+    output = settings.output
     output_path = write_human_messages_dataset(
         samples=samples,
         output_file=cfg.output_file,
+        serializer=output.serializer,
+        compression=output.compression,
+        compression_threads=output.compression_threads,
+        shard_records=output.shard_records,
+        shard_bytes=output.shard_bytes,
+        first_index=settings.sample_offset,
+        splits=output.split_ratios,
     )
     print(f"Dataset written to {output_path}")
 
@@ -1,44 +1,185 @@
 from __future__ import annotations
 
 import json
+import os
+import socket
 from collections import Counter
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
 
 import hydra
 from omegaconf import DictConfig
 
-from slam_datagen.datasets.merge_quality import (build_merge_quality_dataset,
+from slam_datagen.datasets.merge_quality import (DatasetSample,
+                                                 iter_merge_quality_dataset,
+                                                 serialize_sample,
                                                  write_merge_quality_dataset)
-from slam_datagen.personal_data import PersonalDataGenerator
+from slam_datagen.datasets.parallel import (generate_merge_quality_dataset_parallel,
+                                            merge_merge_quality_tasks,
+                                            plan_merge_quality_tasks,
+                                            run_merge_quality_worker)
+from slam_datagen.datasets.parquet import ParquetExporter, parquet_paths, tee_to_parquet
+from slam_datagen.datasets.settings import MergeQualitySettings
+from slam_datagen.datasets.stats import MergeQualityStats, stats_path
+from slam_datagen.io.compression import open_output
+from slam_datagen.io.serialization import check_byte_compatible
+from slam_datagen.io.writer import output_files
 from slam_datagen.utils.common import get_config_path
+from slam_datagen.utils.work_queue import WorkQueue
 
 CONFIG_NAME = "config_generate_merge_quality_dataset"
 
 
 def generate_merge_quality_dataset(cfg: DictConfig) -> None:
-    generator = PersonalDataGenerator(seed=cfg.random_seed)
-    samples = build_merge_quality_dataset(generator=generator, cfg=cfg)
+    distributed = cfg.get("distributed")
+    if distributed is not None and distributed.get("role") is not None:
+        _run_distributed_role(cfg, distributed)
+        return
 
-    output_path = write_merge_quality_dataset(
-        samples=samples, output_file=cfg.output_file
+    # Invalid options fail here, before any generation work
+    settings = _resolve_settings(cfg)
+    num_workers = int(cfg.get("num_workers", 1))
+    if num_workers > 1:
+        output_path = generate_merge_quality_dataset_parallel(
+            cfg=cfg,
+            num_workers=num_workers,
+            keep_shard_files=cfg.get("keep_shard_files", False),
+        )
+        print(f"Dataset written to {output_path}")
+        if settings.parquet_export:
+            _print_parquet_paths(cfg.output_file)
+        _print_preview(_read_preview(output_path, limit=cfg.preview_samples))
+        return
+
+    preview: list[DatasetSample] = []
+    samples = _capture_preview(
+        iter_merge_quality_dataset(
+            generator=settings.persona_generator(), cfg=settings
+        ),
+        preview=preview,
+        limit=cfg.preview_samples,
     )
+    stats = None
+    if settings.collect_stats:
+        stats = MergeQualityStats()
+        samples = stats.track(samples)
+    exporter = None
+    if settings.parquet_export:
+        exporter = ParquetExporter(
+            cfg.output_file,
+            row_group_size=settings.parquet_row_group_size,
+            first_index=settings.sample_offset,
+        )
+        samples = tee_to_parquet(samples, exporter)
+
+    output = settings.output
+    try:
+        output_path = write_merge_quality_dataset(
+            samples=samples,
+            output_file=cfg.output_file,
+            flush_every=settings.flush_every,
+            serializer=output.serializer,
+            compression=output.compression,
+            compression_threads=output.compression_threads,
+            shard_records=output.shard_records,
+            shard_bytes=output.shard_bytes,
+            first_index=settings.sample_offset,
+            splits=output.split_ratios,
+        )
+    finally:
+        if exporter is not None:
+            exporter.close()
     print(f"Dataset written to {output_path}")
+    if exporter is not None:
+        _print_parquet_paths(cfg.output_file)
+    if stats is not None:
+        print(f"Statistics written to {stats.write(stats_path(cfg.output_file))}")
+    _print_preview([serialize_sample(sample) for sample in preview])
+
+
+def _print_parquet_paths(output_file: str) -> None:
+    samples_path, _ = parquet_paths(output_file)
+    print(f"Parquet tables written to {samples_path.parent}")
+
+
+def _run_distributed_role(cfg: DictConfig, distributed: DictConfig) -> None:
+    queue = WorkQueue(
+        root=distributed.queue_dir,
+        stale_after=distributed.get("stale_after_seconds", 600),
+    )
+    role = distributed.role
+    if role == "plan":
+        num_tasks = int(distributed.get("num_tasks", 16))
+        _resolve_settings(cfg)
+        plan_merge_quality_tasks(cfg=cfg, queue=queue, num_tasks=num_tasks)
+        print(f"Planned {num_tasks} tasks in {queue.root}")
+    elif role == "work":
+        worker_id = distributed.get("worker_id") or (
+            f"{socket.gethostname()}-{os.getpid()}"
+        )
+        completed = run_merge_quality_worker(queue=queue, worker_id=worker_id)
+        print(f"Worker {worker_id} completed {completed} tasks")
+    elif role == "merge":
+        output_path = merge_merge_quality_tasks(
+            queue=queue, output_file=cfg.output_file
+        )
+        print(f"Dataset written to {output_path}")
+        if queue.job()["config"].get("parquet_export", False):
+            _print_parquet_paths(cfg.output_file)
+        _print_preview(_read_preview(output_path, limit=cfg.preview_samples))
+    else:
+        raise ValueError(f"Unsupported distributed role '{role}'")
+
 
-    preview_count = min(cfg.preview_samples, len(samples))
-    if preview_count:
-        print("Preview:")
-        for sample in samples[:preview_count]:
-            chunk_counts = Counter(chunk.format for chunk in sample.chunks)
-            print(
-                json.dumps(
-                    {
-                        "name": sample.provided_identifiers["name"],
-                        "ssn": sample.provided_identifiers["ssn"],
-                        "chunk_counts": dict(chunk_counts),
-                    },
-                    indent=2,
-                    ensure_ascii=False,
-                )
+def _resolve_settings(cfg: DictConfig) -> MergeQualitySettings:
+    settings = MergeQualitySettings.from_config(cfg)
+    if settings.sample_offset > 0:
+        # Appended lines must match the ones of the run they extend
+        check_byte_compatible(settings.output.serializer, "sample_offset")
+    return settings
+
+
+def _print_preview(samples: list[dict[str, Any]]) -> None:
+    if not samples:
+        return
+
+    print("Preview:")
+    for sample in samples:
+        chunk_counts = Counter(chunk["format"] for chunk in sample["chunks"])
+        print(
+            json.dumps(
+                {
+                    "name": sample["provided_identifiers"]["name"],
+                    "ssn": sample["provided_identifiers"]["ssn"],
+                    "chunk_counts": dict(chunk_counts),
+                },
+                indent=2,
+                ensure_ascii=False,
             )
+        )
+
+
+def _read_preview(output_path: Path, limit: int) -> list[dict[str, Any]]:
+    samples: list[dict[str, Any]] = []
+    for path in output_files(output_path):
+        with open_output(path) as handle:
+            for line in handle:
+                if len(samples) >= limit:
+                    return samples
+                samples.append(json.loads(line))
+    return samples
+
+
+def _capture_preview(
+    samples: Iterable[DatasetSample],
+    preview: list[DatasetSample],
+    limit: int,
+) -> Iterator[DatasetSample]:
+    for sample in samples:
+        if len(preview) < limit:
+            preview.append(sample)
+        yield sample
 
 
 if __name__ == "__main__":
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import hydra
+from omegaconf import DictConfig
+
+from slam_datagen.io.shuffle import DEFAULT_BUCKET_BYTES, shuffle_jsonl
+from slam_datagen.utils.common import get_config_path
+
+CONFIG_NAME = "config_shuffle_dataset"
+
+
+def shuffle_dataset(cfg: DictConfig) -> None:
+    output_path = shuffle_jsonl(
+        input_file=cfg.input_file,
+        output_file=cfg.output_file,
+        seed=cfg.random_seed,
+        bucket_bytes=cfg.get("bucket_bytes", DEFAULT_BUCKET_BYTES),
+        num_buckets=cfg.get("num_buckets"),
+        tmp_dir=cfg.get("tmp_dir"),
+        compression=cfg.get("output_compression", "none"),
+        threads=cfg.get("compression_threads", 4),
+        shard_records=cfg.get("output_shard_records"),
+        shard_bytes=cfg.get("output_shard_bytes"),
+    )
+    print(f"Shuffled dataset written to {output_path}")
+
+
+if __name__ == "__main__":
+    hydra.main(
+        config_path=str(get_config_path()),
+        config_name=CONFIG_NAME,
+        version_base="1.3",
+    )(shuffle_dataset)()
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import hydra
+from omegaconf import DictConfig
+
+from slam_datagen.datasets.validation import (DEFAULT_MAX_VIOLATIONS, DEFAULT_TASK_SIZE,
+                                              ValidationReport,
+                                              validate_merge_quality_dataset)
+from slam_datagen.utils.common import get_config_path
+
+CONFIG_NAME = "config_validate_merge_quality_dataset"
+
+
+def validate_dataset(cfg: DictConfig) -> ValidationReport:
+    report = validate_merge_quality_dataset(
+        cfg.input_file,
+        num_workers=cfg.get("num_workers", 1),
+        task_size=cfg.get("task_size", DEFAULT_TASK_SIZE),
+        max_violations=cfg.get("max_violations", DEFAULT_MAX_VIOLATIONS),
+    )
+    report_file = cfg.get("report_file")
+    if report_file:
+        report_path = Path(report_file)
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        with report_path.open("w", encoding="utf-8") as handle:
+            json.dump(report.to_dict(), handle, indent=2)
+        print(f"Validation report written to {report_path}")
+
+    print(
+        f"Validated {report.samples} samples: "
+        f"{report.violating_samples} with violations"
+    )
+    for check, count in sorted(report.counts.items()):
+        print(f"  {check}: {count}")
+    for violation in report.violations[: cfg.get("print_violations", 10)]:
+        location = (
+            "" if violation.chunk_index is None else f" chunk {violation.chunk_index}"
+        )
+        print(
+            f"  sample {violation.sample_index}{location}: "
+            f"{violation.check} ({violation.detail})"
+        )
+    if not report.ok and cfg.get("fail_on_violations", True):
+        raise SystemExit(1)
+    return report
+
+
+if __name__ == "__main__":
+    hydra.main(
+        config_path=str(get_config_path()),
+        config_name=CONFIG_NAME,
+        version_base="1.3",
+    )(validate_dataset)()
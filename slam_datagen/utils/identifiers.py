@@ -0,0 +1,155 @@
+"""Run-wide uniqueness of persona identifiers.
+
+``IdentifierRegistry`` remembers every identifier registered in a process as a
+64-bit hash, either in exact hash sets (sharded by hash so no single set grows
+to the size of the run) or in a Bloom filter, or both with the filter in front.
+A Bloom filter never misses a registered identifier; its false positives only
+make callers draw a replacement identifier they did not strictly need.
+
+Identifiers are also split into ``num_namespaces`` deterministic namespaces by
+hash, and a registry only accepts identifiers of its own ``namespace``. Giving
+every parallel shard its own namespace makes identifiers unique across shards
+without any communication between them.
+
+The namespace of a value is only known once it is drawn, so a registry keeps
+``1 / num_namespaces`` of the values offered to it and ``claim_drawn`` takes
+``num_namespaces`` draws per identifier on average: a run split into 32
+shards draws every target name and SSN about 32 times. Values cannot be
+drawn inside a namespace directly, because names have no structure to stride
+over. ``claim_drawn`` gives up with a ``ValueError`` after ``max_draws``
+draws instead of looping when the identifier space runs out.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Callable
+from hashlib import blake2b
+
+DEFAULT_HASH_SHARDS = 64
+DEFAULT_BLOOM_ERROR_RATE = 0.001
+# Draws allowed per claim and namespace before claim_drawn gives up
+_DRAWS_PER_NAMESPACE = 1000
+
+
+def identifier_hash(kind: str, value: str) -> int:
+    """Stable 64-bit hash of the identifier ``value`` of type ``kind``."""
+    digest = blake2b(f"{kind}\0{value}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class BloomFilter:
+    """Bloom filter over 64-bit hashes, sized for ``capacity`` items."""
+
+    def __init__(
+        self, capacity: int, error_rate: float = DEFAULT_BLOOM_ERROR_RATE
+    ) -> None:
+        if capacity <= 0:
+            raise ValueError("Bloom filter capacity must be positive")
+        if not 0 < error_rate < 1:
+            raise ValueError("Bloom filter error_rate must be in (0, 1)")
+        self.num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def add(self, key: int) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: int) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+    def _positions(self, key: int) -> list[int]:
+        # Double hashing over the two halves of the key
+        low = key & 0xFFFFFFFF
+        high = (key >> 32) | 1
+        return [(low + idx * high) % self.num_bits for idx in range(self.num_hashes)]
+
+
+class IdentifierRegistry:
+    """Set of the identifiers claimed in one namespace of a run."""
+
+    def __init__(
+        self,
+        namespace: int = 0,
+        num_namespaces: int = 1,
+        exact: bool = True,
+        bloom_capacity: int = 0,
+        bloom_error_rate: float = DEFAULT_BLOOM_ERROR_RATE,
+        num_shards: int = DEFAULT_HASH_SHARDS,
+    ) -> None:
+        if num_namespaces <= 0:
+            raise ValueError("num_namespaces must be positive")
+        if not 0 <= namespace < num_namespaces:
+            raise ValueError("namespace must be within [0, num_namespaces)")
+        if not exact and bloom_capacity <= 0:
+            raise ValueError("A registry without exact sets needs a Bloom filter")
+        if num_shards <= 0:
+            raise ValueError("num_shards must be positive")
+        self.namespace = namespace
+        self.num_namespaces = num_namespaces
+        self._bloom = (
+            BloomFilter(bloom_capacity, bloom_error_rate)
+            if bloom_capacity > 0
+            else None
+        )
+        self._shards: list[set[int]] | None = (
+            [set() for _ in range(num_shards)] if exact else None
+        )
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def owns(self, kind: str, value: str) -> bool:
+        """Whether ``value`` belongs to the namespace of this registry."""
+        return identifier_hash(kind, value) % self.num_namespaces == self.namespace
+
+    def __contains__(self, item: tuple[str, str]) -> bool:
+        return self._contains(identifier_hash(*item))
+
+    def claim(self, kind: str, value: str) -> bool:
+        """Register ``value`` if it is in this namespace and not registered yet.
+
+        Returns whether the identifier was claimed; on ``False`` the caller
+        must use another value.
+        """
+        key = identifier_hash(kind, value)
+        if key % self.num_namespaces != self.namespace or self._contains(key):
+            return False
+        if self._bloom is not None:
+            self._bloom.add(key)
+        if self._shards is not None:
+            self._shards[(key // self.num_namespaces) % len(self._shards)].add(key)
+        self._size += 1
+        return True
+
+    @property
+    def max_draws(self) -> int:
+        """Draws ``claim_drawn`` makes for one identifier before giving up."""
+        return _DRAWS_PER_NAMESPACE * self.num_namespaces
+
+    def claim_drawn(self, kind: str, value: str, draw: Callable[[], str]) -> str:
+        """Claim ``value``, or the first value returned by ``draw`` that can be
+        claimed; fails after ``max_draws`` draws."""
+        draws = 0
+        while not self.claim(kind, value):
+            draws += 1
+            if draws > self.max_draws:
+                raise ValueError(
+                    f"Could not draw a unique '{kind}' identifier in "
+                    f"{self.max_draws} draws (namespace {self.namespace} of "
+                    f"{self.num_namespaces}); the identifier space is exhausted"
+                )
+            value = draw()
+        return value
+
+    def _contains(self, key: int) -> bool:
+        if self._bloom is not None and key not in self._bloom:
+            return False
+        if self._shards is None:
+            return True
+        return key in self._shards[(key // self.num_namespaces) % len(self._shards)]
@@ -0,0 +1,12 @@
+from hashlib import blake2b
+
+
+def derive_seed(seed: int, *keys: int | str) -> int:
+    """Derive an independent 63-bit seed from ``seed`` and a sequence of keys.
+
+    The result only depends on its arguments, which makes it suitable for
+    seeding shards or individual samples without sharing RNG state.
+    """
+    material = ":".join(str(part) for part in (seed, *keys)).encode("utf-8")
+    digest = blake2b(material, digest_size=8).digest()
+    return int.from_bytes(digest, "little") >> 1
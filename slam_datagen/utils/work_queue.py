@@ -0,0 +1,245 @@
+"""Task queue on a shared filesystem, coordinated through atomic lock files.
+
+Layout of the queue directory::
+
+    job.json                  job description written by the coordinator
+    tasks/task-00000.json     one file per numbered task
+    locks/task-00000.lock     claim held by a worker (created with O_EXCL)
+    done/task-00000.json      completion record with the task result
+
+A claim is considered stale when its lock file has not been touched for
+``stale_after`` seconds; any worker may then take it over. Workers keep their
+claims alive through ``WorkQueue.heartbeat``. Every lock file holds a random
+owner token, also kept by the claimed ``Task``: after a takeover, the previous
+owner's heartbeats, completion and release leave the new claim alone.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+
+@dataclass
+class Task:
+    index: int
+    payload: dict[str, Any]
+    # Token of the claim that returned the task; None for unclaimed tasks
+    owner: str | None = None
+
+
+class WorkQueue:
+    def __init__(self, root: str | Path, stale_after: float = 600.0) -> None:
+        if stale_after <= 0:
+            raise ValueError("stale_after must be positive")
+        self.root = Path(root)
+        self.stale_after = stale_after
+        self._tasks_dir = self.root / "tasks"
+        self._locks_dir = self.root / "locks"
+        self._done_dir = self.root / "done"
+
+    def plan(self, job: dict[str, Any], payloads: list[dict[str, Any]]) -> None:
+        """Create the job and its tasks; re-planning the same job is a no-op."""
+        job_path = self.root / "job.json"
+        if job_path.exists():
+            if self.job() != job:
+                raise ValueError(f"A different job is already planned in {self.root}")
+            return
+
+        for directory in (self._tasks_dir, self._locks_dir, self._done_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+        for idx, payload in enumerate(payloads):
+            _write_json_atomic(self._task_path(idx), {"index": idx, "payload": payload})
+        # job.json is written last: its presence marks a fully planned queue
+        _write_json_atomic(job_path, job)
+
+    def job(self) -> dict[str, Any]:
+        return _read_json(self.root / "job.json")
+
+    def tasks(self) -> list[Task]:
+        tasks = []
+        for path in sorted(self._tasks_dir.glob("task-*.json")):
+            content = _read_json(path)
+            tasks.append(Task(index=content["index"], payload=content["payload"]))
+        return tasks
+
+    def claim(self, worker_id: str) -> Task | None:
+        """Claim the first unfinished task that is free or has a stale claim."""
+        for task in self.tasks():
+            if self._done_path(task.index).exists():
+                continue
+            task.owner = self._try_lock(task.index, worker_id)
+            if task.owner is not None:
+                if self._done_path(task.index).exists():
+                    self.release(task)
+                    continue
+                return task
+        return None
+
+    def heartbeat(self, task: Task) -> bool:
+        """Touch the claim on ``task``; False once it is released or taken over."""
+        try:
+            with self._lock_path(task.index).open("rb") as handle:
+                if task.owner is None or _lock_owner(handle.read()) != task.owner:
+                    return False
+                # Touch the file that was checked, even if it is renamed meanwhile
+                os.utime(handle.fileno())
+        except FileNotFoundError:
+            return False
+        return True
+
+    @contextmanager
+    def keep_alive(self, task: Task) -> Iterator[None]:
+        """Touch the task lock in a background thread while the block runs."""
+        stop = threading.Event()
+        interval = self.stale_after / 4
+
+        def _beat() -> None:
+            while not stop.wait(interval):
+                if not self.heartbeat(task):
+                    return
+
+        thread = threading.Thread(target=_beat, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def complete(self, task: Task, result: dict[str, Any]) -> bool:
+        """Record ``result`` and release the claim on ``task``.
+
+        Returns False without recording anything when the claim was taken over;
+        the task then belongs to its new owner.
+        """
+        if not self._owns(task):
+            return False
+        _write_json_atomic(self._done_path(task.index), result)
+        self.release(task)
+        return True
+
+    def release(self, task: Task) -> None:
+        """Remove the lock of ``task`` if it still holds this claim."""
+        if not self._owns(task):
+            return
+        lock_path = self._lock_path(task.index)
+        # Renaming is atomic: check the renamed lock, in case it was taken over
+        # between the ownership check and the rename
+        tombstone = lock_path.with_name(f"{lock_path.name}.release-{task.owner}")
+        try:
+            os.rename(lock_path, tombstone)
+        except FileNotFoundError:
+            return
+        if _lock_owner(tombstone.read_bytes()) != task.owner:
+            try:
+                os.link(tombstone, lock_path)
+            except FileExistsError:
+                pass
+        tombstone.unlink(missing_ok=True)
+
+    def results(self) -> dict[int, dict[str, Any]]:
+        return {
+            task.index: _read_json(self._done_path(task.index))
+            for task in self.tasks()
+            if self._done_path(task.index).exists()
+        }
+
+    def pending(self) -> list[int]:
+        return [
+            task.index
+            for task in self.tasks()
+            if not self._done_path(task.index).exists()
+        ]
+
+    def _owns(self, task: Task) -> bool:
+        try:
+            content = self._lock_path(task.index).read_bytes()
+        except FileNotFoundError:
+            return False
+        return task.owner is not None and _lock_owner(content) == task.owner
+
+    def _try_lock(self, index: int, worker_id: str) -> str | None:
+        """Owner token of a new claim on task ``index``, or None."""
+        lock_path = self._lock_path(index)
+        owner = self._create_lock(lock_path, worker_id)
+        if owner is not None:
+            return owner
+
+        try:
+            age = time.time() - lock_path.stat().st_mtime
+        except FileNotFoundError:
+            return self._create_lock(lock_path, worker_id)
+        if age <= self.stale_after:
+            return None
+
+        # Renaming is atomic, so only one worker recovers a given stale claim
+        tombstone = lock_path.with_name(f"{lock_path.name}.stale-{worker_id}")
+        try:
+            os.rename(lock_path, tombstone)
+        except FileNotFoundError:
+            return None
+        if time.time() - tombstone.stat().st_mtime <= self.stale_after:
+            # Another worker recovered the claim between our stat and rename:
+            # put its fresh lock back unless yet another one has been created
+            try:
+                os.link(tombstone, lock_path)
+            except FileExistsError:
+                pass
+            tombstone.unlink(missing_ok=True)
+            return None
+        tombstone.unlink(missing_ok=True)
+        return self._create_lock(lock_path, worker_id)
+
+    @staticmethod
+    def _create_lock(lock_path: Path, worker_id: str) -> str | None:
+        try:
+            descriptor = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return None
+        owner = uuid.uuid4().hex
+        with os.fdopen(descriptor, "w", encoding="utf-8") as handle:
+            handle.write(
+                json.dumps(
+                    {"worker_id": worker_id, "owner": owner, "claimed_at": time.time()}
+                )
+            )
+        return owner
+
+    def _task_path(self, index: int) -> Path:
+        return self._tasks_dir / f"task-{index:05d}.json"
+
+    def _lock_path(self, index: int) -> Path:
+        return self._locks_dir / f"task-{index:05d}.lock"
+
+    def _done_path(self, index: int) -> Path:
+        return self._done_dir / f"task-{index:05d}.json"
+
+
+def _lock_owner(content: bytes) -> str | None:
+    try:
+        return json.loads(content).get("owner")
+    except ValueError:
+        # Lock files are written right after being created
+        return None
+
+
+def _read_json(path: Path) -> dict[str, Any]:
+    with path.open(encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def _write_json_atomic(path: Path, content: dict[str, Any]) -> None:
+    tmp_path = path.with_name(f".{path.name}.{socket.gethostname()}.{os.getpid()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        json.dump(content, handle, indent=2)
+    os.replace(tmp_path, path)
@@ -0,0 +1,182 @@
+"""Memory-mapped banks of precomputed persona field values.
+
+A value bank directory holds, for every identifier and flattened attribute
+path, a pool of values drawn once by the Faker or columnar backend:
+
+* ``<path>.offsets.npy``: ``uint64`` start offset of every value in the blob,
+  followed by the blob size;
+* ``<path>.bin``: the UTF-8 encoded values, concatenated;
+* ``manifest.json``: bank size, fields and how the values were generated.
+
+Banks are opened read-only with ``mmap``, so every worker process of a run
+shares the same pages through the page cache. ``ValueBankSampler`` backs the
+``value_bank`` persona backend: it draws one random index per field and
+persona and decodes only the sampled values, without setting up Faker.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from slam_datagen.columnar import PersonalDataColumns
+from slam_datagen.personal_data import (ATTRIBUTE_PATHS, IDENTIFIER_FIELDS,
+                                        PersonalDataGenerator, produce_field)
+
+BANK_FIELDS: tuple[str, ...] = (*IDENTIFIER_FIELDS, *ATTRIBUTE_PATHS)
+BANK_BACKENDS: tuple[str, ...] = ("faker", "columnar")
+MANIFEST_NAME = "manifest.json"
+DEFAULT_BATCH_SIZE = 65536
+
+
+def _offsets_path(directory: Path, path: str) -> Path:
+    return directory / f"{path}.offsets.npy"
+
+
+def _blob_path(directory: Path, path: str) -> Path:
+    return directory / f"{path}.bin"
+
+
+def build_value_banks(
+    output_dir: str | Path,
+    size: int,
+    seed: int | None = None,
+    backend: str = "faker",
+    fields: Iterable[str] | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Path:
+    """Draw ``size`` values for every field and write them to ``output_dir``.
+
+    ``backend`` picks the generator the values come from; ``fields`` defaults
+    to every identifier and attribute path. Values are generated and written
+    in batches of ``batch_size``, so memory does not grow with ``size``.
+    Returns the manifest path.
+    """
+    if size <= 0:
+        raise ValueError("size must be positive")
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+    if backend not in BANK_BACKENDS:
+        raise ValueError(f"Unsupported value bank backend '{backend}'")
+    paths = tuple(fields) if fields is not None else BANK_FIELDS
+    for path in paths:
+        if path not in BANK_FIELDS:
+            raise ValueError(f"Unknown persona field '{path}'")
+
+    directory = Path(output_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    generator = PersonalDataGenerator(seed=seed, backend=backend)
+    blobs = {path: _blob_path(directory, path).open("wb") for path in paths}
+    lengths: dict[str, list[np.ndarray]] = {path: [] for path in paths}
+    try:
+        remaining = size
+        while remaining > 0:
+            count = min(batch_size, remaining)
+            remaining -= count
+            columns = (
+                generator.generate_columns(count) if backend == "columnar" else None
+            )
+            for path in paths:
+                if columns is not None:
+                    values = columns.column(path)
+                else:
+                    fake = generator.fake
+                    values = [produce_field(fake, path) for _ in range(count)]
+                encoded = [value.encode("utf-8") for value in values]
+                blobs[path].write(b"".join(encoded))
+                lengths[path].append(np.fromiter(map(len, encoded), dtype=np.uint64))
+    finally:
+        for blob in blobs.values():
+            blob.close()
+
+    for path in paths:
+        offsets = np.zeros(size + 1, dtype=np.uint64)
+        np.cumsum(np.concatenate(lengths[path]), out=offsets[1:])
+        np.save(_offsets_path(directory, path), offsets)
+
+    manifest = {
+        "size": size,
+        "seed": seed,
+        "backend": backend,
+        "fields": list(paths),
+    }
+    manifest_path = directory / MANIFEST_NAME
+    with manifest_path.open("w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2)
+    return manifest_path
+
+
+class ValueBank:
+    """Read-only pool of the values of one field."""
+
+    def __init__(self, directory: str | Path, path: str) -> None:
+        directory = Path(directory)
+        self.path = path
+        self._offsets = np.load(_offsets_path(directory, path), mmap_mode="r")
+        with _blob_path(directory, path).open("rb") as handle:
+            size = int(self._offsets[-1])
+            # Empty files cannot be memory-mapped
+            self._blob: Any = (
+                mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+            )
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return self._blob[int(start) : int(end)].decode("utf-8")
+
+    def take(self, indices: np.ndarray) -> list[str]:
+        blob = self._blob
+        starts = self._offsets[indices].tolist()
+        ends = self._offsets[indices + 1].tolist()
+        return [blob[start:end].decode("utf-8") for start, end in zip(starts, ends)]
+
+    def close(self) -> None:
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+
+
+def open_value_banks(directory: str | Path) -> dict[str, ValueBank]:
+    directory = Path(directory)
+    manifest_path = directory / MANIFEST_NAME
+    if not manifest_path.exists():
+        raise ValueError(f"No value bank manifest in {directory}")
+    with manifest_path.open(encoding="utf-8") as handle:
+        manifest = json.load(handle)
+    return {path: ValueBank(directory, path) for path in manifest["fields"]}
+
+
+class ValueBankSampler:
+    """Draws persona columns by sampling indices into value banks."""
+
+    def __init__(self, directory: str | Path, seed: int | None = None) -> None:
+        self._banks = open_value_banks(directory)
+        missing = [path for path in BANK_FIELDS if path not in self._banks]
+        if missing:
+            raise ValueError(
+                f"Value bank in {directory} lacks fields: {', '.join(missing)}"
+            )
+        self._rng = np.random.default_rng(seed)
+
+    def reseed(self, seed: int | None) -> None:
+        self._rng = np.random.default_rng(seed)
+
+    def sample_field(self, path: str, n: int) -> list[str]:
+        bank = self._banks[path]
+        return bank.take(self._rng.integers(0, len(bank), size=n))
+
+    def sample(self, n: int) -> PersonalDataColumns:
+        if n < 0:
+            raise ValueError("n must be non-negative")
+        columns = {path: self.sample_field(path, n) for path in BANK_FIELDS}
+        return PersonalDataColumns(
+            identifiers={name: columns[name] for name in IDENTIFIER_FIELDS},
+            attributes={path: columns[path] for path in ATTRIBUTE_PATHS},
+        )
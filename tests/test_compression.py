@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import gzip
+from pathlib import Path
+
+import pytest
+from omegaconf import OmegaConf
+
+from slam_datagen.io import BlockWriter, open_output, read_block_index
+from slam_datagen.io.compression import block_decompressor, concatenate_outputs
+from slam_datagen.scripts.generate_merge_quality_dataset import \
+    generate_merge_quality_dataset
+
+LINES = [f'{{"index": {idx}, "text": "{"x" * idx}"}}\n'.encode() for idx in range(40)]
+
+
+def _write(path: Path, compression: str, lines: list[bytes] = LINES) -> Path:
+    with BlockWriter(path, block_size=64, compression=compression, threads=3) as writer:
+        for line in lines:
+            writer.write(line)
+            writer.flush()
+    return writer.path
+
+
+def test_gzip_blocks_decompress_to_the_uncompressed_output(tmp_path: Path) -> None:
+    path = _write(tmp_path / "out.jsonl", "gzip")
+
+    assert path.name == "out.jsonl.gz"
+    assert gzip.decompress(path.read_bytes()) == b"".join(LINES)
+    with open_output(path) as handle:
+        assert list(handle) == LINES
+    # Blocks are reproducible byte for byte
+    assert _write(tmp_path / "again.jsonl", "gzip").read_bytes() == path.read_bytes()
+
+
+def test_block_index_seeks_to_a_single_block(tmp_path: Path) -> None:
+    path = _write(tmp_path / "out.jsonl", "gzip")
+    index = read_block_index(path)
+
+    assert index is not None and len(index["blocks"]) > 1
+    assert sum(block["records"] for block in index["blocks"]) == len(LINES)
+    decompress = block_decompressor(index["compression"])
+    data = path.read_bytes()
+    for block in index["blocks"]:
+        raw = decompress(data[block["offset"] : block["offset"] + block["length"]])
+        first = block["first_record"]
+        assert raw.splitlines(keepends=True) == LINES[first : first + block["records"]]
+
+
+def test_zstd_output_reads_across_frames(tmp_path: Path) -> None:
+    pytest.importorskip("zstandard")
+    path = _write(tmp_path / "out.jsonl", "zstd")
+
+    assert path.name == "out.jsonl.zst"
+    with open_output(path) as handle:
+        assert list(handle) == LINES
+
+
+def test_concatenated_outputs_merge_block_indexes(tmp_path: Path) -> None:
+    parts = [
+        _write(tmp_path / "a.jsonl", "gzip", LINES[:15]),
+        _write(tmp_path / "b.jsonl", "gzip", LINES[15:]),
+    ]
+    merged = concatenate_outputs(parts, tmp_path / "merged.jsonl.gz")
+    index = read_block_index(merged)
+
+    assert index is not None
+    data = merged.read_bytes()
+    decompress = block_decompressor("gzip")
+    records = []
+    for block in index["blocks"]:
+        raw = decompress(data[block["offset"] : block["offset"] + block["length"]])
+        assert len(raw) == block["raw_length"]
+        records.extend(raw.splitlines(keepends=True))
+    assert records == LINES
+    assert index["blocks"][-1]["first_record"] + index["blocks"][-1]["records"] == 40
+
+
+def test_unknown_compression_is_rejected(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="Unsupported output compression"):
+        BlockWriter(tmp_path / "out.jsonl", compression="bz2")
+
+
+def test_parallel_compressed_output_matches_uncompressed(tmp_path: Path) -> None:
+    cfg = OmegaConf.create(
+        {
+            "random_seed": 4,
+            "dataset_size": 6,
+            "chunk_formats": ["json", "xml"],
+            "distractor_chunks_per_format": 1,
+            "ground_truth_field_range": [2, 3],
+            "num_workers": 2,
+            "preview_samples": 1,
+            "output_file": str(tmp_path / "plain.jsonl"),
+        }
+    )
+    generate_merge_quality_dataset(cfg)
+    cfg.output_file = str(tmp_path / "compressed.jsonl")
+    cfg.output_compression = "gzip"
+    generate_merge_quality_dataset(cfg)
+
+    compressed = tmp_path / "compressed.jsonl.gz"
+    assert (
+        gzip.decompress(compressed.read_bytes())
+        == (tmp_path / "plain.jsonl").read_bytes()
+    )
+    index = read_block_index(compressed)
+    assert index is not None
+    assert sum(block["records"] for block in index["blocks"]) == cfg.dataset_size
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+import os
+import pickle
+from pathlib import Path
+
+import pytest
+from omegaconf import OmegaConf
+
+from slam_datagen.datasets import (HumanMessagesDataset, MergeQualityDataset,
+                                   build_merge_quality_dataset,
+                                   write_human_messages_dataset,
+                                   write_merge_quality_dataset)
+from slam_datagen.datasets.reader import offset_index_path
+from slam_datagen.personal_data import PersonalDataGenerator
+
+MESSAGES = [{"text": f"сообщение {idx}", "type": "synthetic"} for idx in range(23)]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{}, {"compression": "gzip"}, {"shard_records": 5}, {"shard_bytes": 200}],
+)
+def test_human_messages_dataset_reads_records_by_index(
+    tmp_path: Path, options: dict
+) -> None:
+    path = write_human_messages_dataset(
+        MESSAGES, tmp_path / "messages.jsonl", **options
+    )
+
+    with HumanMessagesDataset(path) as dataset:
+        assert len(dataset) == len(MESSAGES)
+        assert dataset[0] == MESSAGES[0]
+        assert dataset[-1] == MESSAGES[-1]
+        assert list(dataset) == MESSAGES
+        view = dataset[3:20:4]
+        assert len(view) == 5
+        assert list(view) == MESSAGES[3:20:4]
+        assert view[-1] == MESSAGES[19]
+        with pytest.raises(IndexError):
+            dataset[len(MESSAGES)]
+
+
+def test_offset_index_is_reused_and_rebuilt_when_stale(tmp_path: Path) -> None:
+    path = write_human_messages_dataset(MESSAGES[:3], tmp_path / "messages.jsonl")
+    assert len(HumanMessagesDataset(path)) == 3
+    assert offset_index_path(path).exists()
+
+    write_human_messages_dataset(MESSAGES, path)
+
+    dataset = HumanMessagesDataset(path)
+    assert len(dataset) == len(MESSAGES)
+    assert pickle.loads(pickle.dumps(dataset[5:]))[0] == MESSAGES[5]
+
+
+def test_offset_index_is_rebuilt_when_a_file_of_the_same_size_changes(
+    tmp_path: Path,
+) -> None:
+    path = tmp_path / "lines.jsonl"
+    path.write_text('{"a": 1}\n{"a": 2}\n')
+    assert len(HumanMessagesDataset(path)) == 2
+
+    # Same size, different line boundaries
+    path.write_text('{"a":1}\n{"a": 22}\n')
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    with HumanMessagesDataset(path) as dataset:
+        assert list(dataset) == [{"a": 1}, {"a": 22}]
+
+
+def test_merge_quality_dataset_decodes_samples(tmp_path: Path) -> None:
+    cfg = OmegaConf.create(
+        {
+            "random_seed": 2,
+            "dataset_size": 4,
+            "chunk_formats": ["json", "xml"],
+            "distractor_chunks_per_format": 1,
+            "ground_truth_field_range": [2, 3],
+        }
+    )
+    samples = build_merge_quality_dataset(PersonalDataGenerator(seed=2), cfg)
+    path = write_merge_quality_dataset(samples, tmp_path / "merge_quality.jsonl")
+
+    dataset = MergeQualityDataset(path)
+
+    assert len(dataset) == len(samples)
+    assert dataset[2] == samples[2]
+    assert json.loads(dataset.raw(1))["provided_identifiers"] == (
+        samples[1].provided_identifiers
+    )
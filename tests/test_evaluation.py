@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from omegaconf import OmegaConf
+
+from slam_datagen.datasets import (build_merge_quality_dataset,
+                                   write_merge_quality_dataset)
+from slam_datagen.datasets.evaluation import evaluate_predictions
+from slam_datagen.personal_data import PersonalDataGenerator
+from slam_datagen.schema import PERSONA_SCHEMA
+from slam_datagen.scripts.evaluate_merge_quality_predictions import \
+    evaluate_merge_quality_predictions
+
+CONFIG = {
+    "random_seed": 9,
+    "dataset_size": 10,
+    "chunk_formats": ["json", "xml", "markdown"],
+    "distractor_chunks_per_format": 1,
+    "markdown_distractor_rows": 1,
+    "markdown_chunks_per_person": 1,
+    "ground_truth_field_range": [2, 6],
+}
+
+
+@pytest.fixture(name="dataset")
+def fixture_dataset(tmp_path: Path) -> tuple[Path, list]:
+    samples = build_merge_quality_dataset(
+        PersonalDataGenerator(seed=9), OmegaConf.create(CONFIG)
+    )
+    return write_merge_quality_dataset(samples, tmp_path / "dataset.jsonl"), samples
+
+
+def _write_predictions(path: Path, predictions: list[dict]) -> Path:
+    path.write_text("".join(json.dumps(line) + "\n" for line in predictions))
+    return path
+
+
+def test_perfect_predictions_score_one(tmp_path: Path, dataset) -> None:
+    output, samples = dataset
+    predictions = _write_predictions(
+        tmp_path / "predictions.jsonl",
+        [
+            {
+                "unique_identifiers": sample.ground_truth.unique_identifiers,
+                "attributes": sample.ground_truth.attributes,
+            }
+            for sample in samples
+        ],
+    )
+
+    report = evaluate_predictions(output, predictions, num_workers=2, task_size=3)
+    scores = report.to_dict()
+
+    assert scores["overall"]["f1"] == 1.0
+    assert scores["overall"]["fp"] == scores["overall"]["fn"] == 0
+    assert set(scores["by_format"]) <= {"json", "xml", "markdown"}
+    # Fields are attributed to the identifier of the chunk or row holding them
+    assert set(scores["by_identifier_type"]) == {"name", "ssn"}
+    assert scores["unparseable_chunks"] == 0
+    assert sum(s["tp"] for s in scores["by_format"].values()) == sum(
+        len(PERSONA_SCHEMA.flatten(sample.ground_truth.attributes))
+        for sample in samples
+    )
+
+
+def test_identifier_matching_counts_errors(tmp_path: Path, dataset) -> None:
+    output, samples = dataset
+    lines = []
+    for sample in reversed(samples[1:]):
+        attributes = dict(PERSONA_SCHEMA.flatten(sample.ground_truth.attributes))
+        wrong = next(iter(attributes))
+        attributes[wrong] = "wrong"
+        attributes["work__company"] = attributes.get("work__company", "ACME")
+        lines.append(
+            {
+                "unique_identifiers": {
+                    "ssn": sample.ground_truth.unique_identifiers["ssn"]
+                },
+                "attributes": attributes,
+            }
+        )
+    lines.append({"unique_identifiers": {"ssn": "000-00-0000"}, "attributes": {}})
+    predictions = _write_predictions(tmp_path / "predictions.jsonl", lines)
+
+    scores = evaluate_predictions(output, predictions, match_by="identifier").to_dict()
+
+    expected = [
+        PERSONA_SCHEMA.flatten(sample.ground_truth.attributes) for sample in samples
+    ]
+    total = sum(len(fields) for fields in expected)
+    extra = sum("work__company" not in fields for fields in expected[1:])
+    assert scores["missing_predictions"] == 1
+    assert scores["unmatched_predictions"] == 1
+    assert scores["overall"]["tp"] == total - len(expected[0]) - (len(samples) - 1)
+    assert scores["overall"]["fn"] == len(expected[0]) + len(samples) - 1
+    assert scores["overall"]["fp"] == len(samples) - 1 + extra
+
+
+def test_prediction_matched_across_slices_counts_once(tmp_path: Path, dataset) -> None:
+    output, samples = dataset
+    first, sixth = (samples[idx].ground_truth.unique_identifiers for idx in (0, 5))
+    predictions = _write_predictions(
+        tmp_path / "predictions.jsonl",
+        [
+            # Matches sample 0 by SSN and sample 5, in another slice, by name
+            {"unique_identifiers": {"ssn": first["ssn"], "name": sixth["name"]}},
+            {"unique_identifiers": {"ssn": "000-00-0000"}},
+        ],
+    )
+
+    scores = evaluate_predictions(
+        output, predictions, match_by="identifier", num_workers=2, task_size=3
+    ).to_dict()
+
+    assert scores["missing_predictions"] == len(samples) - 2
+    assert scores["unmatched_predictions"] == 1
+
+
+def test_evaluation_script_writes_report(tmp_path: Path, dataset) -> None:
+    output, samples = dataset
+    predictions = _write_predictions(
+        tmp_path / "predictions.jsonl",
+        [{"attributes": {}} for _ in samples[:5]],
+    )
+    report_file = tmp_path / "report.json"
+    cfg = OmegaConf.create(
+        {
+            "dataset_file": str(output),
+            "predictions_file": str(predictions),
+            "report_file": str(report_file),
+        }
+    )
+
+    evaluate_merge_quality_predictions(cfg)
+
+    report = json.loads(report_file.read_text())
+    assert report["samples"] == len(samples)
+    assert report["missing_predictions"] == len(samples) - 5
+    assert report["overall"]["recall"] == 0.0
+    assert set(report["by_sparsity"]) <= {"0-2", "3-4", "5-8"}
+
+
+def test_unparseable_target_chunks_are_counted(tmp_path: Path, dataset) -> None:
+    output, samples = dataset
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    broken = next(
+        chunk
+        for chunk in lines[0]["chunks"]
+        if chunk["format"] == "xml" and chunk["owner_id"] != "distractor"
+    )
+    broken["content"] = "<person><name>"
+    output.write_text("".join(json.dumps(line) + "\n" for line in lines))
+    predictions = _write_predictions(
+        tmp_path / "predictions.jsonl",
+        [{"attributes": sample.ground_truth.attributes} for sample in samples],
+    )
+
+    scores = evaluate_predictions(output, predictions).to_dict()
+
+    assert scores["unparseable_chunks"] == 1
+    assert scores["overall"]["f1"] == 1.0
@@ -5,6 +5,7 @@ import string
 from collections import Counter
 from unittest.mock import MagicMock, patch
 
+import pytest
 from omegaconf import OmegaConf
 
 from slam_datagen.datasets.human_messages import build_human_messages_dataset
@@ -104,3 +105,67 @@ def test_build_human_messages_dataset_batches_synthetic_messages() -> None:
             base, instruction = prompt, ""
         assert base in base_prompts
         assert instruction == expected_instruction
+
+
+def test_per_sample_seeding_regenerates_index_ranges() -> None:
+    cfg = OmegaConf.create(
+        {
+            "dataset_size": 20,
+            "random_fraction": 0.5,
+            "random_length_range": [5, 8],
+            "synthetic_batch_size": 4,
+            "random_seed": 3,
+            "seeding": "per_sample",
+        }
+    )
+    prompt_cfg = OmegaConf.create(
+        {"user_prompts_for_generation": ["First prompt.", "Second prompt."]}
+    )
+    message_generator = MagicMock()
+    message_generator.generate_many.side_effect = lambda prompt, size: [
+        f"{prompt} #{idx}" for idx in range(size)
+    ]
+
+    full = build_human_messages_dataset(cfg, prompt_cfg, message_generator)
+
+    tail_cfg = cfg.copy()
+    tail_cfg.sample_offset = 12
+    tail_cfg.dataset_size = 8
+    tail = build_human_messages_dataset(tail_cfg, prompt_cfg, message_generator)
+
+    assert len(full) == cfg.dataset_size
+    assert {sample["type"] for sample in full} == {"random", "synthetic"}
+    for sample, expected in zip(tail, full[12:]):
+        assert sample["type"] == expected["type"]
+        if sample["type"] == "random":
+            assert sample == expected
+        else:
+            assert sample["text"].split(" #")[0] == expected["text"].split(" #")[0]
+    assert all(
+        call.args[1] <= cfg.synthetic_batch_size
+        for call in message_generator.generate_many.call_args_list
+    )
+
+
+def test_invalid_settings_fail_before_generation() -> None:
+    cfg = OmegaConf.create(
+        {
+            "random_seed": 1,
+            "dataset_size": 4,
+            "random_fraction": 1.5,
+            "random_length_range": [3, 5],
+            "synthetic_batch_size": 2,
+        }
+    )
+    prompt_cfg = OmegaConf.create({"user_prompts_for_generation": ["Say hi."]})
+    message_generator = MagicMock()
+
+    with pytest.raises(ValueError, match="random_fraction"):
+        build_human_messages_dataset(cfg, prompt_cfg, message_generator)
+    message_generator.generate_many.assert_not_called()
+
+    cfg.random_fraction = 0.5
+    cfg.output_compression = "lz4"
+    with pytest.raises(ValueError, match="compression"):
+        build_human_messages_dataset(cfg, prompt_cfg, message_generator)
+    message_generator.generate_many.assert_not_called()
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from omegaconf import OmegaConf
+
+from slam_datagen.scripts.generate_merge_quality_dataset import \
+    generate_merge_quality_dataset
+
+
+def test_generate_merge_quality_dataset_streams_to_output(
+    tmp_path: Path,
+    capsys,
+) -> None:
+    output_file = tmp_path / "merge_quality.jsonl"
+    cfg = OmegaConf.create(
+        {
+            "random_seed": 1,
+            "dataset_size": 5,
+            "chunk_formats": ["json", "markdown"],
+            "distractor_chunks_per_format": 1,
+            "markdown_distractor_rows": 1,
+            "markdown_chunks_per_person": 1,
+            "markdown_target_row_probability": 0.5,
+            "ground_truth_field_range": [3, 4],
+            "target_batch_size": 2,
+            "output_file": str(output_file),
+            "flush_every": 2,
+            "preview_samples": 2,
+        }
+    )
+
+    generate_merge_quality_dataset(cfg)
+
+    lines = output_file.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == cfg.dataset_size
+    first = json.loads(lines[0])
+    assert set(first) == {"ground_truth", "provided_identifiers", "chunks"}
+
+    stdout = capsys.readouterr().out
+    assert stdout.count('"chunk_counts"') == cfg.preview_samples
+    assert first["provided_identifiers"]["ssn"] in stdout
+
+
+@pytest.mark.parametrize(
+    ("option", "message"),
+    [
+        ({"persona_backend": "fakr"}, "persona backend"),
+        ({"serializer": "ujson"}, "serializer"),
+        ({"output_compression": "lz4"}, "compression"),
+        ({"output_shard_records": 0}, "output_shard_records"),
+        ({"splits": {"train": 0.5, "test": 0.4}}, "sum to 1"),
+        ({"persona_backend": "value_bank"}, "value_bank_dir"),
+        ({"persona_reference_date": "2020-01-01"}, "columnar backend"),
+        (
+            {"persona_backend": "columnar", "persona_reference_date": "01/02/2020"},
+            "ISO date",
+        ),
+        (
+            {"seeding": "per_sample", "sample_offset": 4, "serializer": "orjson"},
+            "byte-compatible",
+        ),
+    ],
+)
+def test_invalid_output_options_fail_before_generation(
+    tmp_path: Path, option: dict, message: str
+) -> None:
+    output_file = tmp_path / "merge_quality.jsonl"
+    cfg = OmegaConf.create(
+        {
+            "random_seed": 1,
+            "dataset_size": 2,
+            "chunk_formats": ["json"],
+            "distractor_chunks_per_format": 1,
+            "output_file": str(output_file),
+            "preview_samples": 0,
+            **option,
+        }
+    )
+
+    with pytest.raises(ValueError, match=message):
+        generate_merge_quality_dataset(cfg)
+    assert not output_file.exists()
+
+
+def test_parallel_generation_is_reproducible(tmp_path: Path) -> None:
+    cfg = OmegaConf.create(
+        {
+            "random_seed": 3,
+            "dataset_size": 7,
+            "chunk_formats": ["json", "xml"],
+            "distractor_chunks_per_format": 1,
+            "ground_truth_field_range": [2, 3],
+            "num_workers": 3,
+            "preview_samples": 0,
+        }
+    )
+
+    outputs = []
+    for run in range(2):
+        cfg.output_file = str(tmp_path / f"run{run}" / "merge_quality.jsonl")
+        generate_merge_quality_dataset(cfg)
+        outputs.append(Path(cfg.output_file).read_bytes())
+
+    assert outputs[0] == outputs[1]
+    assert len(outputs[0].splitlines()) == cfg.dataset_size
+    assert sorted(p.name for p in (tmp_path / "run0").iterdir()) == [
+        "merge_quality.jsonl"
+    ]
+
+
+def test_per_sample_output_does_not_depend_on_num_workers(tmp_path: Path) -> None:
+    cfg = OmegaConf.create(
+        {
+            "random_seed": 8,
+            "dataset_size": 5,
+            "chunk_formats": ["json"],
+            "distractor_chunks_per_format": 1,
+            "ground_truth_field_range": [2, 3],
+            "seeding": "per_sample",
+            "preview_samples": 0,
+        }
+    )
+
+    outputs = []
+    for num_workers in (1, 2):
+        cfg.num_workers = num_workers
+        cfg.output_file = str(tmp_path / f"workers{num_workers}.jsonl")
+        generate_merge_quality_dataset(cfg)
+        outputs.append(Path(cfg.output_file).read_bytes())
+
+    assert outputs[0] == outputs[1]
+
+
+def test_distributed_roles_match_parallel_generation(tmp_path: Path) -> None:
+    cfg = OmegaConf.create(
+        {
+            "random_seed": 5,
+            "dataset_size": 5,
+            "chunk_formats": ["json", "markdown"],
+            "distractor_chunks_per_format": 1,
+            "markdown_distractor_rows": 1,
+            "markdown_chunks_per_person": 1,
+            "markdown_target_row_probability": 0.5,
+            "ground_truth_field_range": [2, 3],
+            "num_workers": 2,
+            "preview_samples": 0,
+            "output_file": str(tmp_path / "parallel.jsonl"),
+        }
+    )
+    generate_merge_quality_dataset(cfg)
+
+    cfg.num_workers = 1
+    cfg.output_file = str(tmp_path / "distributed.jsonl")
+    cfg.distributed = {"queue_dir": str(tmp_path / "queue"), "num_tasks": 2}
+    for role, worker_id in (
+        ("plan", None),
+        ("work", "a"),
+        ("work", "b"),
+        ("merge", None),
+    ):
+        cfg.distributed.role = role
+        cfg.distributed.worker_id = worker_id
+        generate_merge_quality_dataset(cfg)
+
+    output = Path(cfg.output_file).read_bytes()
+    assert output == (tmp_path / "parallel.jsonl").read_bytes()
+    manifest = json.loads((tmp_path / "distributed.manifest.json").read_text())
+    assert manifest["records"] == cfg.dataset_size
+    assert [shard["sample_range"] for shard in manifest["shards"]] == [[0, 3], [3, 5]]
+
+
+def test_sharded_output_matches_single_file(tmp_path: Path) -> None:
+    cfg = OmegaConf.create(
+        {
+            "random_seed": 6,
+            "dataset_size": 7,
+            "chunk_formats": ["json"],
+            "distractor_chunks_per_format": 1,
+            "ground_truth_field_range": [2, 3],
+            "preview_samples": 1,
+            "output_file": str(tmp_path / "single.jsonl"),
+        }
+    )
+    generate_merge_quality_dataset(cfg)
+    expected = (tmp_path / "single.jsonl").read_bytes()
+
+    cfg.output_shard_records = 3
+    for num_workers in (1, 2):
+        cfg.num_workers = num_workers
+        cfg.output_file = str(tmp_path / f"workers{num_workers}" / "sharded.jsonl")
+        generate_merge_quality_dataset(cfg)
+        manifest = json.loads(
+            (tmp_path / f"workers{num_workers}" / "sharded.manifest.json").read_text()
+        )
+        assert [shard["sample_range"] for shard in manifest["shards"]] == [
+            [0, 3],
+            [3, 6],
+            [6, 7],
+        ]
+        shards = b"".join(
+            (tmp_path / f"workers{num_workers}" / shard["file"]).read_bytes()
+            for shard in manifest["shards"]
+        )
+        if num_workers == 1:
+            assert shards == expected
+        else:
+            assert len(shards.splitlines()) == cfg.dataset_size
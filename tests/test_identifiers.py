@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import pytest
+from omegaconf import OmegaConf
+
+from slam_datagen.datasets import build_merge_quality_dataset
+from slam_datagen.datasets.parallel import ShardSpec, shard_config
+from slam_datagen.personal_data import PersonalData, PersonalDataGenerator
+from slam_datagen.utils.identifiers import (BloomFilter, IdentifierRegistry,
+                                            identifier_hash)
+
+CONFIG = {
+    "random_seed": 3,
+    "dataset_size": 12,
+    "chunk_formats": ["json", "xml", "markdown"],
+    "distractor_chunks_per_format": 2,
+    "markdown_distractor_rows": 2,
+    "ground_truth_field_range": [2, 4],
+    "unique_identifiers": True,
+}
+
+
+class _CollidingGenerator(PersonalDataGenerator):
+    """Gives every other persona the same name and SSN."""
+
+    def __init__(self, seed: int) -> None:
+        super().__init__(seed=seed)
+        self.generated = 0
+
+    def generate(self, n: int) -> list[PersonalData]:
+        records = super().generate(n)
+        for record in records:
+            if self.generated % 2 == 0:
+                record.unique_identifiers.update(name="Jane Doe", ssn="123-45-6789")
+            self.generated += 1
+        return records
+
+
+def test_bloom_filter_has_no_false_negatives() -> None:
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [identifier_hash("ssn", str(idx)) for idx in range(1000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    others = [identifier_hash("ssn", f"other-{idx}") for idx in range(2000)]
+    assert sum(key in bloom for key in others) < 100
+
+
+def test_registry_claims_once_within_its_namespace() -> None:
+    registries = [
+        IdentifierRegistry(namespace=idx, num_namespaces=3) for idx in range(3)
+    ]
+    bloom_only = IdentifierRegistry(exact=False, bloom_capacity=100)
+
+    values = [f"Person {idx}" for idx in range(30)]
+    for value in values:
+        owners = [registry.claim("name", value) for registry in registries]
+        assert owners.count(True) == 1
+        assert not any(registry.claim("name", value) for registry in registries)
+        assert bloom_only.claim("name", value)
+        assert ("name", value) in bloom_only
+    assert sum(len(registry) for registry in registries) == len(values)
+
+
+def test_claim_drawn_redraws_then_gives_up() -> None:
+    registry = IdentifierRegistry(namespace=1, num_namespaces=2)
+    values = iter(f"Person {idx}" for idx in range(100))
+
+    value = registry.claim_drawn("name", "Person x", lambda: next(values))
+    assert ("name", value) in registry
+    assert registry.owns("name", value)
+
+    with pytest.raises(ValueError, match="namespace 1 of 2"):
+        registry.claim_drawn("name", value, lambda: value)
+
+
+def test_unique_identifiers_redraws_target_and_distractor_collisions() -> None:
+    samples = build_merge_quality_dataset(
+        _CollidingGenerator(seed=3), OmegaConf.create(CONFIG)
+    )
+
+    names = [sample.provided_identifiers["name"] for sample in samples]
+    ssns = [sample.provided_identifiers["ssn"] for sample in samples]
+    assert len(set(names)) == len(set(ssns)) == len(samples)
+    for sample in samples:
+        assert sample.ground_truth.unique_identifiers == sample.provided_identifiers
+        for chunk in sample.chunks:
+            if chunk.owner_id == "distractor":
+                assert sample.provided_identifiers["ssn"] not in chunk.content
+                assert sample.provided_identifiers["name"] not in chunk.content
+
+
+def test_parallel_shards_get_disjoint_namespaces() -> None:
+    cfg = OmegaConf.create(
+        {**CONFIG, "identifier_namespace": 1, "identifier_namespaces": 2}
+    )
+    shards = [
+        shard_config(cfg, ShardSpec(index, 3, 4 * index, 4, output_file=None))
+        for index in range(3)
+    ]
+
+    assert [shard.identifier_namespace for shard in shards] == [3, 4, 5]
+    assert {shard.identifier_namespaces for shard in shards} == {6}
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import slam_datagen
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+# Modules that are slow to import and only needed by some code paths
+HEAVY_MODULES = ("pydantic_ai", "faker", "pyarrow")
+
+
+def _imported_modules(statement: str) -> dict[str, int]:
+    """Cumulative import time in microseconds of every module ``statement`` loads."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=REPO_ROOT,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import slam_datagen",
+        "import slam_datagen.datasets",
+        "from slam_datagen.datasets.merge_quality import iter_merge_quality_dataset",
+        "from slam_datagen.personal_data import PersonalDataGenerator",
+    ],
+)
+def test_import_does_not_load_heavy_modules(statement: str) -> None:
+    modules = _imported_modules(statement)
+    assert "slam_datagen" in modules
+    for name in HEAVY_MODULES:
+        assert name not in modules, f"{statement!r} imports {name}"
+
+
+def test_lazy_exports_resolve() -> None:
+    statement = """
+import sys
+import slam_datagen
+from slam_datagen.datasets import MergeQualitySettings
+assert slam_datagen.build_merge_quality_dataset.__module__ == "slam_datagen.datasets.merge_quality"
+assert "build_human_messages_dataset" in dir(slam_datagen)
+assert "slam_datagen.datasets.human_messages" not in sys.modules
+assert "pydantic_ai" not in sys.modules
+"""
+    subprocess.run([sys.executable, "-c", statement], check=True, cwd=REPO_ROOT)
+
+    with pytest.raises(AttributeError):
+        slam_datagen.unknown_name  # pylint: disable=pointless-statement
@@ -1,19 +1,36 @@
 from __future__ import annotations
 
 import json
+import random
 import re
 import xml.etree.ElementTree as ET
 from typing import Any
 
+import pytest
 from omegaconf import OmegaConf
 
 from slam_datagen.datasets.merge_quality import (
     Chunk,
+    CompactSample,
+    HardNegativeDistractors,
+    PooledPersona,
     _IDENTIFIER_TYPES,
     _flatten_attributes,
     build_merge_quality_dataset,
+    iter_merge_quality_dataset,
 )
-from slam_datagen.personal_data import PersonalDataGenerator
+from slam_datagen.datasets.settings import MergeQualitySettings
+from slam_datagen.personal_data import PersonalData, PersonalDataGenerator
+
+
+class _CountingGenerator(PersonalDataGenerator):
+    def __init__(self, seed: int) -> None:
+        super().__init__(seed=seed)
+        self.generated = 0
+
+    def generate(self, n: int) -> list[PersonalData]:
+        self.generated += n
+        return super().generate(n)
 
 
 def test_markdown_chunks_include_unique_identifier() -> None:
@@ -91,6 +108,226 @@ def test_chunks_partition_ground_truth_attributes() -> None:
         assert chunk_attributes == expected_attributes
 
 
+def test_distractor_pool_bounds_persona_generation() -> None:
+    cfg = OmegaConf.create(
+        {
+            "random_seed": 3,
+            "dataset_size": 20,
+            "chunk_formats": ["json", "xml", "markdown"],
+            "distractor_chunks_per_format": 2,
+            "markdown_distractor_rows": 3,
+            "markdown_chunks_per_person": 2,
+            "markdown_target_row_probability": 0.5,
+            "ground_truth_field_range": [3, 5],
+            "distractor_pool_size": 16,
+            "distractor_pool_refresh_rate": 0.1,
+        }
+    )
+
+    generator = _CountingGenerator(seed=3)
+    samples = build_merge_quality_dataset(generator=generator, cfg=cfg)
+
+    distractors_per_sample = 2 * 2 + 2 * 3
+    assert generator.generated < cfg.dataset_size * (1 + distractors_per_sample) // 2
+
+    for sample in samples:
+        distractor_chunks = [
+            chunk
+            for chunk in sample.chunks
+            if chunk.format != "markdown" and chunk.owner_id == "distractor"
+        ]
+        assert len(distractor_chunks) == 2 * cfg.distractor_chunks_per_format
+
+        expected_attributes = _exclude_identifier_fields(
+            _flatten_attributes(sample.ground_truth.attributes)
+        )
+        chunk_attributes: dict[str, str] = {}
+        for chunk in sample.chunks:
+            if chunk.owner_id in {"target", "mixed"}:
+                chunk_attributes.update(
+                    _extract_chunk_attributes(chunk, sample.provided_identifiers)
+                )
+        assert chunk_attributes == expected_attributes
+
+
+def test_distractor_pool_must_hold_one_draw() -> None:
+    cfg = OmegaConf.create(
+        {
+            "random_seed": 3,
+            "dataset_size": 2,
+            "chunk_formats": ["json", "markdown"],
+            "distractor_chunks_per_format": 2,
+            "markdown_distractor_rows": 3,
+            "distractor_pool_size": 2,
+        }
+    )
+
+    # Every markdown table draws 3 distinct distractors from the pool
+    with pytest.raises(ValueError, match="at least the distractors drawn"):
+        MergeQualitySettings.from_config(cfg)
+
+
+def test_lazy_personas_only_generate_kept_fields() -> None:
+    cfg = OmegaConf.create(
+        {
+            "random_seed": 9,
+            "dataset_size": 10,
+            "chunk_formats": ["json", "xml", "markdown"],
+            "distractor_chunks_per_format": 1,
+            "markdown_distractor_rows": 1,
+            "markdown_chunks_per_person": 1,
+            "markdown_target_row_probability": 0.5,
+            "ground_truth_field_range": [3, 5],
+        }
+    )
+
+    generator = PersonalDataGenerator(seed=9, lazy=True)
+    generated: list[str] = []
+    generate_field = generator.generate_field
+
+    def _tracking_generate_field(persona_seed: int, path: str) -> str:
+        generated.append(path)
+        return generate_field(persona_seed, path)
+
+    generator.generate_field = _tracking_generate_field  # type: ignore[method-assign]
+    samples = build_merge_quality_dataset(generator=generator, cfg=cfg)
+
+    personas = cfg.dataset_size * (1 + 2 * cfg.distractor_chunks_per_format + 1)
+    assert len(generated) <= personas * (2 + 5)
+
+    replay = build_merge_quality_dataset(
+        generator=PersonalDataGenerator(seed=9, lazy=True), cfg=cfg
+    )
+    assert [sample.chunks for sample in replay] == [sample.chunks for sample in samples]
+
+    for sample in samples:
+        expected_attributes = _exclude_identifier_fields(
+            _flatten_attributes(sample.ground_truth.attributes)
+        )
+        assert 3 <= len(expected_attributes) <= 5
+        chunk_attributes: dict[str, str] = {}
+        for chunk in sample.chunks:
+            if chunk.owner_id in {"target", "mixed"}:
+                chunk_attributes.update(
+                    _extract_chunk_attributes(chunk, sample.provided_identifiers)
+                )
+        assert chunk_attributes == expected_attributes
+
+
+def test_iter_merge_quality_dataset_generates_targets_in_batches() -> None:
+    cfg = OmegaConf.create(
+        {
+            "random_seed": 5,
+            "dataset_size": 7,
+            "chunk_formats": ["json"],
+            "distractor_chunks_per_format": 0,
+            "ground_truth_field_range": [2, 2],
+            "target_batch_size": 3,
+        }
+    )
+
+    generator = _CountingGenerator(seed=5)
+    samples = iter_merge_quality_dataset(generator=generator, cfg=cfg)
+
+    next(samples)
+    assert generator.generated == 3
+    assert len(list(samples)) == cfg.dataset_size - 1
+    assert generator.generated == cfg.dataset_size
+
+    # Library callers stream in bounded batches unless they opt out with null
+    del cfg.target_batch_size
+    assert MergeQualitySettings.from_config(cfg).target_batch_size == 1000
+    cfg.target_batch_size = None
+    assert MergeQualitySettings.from_config(cfg).target_batch_size is None
+
+
+def test_per_sample_seeding_supports_random_access() -> None:
+    cfg = OmegaConf.create(
+        {
+            "random_seed": 21,
+            "dataset_size": 6,
+            "chunk_formats": ["json", "xml", "markdown"],
+            "distractor_chunks_per_format": 1,
+            "markdown_distractor_rows": 1,
+            "markdown_chunks_per_person": 1,
+            "ground_truth_field_range": [3, 5],
+            "seeding": "per_sample",
+        }
+    )
+    full = build_merge_quality_dataset(PersonalDataGenerator(seed=0), cfg)
+
+    tail_cfg = cfg.copy()
+    tail_cfg.sample_offset = 4
+    tail_cfg.dataset_size = 2
+    tail = build_merge_quality_dataset(PersonalDataGenerator(seed=0), tail_cfg)
+
+    assert tail == full[4:]
+    assert len({sample.provided_identifiers["ssn"] for sample in full}) == 6
+
+
+def test_hard_negatives_collide_with_target_on_chosen_keys() -> None:
+    generator = PersonalDataGenerator(seed=4)
+    corpus = generator.generate(n=300)
+    source = HardNegativeDistractors(corpus=corpus, mix={"ssn_area": 1.0})
+    rng = random.Random(0)
+
+    collisions = 0
+    for record in generator.generate(n=20):
+        target = PooledPersona(record=record, flat_fields={})
+        for distractor in source.draw(3, rng, target):
+            identifiers = distractor.record.unique_identifiers
+            assert identifiers["ssn"] != record.unique_identifiers["ssn"]
+            assert identifiers["name"] != record.unique_identifiers["name"]
+            collisions += identifiers["ssn"][:3] == record.unique_identifiers["ssn"][:3]
+    # A uniform draw shares the SSN area about once in 900 draws
+    assert collisions > 10
+
+    company = corpus[0].attributes["work"]["company"]
+    by_company = HardNegativeDistractors(corpus=corpus, mix={"work__company": 1.0})
+    target = PooledPersona(
+        record=generator.generate(n=1)[0], flat_fields={"work__company": company}
+    )
+    drawn = by_company.draw(5, rng, target)
+    assert all(entry.record.attributes["work"]["company"] == company for entry in drawn)
+
+
+def test_hard_negative_datasets_are_reproducible_per_sample() -> None:
+    cfg = OmegaConf.create(
+        {
+            "random_seed": 8,
+            "dataset_size": 5,
+            "chunk_formats": ["json", "xml", "markdown"],
+            "distractor_chunks_per_format": 2,
+            "markdown_distractor_rows": 2,
+            "ground_truth_field_range": [3, 6],
+            "seeding": "per_sample",
+            "hard_negative_corpus_size": 150,
+            "hard_negative_mix": {"name_token": 0.7, "random": 0.3},
+        }
+    )
+    full = build_merge_quality_dataset(PersonalDataGenerator(seed=0), cfg)
+
+    tail_cfg = cfg.copy()
+    tail_cfg.sample_offset = 3
+    tail_cfg.dataset_size = 2
+    tail = build_merge_quality_dataset(PersonalDataGenerator(seed=1), tail_cfg)
+
+    assert tail == full[3:]
+    shared_tokens = 0
+    for sample in full:
+        tokens = set(sample.ground_truth.unique_identifiers["name"].lower().split())
+        for chunk in sample.chunks:
+            if chunk.format == "json" and chunk.owner_id == "distractor":
+                name = json.loads(chunk.content)["data"].get("name", "")
+                shared_tokens += bool(tokens & set(name.lower().split()))
+    assert shared_tokens > 0
+
+    with pytest.raises(ValueError, match="mutually exclusive"):
+        MergeQualitySettings.from_config(
+            OmegaConf.merge(cfg, {"seeding": "sequential", "distractor_pool_size": 5})
+        )
+
+
 def _exclude_identifier_fields(flat: dict[str, str]) -> dict[str, str]:
     return {key: value for key, value in flat.items() if key and key not in _IDENTIFIER_TYPES}
 
@@ -169,3 +406,51 @@ def _xml_node_to_value(node: ET.Element) -> Any:
     if list(node):
         return {child.tag: _xml_node_to_value(child) for child in node}
     return node.text or ""
+
+
+def test_settings_object_matches_config_and_is_validated_eagerly() -> None:
+    cfg = OmegaConf.create(
+        {
+            "random_seed": 6,
+            "dataset_size": 3,
+            "chunk_formats": ["json", "xml"],
+            "distractor_chunks_per_format": 1,
+            "ground_truth_field_range": [2, 4],
+        }
+    )
+    settings = MergeQualitySettings.from_config(cfg)
+
+    from_cfg = build_merge_quality_dataset(PersonalDataGenerator(seed=6), cfg)
+    from_settings = build_merge_quality_dataset(PersonalDataGenerator(seed=6), settings)
+    assert from_cfg == from_settings
+
+    cfg.ground_truth_field_range = [5, 2]
+    generator = _CountingGenerator(seed=6)
+    with pytest.raises(ValueError, match="ground_truth_field_range"):
+        iter_merge_quality_dataset(generator=generator, cfg=cfg)
+    assert generator.generated == 0
+
+
+def test_compact_samples_round_trip_and_match_eager_generation() -> None:
+    cfg = OmegaConf.create(
+        {
+            "random_seed": 2,
+            "dataset_size": 3,
+            "chunk_formats": ["json", "xml", "markdown"],
+            "distractor_chunks_per_format": 1,
+            "markdown_distractor_rows": 1,
+            "ground_truth_field_range": [3, 6],
+            "distractor_pool_size": 4,
+        }
+    )
+
+    eager = build_merge_quality_dataset(PersonalDataGenerator(seed=2), cfg)
+    compact = build_merge_quality_dataset(
+        PersonalDataGenerator(seed=2, compact=True), cfg
+    )
+    assert compact == eager
+
+    for sample in eager:
+        packed = CompactSample.from_sample(sample)
+        assert packed.to_sample() == sample
+        assert packed.provided_identifiers == sample.provided_identifiers
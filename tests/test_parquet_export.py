@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from omegaconf import OmegaConf
+
+from slam_datagen.datasets import (
+    build_merge_quality_dataset,
+    write_merge_quality_parquet,
+)
+from slam_datagen.datasets.parquet import parquet_paths
+from slam_datagen.datasets.stats import stats_path
+from slam_datagen.personal_data import ATTRIBUTE_PATHS, PersonalDataGenerator
+from slam_datagen.schema import PERSONA_SCHEMA
+from slam_datagen.scripts.generate_merge_quality_dataset import (
+    generate_merge_quality_dataset,
+)
+
+CONFIG = {
+    "random_seed": 9,
+    "dataset_size": 5,
+    "chunk_formats": ["json", "xml"],
+    "distractor_chunks_per_format": 1,
+    "ground_truth_field_range": [2, 4],
+}
+
+
+def test_parquet_tables_hold_samples_and_chunks(tmp_path: Path) -> None:
+    pq = pytest.importorskip("pyarrow.parquet")
+    samples = build_merge_quality_dataset(
+        PersonalDataGenerator(seed=9), OmegaConf.create(CONFIG)
+    )
+
+    samples_path, chunks_path = write_merge_quality_parquet(
+        samples, tmp_path / "merge_quality.jsonl", row_group_size=2
+    )
+
+    assert samples_path.name == "merge_quality.samples.parquet"
+    assert pq.ParquetFile(samples_path).metadata.num_row_groups == 3
+    table = pq.read_table(samples_path).to_pylist()
+    assert [row["sample_id"] for row in table] == list(range(len(samples)))
+    for row, sample in zip(table, samples):
+        assert row["ssn"] == sample.ground_truth.unique_identifiers["ssn"]
+        assert dict(row["provided_identifiers"]) == sample.provided_identifiers
+        attributes = {
+            path: row[path] for path in ATTRIBUTE_PATHS if row[path] is not None
+        }
+        assert attributes == PERSONA_SCHEMA.flatten(sample.ground_truth.attributes)
+
+    chunks = pq.read_table(chunks_path).to_pylist()
+    assert [(row["sample_id"], row["content"]) for row in chunks] == [
+        (sample_id, chunk.content)
+        for sample_id, sample in enumerate(samples)
+        for chunk in sample.chunks
+    ]
+
+
+def test_parquet_tables_share_the_output_stem(tmp_path: Path) -> None:
+    output_file = tmp_path / "data.v2.jsonl"
+    samples_path, chunks_path = parquet_paths(output_file)
+
+    assert samples_path.name == "data.v2.samples.parquet"
+    assert chunks_path.name == "data.v2.chunks.parquet"
+    assert stats_path(output_file).name == "data.v2.stats.json"
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_script_exports_parquet_tables(tmp_path: Path, num_workers: int) -> None:
+    pq = pytest.importorskip("pyarrow.parquet")
+    cfg = OmegaConf.create(
+        {
+            **CONFIG,
+            "num_workers": num_workers,
+            "parquet_export": True,
+            "preview_samples": 0,
+            "output_file": str(tmp_path / "merge_quality.jsonl"),
+        }
+    )
+
+    generate_merge_quality_dataset(cfg)
+
+    assert pq.read_table(tmp_path / "merge_quality.samples.parquet").num_rows == 5
+    assert pq.read_table(tmp_path / "merge_quality.chunks.parquet").num_rows > 5
+
+
+@pytest.mark.parametrize("mode", ["parallel", "distributed"])
+def test_sharded_export_matches_single_process_ids(tmp_path: Path, mode: str) -> None:
+    pq = pytest.importorskip("pyarrow.parquet")
+    cfg = OmegaConf.create(
+        {
+            **CONFIG,
+            "dataset_size": 8,
+            "seeding": "per_sample",
+            "sample_offset": 3,
+            # Split outputs are merged split by split, not in sample order
+            "splits": {"train": 0.5, "test": 0.5},
+            "parquet_export": True,
+            "parquet_row_group_size": 3,
+            "preview_samples": 0,
+            "output_file": str(tmp_path / "single.jsonl"),
+        }
+    )
+    generate_merge_quality_dataset(cfg)
+
+    cfg.output_file = str(tmp_path / "sharded.jsonl")
+    if mode == "parallel":
+        cfg.num_workers = 3
+        generate_merge_quality_dataset(cfg)
+    else:
+        cfg.distributed = {"queue_dir": str(tmp_path / "queue"), "num_tasks": 3}
+        for role in ("plan", "work", "merge"):
+            cfg.distributed.role = role
+            generate_merge_quality_dataset(cfg)
+
+    for single, sharded in zip(
+        parquet_paths(tmp_path / "single.jsonl"),
+        parquet_paths(tmp_path / "sharded.jsonl"),
+    ):
+        assert pq.read_table(sharded).equals(pq.read_table(single))
+    samples = pq.read_table(parquet_paths(tmp_path / "sharded.jsonl")[0])
+    assert samples.column("sample_id").to_pylist() == list(range(3, 11))
+    assert not list(tmp_path.glob("sharded.shard-*"))
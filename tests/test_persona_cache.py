@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import gzip
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import pytest
+from omegaconf import OmegaConf
+
+from slam_datagen.datasets import build_merge_quality_dataset
+from slam_datagen.datasets.merge_quality import serialize_sample
+from slam_datagen.datasets.settings import MergeQualitySettings
+from slam_datagen.persona_cache import PersonaStream, persona_cache_path
+from slam_datagen.personal_data import Persona, PersonalDataGenerator
+
+CONFIG = {
+    "random_seed": 21,
+    "seeding": "streams",
+    "dataset_size": 6,
+    "chunk_formats": ["json", "xml", "markdown"],
+    "distractor_chunks_per_format": 1,
+    "markdown_distractor_rows": 2,
+    "ground_truth_field_range": [2, 5],
+}
+
+# Points of a sweep over settings that draw different numbers of personas
+SWEEP = (
+    {},
+    {"distractor_chunks_per_format": 2, "markdown_distractor_rows": 1},
+    {"chunk_formats": ["json"], "ground_truth_field_range": [1, 3]},
+)
+
+
+class CountingGenerator(PersonalDataGenerator):
+    """Counts the personas generated instead of read from the cache."""
+
+    generated = 0
+
+    def generate(self, n: int) -> list[Persona]:
+        self.generated += n
+        return super().generate(n)
+
+
+def _build(
+    overrides: dict[str, Any],
+    cache_dir: Path | None,
+    generator: PersonalDataGenerator | None = None,
+    **generator_options: Any,
+) -> list[dict[str, Any]]:
+    cfg = OmegaConf.create({**CONFIG, **overrides, "persona_cache_dir": cache_dir})
+    if generator is None:
+        generator = PersonalDataGenerator(seed=cfg.random_seed, **generator_options)
+    samples = build_merge_quality_dataset(generator, cfg)
+    return [serialize_sample(sample) for sample in samples]
+
+
+@pytest.mark.parametrize(
+    ("options", "settings"),
+    [
+        ({}, {}),
+        ({"compact": True}, {"distractor_pool_size": 8}),
+        ({"backend": "columnar"}, {"target_batch_size": 4}),
+        ({}, {"hard_negative_corpus_size": 10}),
+        ({}, {"unique_identifiers": True}),
+    ],
+)
+def test_cached_sweep_matches_uncached_runs(
+    tmp_path: Path, options: dict[str, Any], settings: dict[str, Any]
+) -> None:
+    targets = []
+    for point in SWEEP:
+        overrides = {**settings, **point}
+        expected = _build(overrides, None, **options)
+        assert _build(overrides, tmp_path, **options) == expected
+        targets.append([sample["provided_identifiers"] for sample in expected])
+    # Every point of the sweep reads the same target personas
+    assert targets[0] == targets[1] == targets[2]
+    assert len(list(tmp_path.iterdir())) == 1
+
+    # Once every stream is cached, the whole sweep runs without generating
+    for point in SWEEP:
+        generator = CountingGenerator(seed=CONFIG["random_seed"], **options)
+        _build({**settings, **point}, tmp_path, generator)
+        assert generator.generated == 0
+        assert generator._fake is None
+
+
+def test_stream_reads_blocks_in_any_batches(tmp_path: Path) -> None:
+    expected = PersonaStream(PersonalDataGenerator(), 4, "targets").generate(303)
+
+    recorder = PersonaStream(PersonalDataGenerator(), 4, "targets", tmp_path)
+    assert recorder.generate(3) + recorder.generate(300) == expected
+    assert (recorder.replayed, recorder.generated) == (0, 512)
+
+    replayer = PersonaStream(PersonalDataGenerator(), 4, "targets", tmp_path)
+    assert replayer.generate(303) == expected
+    assert (replayer.replayed, replayer.generated) == (303, 0)
+    # Plain JSON Lines: one line of values per persona of the block
+    (directory,) = tmp_path.iterdir()
+    with gzip.open(directory / "targets-000001.jsonl.gz", "rt") as handle:
+        assert len(handle.readlines()) == 256
+
+    # Other streams of the same seed are independent of this one
+    other = PersonaStream(PersonalDataGenerator(), 4, "distractors", tmp_path)
+    assert other.generate(3) != expected[:3]
+    assert other.generated == 256
+
+
+def test_cache_is_keyed_by_seed_and_backend(tmp_path: Path) -> None:
+    paths = {
+        persona_cache_path(tmp_path, PersonalDataGenerator(), 1),
+        persona_cache_path(tmp_path, PersonalDataGenerator(), 2),
+        persona_cache_path(tmp_path, PersonalDataGenerator(backend="columnar"), 1),
+        persona_cache_path(tmp_path, PersonalDataGenerator(), 1, block_size=64),
+        persona_cache_path(
+            tmp_path,
+            PersonalDataGenerator(backend="columnar", reference_date=date(2020, 1, 1)),
+            1,
+        ),
+    }
+    assert len(paths) == 5
+
+    with pytest.raises(ValueError):
+        PersonaStream(PersonalDataGenerator(lazy=True), 1, "targets", tmp_path)
+
+
+@pytest.mark.parametrize(
+    ("overrides", "message"),
+    [
+        ({"seeding": "sequential"}, "requires streams seeding"),
+        ({"seeding": "per_sample"}, "requires streams seeding"),
+        ({"lazy_attributes": True}, "lazy_attributes"),
+    ],
+)
+def test_settings_reject_uncacheable_runs(
+    tmp_path: Path, overrides: dict[str, Any], message: str
+) -> None:
+    cfg = OmegaConf.create({**CONFIG, **overrides, "persona_cache_dir": str(tmp_path)})
+    with pytest.raises(ValueError, match=message):
+        MergeQualitySettings.from_config(cfg)
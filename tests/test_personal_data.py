@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import re
+from datetime import date
+
+import pytest
+
+from slam_datagen.datasets.merge_quality import _flatten_attributes
+from slam_datagen.personal_data import ATTRIBUTE_PATHS, PersonalDataGenerator
+from slam_datagen.records import CompactPersona
+
+
+def test_generate_columns_rows_match_attribute_layout() -> None:
+    batch = PersonalDataGenerator(seed=11).generate_columns(50)
+
+    assert len(batch) == 50
+    rows = list(batch)
+    assert len(rows) == 50
+    for idx, row in enumerate(rows):
+        assert tuple(_flatten_attributes(row.attributes)) == ATTRIBUTE_PATHS
+        assert row.unique_identifiers["ssn"] == batch.column("ssn")[idx]
+        assert re.fullmatch(r"\d{3}-\d{2}-\d{4}", row.unique_identifiers["ssn"])
+    assert batch[-1] == rows[-1]
+
+
+def test_generate_columns_is_reproducible() -> None:
+    first = PersonalDataGenerator(seed=5).generate_columns(20)
+    second = PersonalDataGenerator(seed=5).generate_columns(20)
+    assert first.attributes == second.attributes
+    assert first.identifiers == second.identifiers
+
+
+def test_generate_columns_dates_follow_the_reference_date() -> None:
+    def dates(reference_date: date) -> tuple[list[str], list[str]]:
+        batch = PersonalDataGenerator(
+            seed=5, backend="columnar", reference_date=reference_date
+        ).generate_columns(200)
+        return (
+            batch.column("profile__date_of_birth"),
+            batch.column("bank_account__credit_card__expire"),
+        )
+
+    births, expiries = dates(date(2020, 6, 15))
+
+    assert dates(date(2020, 6, 15)) == (births, expiries)
+    assert max(births) <= "2020-06-15"
+    assert all(expire[3:] >= "20" for expire in expiries)
+    assert dates(date(2031, 1, 1))[0] != births
+
+
+def test_generate_columns_checksums_are_valid() -> None:
+    batch = PersonalDataGenerator(seed=3).generate_columns(500)
+
+    for number in batch.column("bank_account__credit_card__number"):
+        assert _luhn_valid(number), number
+    for iban in batch.column("bank_account__iban"):
+        rearranged = iban[4:] + iban[:4]
+        assert int("".join(str(int(char, 36)) for char in rearranged)) % 97 == 1
+    for aba in batch.column("bank_account__aba"):
+        digits = [int(char) for char in aba]
+        weights = [3, 7, 1] * 3
+        assert sum(d * w for d, w in zip(digits, weights)) % 10 == 0
+    for vin in batch.column("car__vin"):
+        assert _vin_check_char(vin) == vin[8], vin
+
+
+def test_columnar_backend_feeds_generate() -> None:
+    generator = PersonalDataGenerator(seed=2, backend="columnar")
+    personas = generator.generate(4)
+    assert len(personas) == 4
+    assert all(tuple(_flatten_attributes(p.attributes)) == ATTRIBUTE_PATHS for p in personas)
+
+    with pytest.raises(ValueError):
+        PersonalDataGenerator(seed=2, backend="unknown")
+
+
+def test_lazy_fields_do_not_depend_on_access_order() -> None:
+    first = PersonalDataGenerator(seed=4, lazy=True).generate(1)[0]
+    second = PersonalDataGenerator(seed=4, lazy=True).generate(1)[0]
+
+    assert first.field("car__vin") == second.materialize().attributes["car"]["vin"]
+    assert first.unique_identifiers == second.unique_identifiers
+    assert tuple(_flatten_attributes(first.attributes)) == ATTRIBUTE_PATHS
+
+
+def _luhn_valid(number: str) -> bool:
+    total = 0
+    for idx, char in enumerate(reversed(number)):
+        digit = int(char)
+        if idx % 2:
+            digit = digit * 2 - 9 if digit > 4 else digit * 2
+        total += digit
+    return total % 10 == 0
+
+
+def _vin_check_char(vin: str) -> str:
+    transliteration = {str(d): d for d in range(10)}
+    for offset, letters in ((64, "ABCDEFGH"), (73, "JKLMN"), (73, "PR"), (81, "STUVWXYZ")):
+        transliteration.update({char: ord(char) - offset for char in letters})
+    weights = [8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2]
+    remainder = sum(transliteration[c] * w for c, w in zip(vin, weights)) % 11
+    return "X" if remainder == 10 else str(remainder)
+
+
+def test_compact_personas_match_eager_personas() -> None:
+    for backend in ("faker", "columnar"):
+        eager = PersonalDataGenerator(seed=9, backend=backend).generate(n=3)
+        compact_generator = PersonalDataGenerator(seed=9, backend=backend, compact=True)
+        compact = compact_generator.generate(n=3)
+
+        assert [record.to_personal_data() for record in compact] == eager
+        assert [CompactPersona.from_personal_data(record) for record in eager] == compact
+        assert tuple(compact[0].flat_attributes) == ATTRIBUTE_PATHS
+        assert not hasattr(compact[0], "__dict__")
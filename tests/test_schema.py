@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import json
+import xml.etree.ElementTree as ET
+
+from slam_datagen.personal_data import PersonalDataGenerator
+from slam_datagen.schema import PERSONA_SCHEMA, AttributeSchema
+
+
+def test_flatten_and_unflatten_round_trip_generated_attributes() -> None:
+    persona = PersonalDataGenerator(seed=4).generate(n=1)[0]
+
+    flat = PERSONA_SCHEMA.flatten(persona.attributes)
+
+    assert PERSONA_SCHEMA.unflatten(flat) == persona.attributes
+    assert list(PERSONA_SCHEMA.unflatten(flat)) == list(persona.attributes)
+
+
+def test_json_object_matches_json_dumps_of_nested_fields() -> None:
+    fields = {
+        "contacts__social_networks__vk": "vk_user",
+        "ssn": "123-45-6789",
+        "contacts__email": 'quote" and ünïcode',
+        "custom__field": "compiled on first use",
+        "contacts__phone": "555-0100",
+    }
+
+    schema = AttributeSchema(["ssn", "contacts__email", "contacts__phone"])
+
+    rendered = schema.render_json_object(fields)
+    expected = json.dumps(
+        {"data": schema.unflatten(fields)}, indent=2, ensure_ascii=False
+    )
+
+    assert f'{{\n  "data": {rendered}\n}}' == expected
+    assert "custom__field" in schema
+
+
+def test_xml_body_is_sorted_and_escaped() -> None:
+    schema = AttributeSchema(["work__company", "home__address"])
+    fields = {
+        "work__company": "Smith & Sons <LLC>",
+        "home__address": "1 Main St",
+        "work__address": "2 Side St",
+    }
+
+    body = schema.render_xml_body(fields)
+    root = ET.fromstring(f"<record>\n{body}\n</record>")
+
+    assert [child.tag for child in root] == ["home", "work"]
+    assert [child.tag for child in root.find("work")] == ["address", "company"]
+    assert root.findtext("work/company") == fields["work__company"]
+    assert body.splitlines()[0] == "  <home>"
+
+
+def test_field_ids_do_not_depend_on_compile_order() -> None:
+    paths = ["work__company", "home__address", "contacts__email"]
+    schema = AttributeSchema(paths)
+    schema.compile("custom__field")
+    reordered = AttributeSchema(reversed(paths))
+
+    assert [schema.field_id(path) for path in paths] == [2, 1, 0]
+    assert [reordered.field_id(path) for path in paths] == [2, 1, 0]
+    # Paths compiled on first use are numbered after the declared ones
+    assert schema.field_id("custom__field") == 3
+    assert schema.path(3) == "custom__field"
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+
+import pytest
+
+from slam_datagen.datasets.merge_quality import Chunk, DatasetSample, serialize_sample
+from slam_datagen.io import (BlockWriter, ShardedWriter, check_byte_compatible,
+                             get_serializer, output_files)
+from slam_datagen.personal_data import PersonalData
+
+
+def _sample() -> DatasetSample:
+    return DatasetSample(
+        ground_truth=PersonalData(
+            unique_identifiers={"name": "Zoë Brontë", "ssn": "123-45-6789"},
+            attributes={"contacts": {"email": "zoe@example.com"}},
+        ),
+        provided_identifiers={"name": "Zoë Brontë", "ssn": "123-45-6789"},
+        chunks=[
+            Chunk(format="xml", owner_id="target", content='<a x="1">\n\t«ü»</a>'),
+            Chunk(format="json", owner_id="distractor", content="{}"),
+        ],
+    )
+
+
+def test_stdlib_serializer_is_byte_identical_to_json_dumps() -> None:
+    serializer = get_serializer("stdlib")
+    sample = _sample()
+
+    line = serializer.encode_merge_quality_sample(sample)
+    assert line == (json.dumps(serialize_sample(sample)) + "\n").encode("utf-8")
+
+    message = {"text": "Привет, как дела?", "type": "synthetic"}
+    assert serializer.encode_human_message(message) == (
+        json.dumps(message, ensure_ascii=False) + "\n"
+    ).encode("utf-8")
+
+
+@pytest.mark.parametrize("backend", ["orjson", "msgspec"])
+def test_optional_serializers_encode_the_same_documents(backend: str) -> None:
+    pytest.importorskip(backend)
+    serializer = get_serializer(backend)
+    sample = _sample()
+
+    line = serializer.encode_merge_quality_sample(sample)
+
+    assert line.endswith(b"\n") and line.count(b"\n") == 1
+    assert json.loads(line) == serialize_sample(sample)
+
+
+def test_unknown_serializer_is_rejected() -> None:
+    with pytest.raises(ValueError, match="Unsupported serializer"):
+        get_serializer("pickle")
+
+
+def test_only_stdlib_is_byte_compatible() -> None:
+    check_byte_compatible("stdlib", "sample_offset")
+    for backend in ("orjson", "msgspec"):
+        with pytest.raises(ValueError, match="sample_offset"):
+            check_byte_compatible(backend, "sample_offset")
+
+
+def test_block_writer_writes_all_lines_in_order(tmp_path: Path) -> None:
+    lines = [f"line {idx}\n".encode() for idx in range(25)]
+
+    with BlockWriter(tmp_path / "out" / "lines.jsonl", block_size=16) as writer:
+        for line in lines[:10]:
+            writer.write(line)
+        writer.flush()
+        assert (tmp_path / "out" / "lines.jsonl").read_bytes() == b"".join(lines[:10])
+        for line in lines[10:]:
+            writer.write(line)
+
+    assert writer.records == len(lines)
+    assert (tmp_path / "out" / "lines.jsonl").read_bytes() == b"".join(lines)
+
+
+def test_sharded_writer_rolls_over_and_writes_a_manifest(tmp_path: Path) -> None:
+    lines = [f"line {idx}\n".encode() for idx in range(25)]
+
+    with ShardedWriter(
+        tmp_path / "lines.jsonl", shard_records=10, first_index=100
+    ) as writer:
+        for line in lines:
+            writer.write(line)
+
+    manifest = json.loads(writer.path.read_text())
+    assert writer.path.name == "lines.manifest.json"
+    assert [shard["file"] for shard in manifest["shards"]] == [
+        "lines.part-00000.jsonl",
+        "lines.part-00001.jsonl",
+        "lines.part-00002.jsonl",
+    ]
+    assert [shard["sample_range"] for shard in manifest["shards"]] == [
+        [100, 110],
+        [110, 120],
+        [120, 125],
+    ]
+    assert manifest["records"] == len(lines)
+    files = output_files(writer.path)
+    assert b"".join(path.read_bytes() for path in files) == b"".join(lines)
+    for shard, path in zip(manifest["shards"], files):
+        assert shard["sha256"] == hashlib.sha256(path.read_bytes()).hexdigest()
+        assert shard["bytes"] == path.stat().st_size
+
+
+def test_sharded_writer_rolls_over_by_bytes(tmp_path: Path) -> None:
+    with ShardedWriter(tmp_path / "lines.jsonl", shard_bytes=20) as writer:
+        for idx in range(6):
+            writer.write(f"line {idx:04d}\n".encode())
+
+    manifest = json.loads(writer.path.read_text())
+    assert [shard["records"] for shard in manifest["shards"]] == [2, 2, 2]
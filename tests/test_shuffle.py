@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from omegaconf import OmegaConf
+
+from slam_datagen.datasets import write_human_messages_dataset
+from slam_datagen.io import open_output, output_files
+from slam_datagen.io.shuffle import shuffle_jsonl
+from slam_datagen.scripts.shuffle_dataset import shuffle_dataset
+
+MESSAGES = [{"text": f"message {idx}", "type": "synthetic"} for idx in range(200)]
+
+
+def _lines(path: Path) -> list[bytes]:
+    lines: list[bytes] = []
+    for file in output_files(path):
+        with open_output(file) as handle:
+            lines.extend(handle)
+    return lines
+
+
+def test_shuffle_is_a_seeded_permutation(tmp_path: Path) -> None:
+    source = write_human_messages_dataset(MESSAGES, tmp_path / "messages.jsonl")
+
+    first = shuffle_jsonl(source, tmp_path / "a.jsonl", seed=1, num_buckets=7)
+    second = shuffle_jsonl(source, tmp_path / "b.jsonl", seed=1, num_buckets=7)
+    other = shuffle_jsonl(source, tmp_path / "c.jsonl", seed=2, num_buckets=7)
+
+    assert first.read_bytes() == second.read_bytes()
+    assert first.read_bytes() != other.read_bytes()
+    assert _lines(first) != _lines(source)
+    assert sorted(_lines(first)) == sorted(_lines(source))
+    assert not [path for path in tmp_path.iterdir() if "shuffle" in path.name]
+
+
+def test_sharded_shuffle_has_no_sample_ranges(tmp_path: Path) -> None:
+    source = write_human_messages_dataset(MESSAGES, tmp_path / "messages.jsonl")
+
+    manifest = shuffle_jsonl(
+        source, tmp_path / "shuffled.jsonl", seed=1, num_buckets=3, shard_records=64
+    )
+
+    shards = json.loads(manifest.read_text())["shards"]
+    assert [shard["records"] for shard in shards] == [64, 64, 64, 8]
+    assert all("sample_range" not in shard for shard in shards)
+    assert sorted(_lines(manifest)) == sorted(_lines(source))
+
+
+def test_shuffle_script_reads_and_writes_compressed_shards(tmp_path: Path) -> None:
+    source = write_human_messages_dataset(
+        MESSAGES, tmp_path / "messages.jsonl", compression="gzip", shard_records=60
+    )
+    cfg = OmegaConf.create(
+        {
+            "random_seed": 3,
+            "input_file": str(source),
+            "output_file": str(tmp_path / "shuffled.jsonl"),
+            "bucket_bytes": 1024,
+            "output_compression": "gzip",
+        }
+    )
+
+    shuffle_dataset(cfg)
+
+    assert sorted(_lines(tmp_path / "shuffled.jsonl.gz")) == sorted(_lines(source))
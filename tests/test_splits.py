@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+from collections import Counter
+from pathlib import Path
+
+import pytest
+from omegaconf import OmegaConf
+
+from slam_datagen.datasets import write_human_messages_dataset
+from slam_datagen.io import output_files
+from slam_datagen.io.splits import SplitRouter
+from slam_datagen.scripts.generate_merge_quality_dataset import \
+    generate_merge_quality_dataset
+
+SPLITS = {"train": 0.6, "validation": 0.2, "test": 0.2}
+
+
+def test_router_is_stable_and_follows_ratios() -> None:
+    route = SplitRouter(SPLITS)
+    counts = Counter(route(f"key-{idx}") for idx in range(10000))
+
+    assert route("123-45-6789") == SplitRouter(SPLITS)("123-45-6789")
+    assert abs(counts["train"] / 10000 - 0.6) < 0.03
+    assert abs(counts["test"] / 10000 - 0.2) < 0.03
+
+
+@pytest.mark.parametrize("splits", [{}, {"train": 0.5}, {"train": 1.2, "test": -0.2}])
+def test_invalid_splits_are_rejected(splits: dict) -> None:
+    with pytest.raises(ValueError):
+        SplitRouter(splits)
+
+
+def test_human_messages_are_routed_by_text(tmp_path: Path) -> None:
+    messages = [
+        {"text": f"message {idx % 30}", "type": "synthetic"} for idx in range(90)
+    ]
+
+    index = write_human_messages_dataset(
+        messages, tmp_path / "messages.jsonl", splits=SPLITS
+    )
+
+    splits = json.loads(index.read_text())["splits"]
+    assert sum(split["records"] for split in splits.values()) == len(messages)
+    seen: dict[str, str] = {}
+    for name, split in splits.items():
+        for line in (tmp_path / split["file"]).read_text().splitlines():
+            assert seen.setdefault(json.loads(line)["text"], name) == name
+
+
+def test_sharded_splits_have_no_sample_ranges(tmp_path: Path) -> None:
+    messages = [{"text": f"message {idx}", "type": "synthetic"} for idx in range(40)]
+
+    index = write_human_messages_dataset(
+        messages, tmp_path / "messages.jsonl", splits=SPLITS, shard_records=5
+    )
+
+    splits = json.loads(index.read_text())["splits"]
+    for split in splits.values():
+        manifest = json.loads((tmp_path / split["file"]).read_text())
+        assert manifest["records"] == split["records"]
+        assert all("sample_range" not in shard for shard in manifest["shards"])
+
+
+def test_merge_quality_splits_match_across_worker_counts(tmp_path: Path) -> None:
+    cfg = OmegaConf.create(
+        {
+            "random_seed": 11,
+            "dataset_size": 12,
+            "chunk_formats": ["json"],
+            "distractor_chunks_per_format": 1,
+            "ground_truth_field_range": [2, 3],
+            "seeding": "per_sample",
+            "splits": SPLITS,
+            "preview_samples": 1,
+        }
+    )
+
+    outputs = []
+    for num_workers in (1, 3):
+        cfg.num_workers = num_workers
+        cfg.output_file = str(tmp_path / f"workers{num_workers}" / "mq.jsonl")
+        generate_merge_quality_dataset(cfg)
+        index = tmp_path / f"workers{num_workers}" / "mq.splits.json"
+        outputs.append(
+            {
+                name: (index.parent / split["file"]).read_bytes()
+                for name, split in json.loads(index.read_text())["splits"].items()
+            }
+        )
+        assert len(b"".join(outputs[-1].values()).splitlines()) == cfg.dataset_size
+        assert len(output_files(index)) == len(SPLITS)
+
+    assert outputs[0] == outputs[1]
+    route = SplitRouter(SPLITS)
+    for name, data in outputs[0].items():
+        for line in data.splitlines():
+            ssn = json.loads(line)["ground_truth"]["unique_identifiers"]["ssn"]
+            assert route(ssn) == name
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import random
+from pathlib import Path
+
+import pytest
+from omegaconf import OmegaConf
+
+from slam_datagen.datasets import build_merge_quality_dataset
+from slam_datagen.datasets.stats import MergeQualityStats
+from slam_datagen.personal_data import PersonalDataGenerator
+from slam_datagen.scripts.generate_merge_quality_dataset import \
+    generate_merge_quality_dataset
+from slam_datagen.utils.sketches import QuantileSketch
+
+CONFIG = {
+    "random_seed": 12,
+    "dataset_size": 8,
+    "chunk_formats": ["json", "xml", "markdown"],
+    "distractor_chunks_per_format": 1,
+    "markdown_distractor_rows": 1,
+    "markdown_chunks_per_person": 1,
+    "ground_truth_field_range": [2, 5],
+    "seeding": "per_sample",
+}
+
+
+def test_quantile_sketch_is_accurate_and_mergeable() -> None:
+    rng = random.Random(0)
+    values = [rng.lognormvariate(5, 1) for _ in range(5000)]
+    whole, left, right = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for idx, value in enumerate(values):
+        whole.add(value)
+        (left if idx % 2 else right).add(value)
+    left.merge(QuantileSketch.from_dict(json.loads(json.dumps(right.to_dict()))))
+
+    ordered = sorted(values)
+    for q in (0.1, 0.5, 0.99):
+        exact = ordered[int(q * (len(values) - 1))]
+        assert whole.quantile(q) == pytest.approx(exact, rel=0.02)
+        assert left.quantile(q) == whole.quantile(q)
+
+
+def test_stats_count_samples_and_merge() -> None:
+    samples = build_merge_quality_dataset(
+        PersonalDataGenerator(seed=12), OmegaConf.create(CONFIG)
+    )
+    whole, first, second = MergeQualityStats(), MergeQualityStats(), MergeQualityStats()
+    for idx, sample in enumerate(samples):
+        whole.update(sample)
+        (first if idx < 3 else second).update(sample)
+    first.merge(MergeQualityStats.from_dict(second.to_dict()))
+
+    data = whole.to_dict()
+    assert data == first.to_dict()
+    assert data["samples"] == len(samples)
+    assert sum(data["field_counts"].values()) == len(samples)
+    assert set(map(int, data["field_counts"])) <= {2, 3, 4, 5}
+    chunks = sum(len(sample.chunks) for sample in samples)
+    assert sum(sum(owners.values()) for owners in data["chunks"].values()) == chunks
+    assert sum(data["summary"]["owner_ratio"].values()) == pytest.approx(1.0)
+
+
+def test_parallel_stats_match_streaming_stats(tmp_path: Path) -> None:
+    cfg = OmegaConf.create({**CONFIG, "collect_stats": True, "preview_samples": 0})
+
+    stats = []
+    for num_workers in (1, 3):
+        cfg.num_workers = num_workers
+        cfg.output_file = str(tmp_path / f"workers{num_workers}" / "mq.jsonl")
+        generate_merge_quality_dataset(cfg)
+        stats.append(
+            json.loads(
+                (tmp_path / f"workers{num_workers}" / "mq.stats.json").read_text()
+            )
+        )
+
+    assert stats[0] == stats[1]
+    assert sorted(p.name for p in (tmp_path / "workers3").iterdir()) == [
+        "mq.jsonl",
+        "mq.stats.json",
+    ]
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+from omegaconf import OmegaConf
+
+from slam_datagen.datasets import (
+    build_merge_quality_dataset,
+    write_merge_quality_dataset,
+)
+from slam_datagen.datasets.validation import (
+    parse_markdown_chunk,
+    validate_merge_quality_dataset,
+)
+from slam_datagen.personal_data import PersonalDataGenerator
+from slam_datagen.scripts.validate_merge_quality_dataset import validate_dataset
+
+CONFIG = {
+    "random_seed": 5,
+    "dataset_size": 12,
+    "chunk_formats": ["json", "xml", "markdown"],
+    "distractor_chunks_per_format": 1,
+    "markdown_distractor_rows": 2,
+    "markdown_chunks_per_person": 2,
+    "ground_truth_field_range": [3, 6],
+}
+
+
+def _write_dataset(path: Path, corrupt: bool = False) -> Path:
+    cfg = OmegaConf.create(CONFIG)
+    samples = build_merge_quality_dataset(PersonalDataGenerator(seed=5), cfg)
+    output = write_merge_quality_dataset(samples, path, compression="gzip")
+    if not corrupt:
+        return output
+    # Drop a ground-truth field from the JSON target chunk of sample 3
+    plain = path.with_name("corrupt.jsonl")
+    lines = [json.loads(line) for line in _read_lines(output)]
+    for chunk in lines[3]["chunks"]:
+        if chunk["format"] == "json" and chunk["owner_id"] == "target":
+            document = json.loads(chunk["content"])
+            dropped = next(
+                key for key in document["data"] if key not in ("name", "ssn")
+            )
+            del document["data"][dropped]
+            chunk["content"] = json.dumps(document, indent=2)
+            break
+    else:
+        raise AssertionError("sample 3 has no JSON target chunk")
+    lines[5]["chunks"][0]["content"] = "<record>"
+    plain.write_text("".join(json.dumps(line) + "\n" for line in lines))
+    return plain
+
+
+def _read_lines(path: Path) -> list[bytes]:
+    with gzip.open(path) as handle:
+        return list(handle)
+
+
+def test_generated_dataset_is_consistent(tmp_path: Path) -> None:
+    output = _write_dataset(tmp_path / "dataset.jsonl")
+
+    report = validate_merge_quality_dataset(output, num_workers=2, task_size=5)
+
+    assert report.samples == CONFIG["dataset_size"]
+    assert report.ok, report.violations
+
+
+def test_violations_are_reported_with_sample_indices(tmp_path: Path) -> None:
+    output = _write_dataset(tmp_path / "dataset.jsonl", corrupt=True)
+
+    report = validate_merge_quality_dataset(output, task_size=4)
+
+    assert report.counts["missing_field"] == 1
+    assert report.counts["malformed_chunk"] == 1
+    assert {(v.sample_index, v.check) for v in report.violations} == {
+        (3, "missing_field"),
+        (5, "malformed_chunk"),
+    }
+    assert report.violating_samples == 2
+
+
+def test_markdown_cells_may_span_lines() -> None:
+    content = "\n".join(
+        [
+            "| ssn | home__address | work__company |",
+            "| --- | --- | --- |",
+            "| 111-22-3333 | 1 Main St\nSpringfield |  |",
+            "| 444-55-6666 |  | ACME |",
+        ]
+    )
+
+    records = parse_markdown_chunk(content)
+
+    assert [record.fields for record in records] == [
+        {"ssn": "111-22-3333", "home__address": "1 Main St\nSpringfield"},
+        {"ssn": "444-55-6666", "work__company": "ACME"},
+    ]
+    assert records[0].identifier_value == "111-22-3333"
+
+
+def test_validation_script_writes_report_and_fails(tmp_path: Path) -> None:
+    output = _write_dataset(tmp_path / "dataset.jsonl", corrupt=True)
+    report_file = tmp_path / "report.json"
+    cfg = OmegaConf.create({"input_file": str(output), "report_file": str(report_file)})
+
+    with pytest.raises(SystemExit):
+        validate_dataset(cfg)
+
+    report = json.loads(report_file.read_text())
+    assert report["samples"] == CONFIG["dataset_size"]
+    assert report["counts"] == {"malformed_chunk": 1, "missing_field": 1}
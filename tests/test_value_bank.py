@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from slam_datagen.datasets.merge_quality import _flatten_attributes
+from slam_datagen.personal_data import (ATTRIBUTE_PATHS, PersonalDataGenerator,
+                                        produce_field)
+from slam_datagen.records import CompactPersona
+from slam_datagen.value_bank import (BANK_FIELDS, ValueBankSampler, build_value_banks,
+                                     open_value_banks)
+
+
+@pytest.fixture(scope="module")
+def bank_dir(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    directory = tmp_path_factory.mktemp("banks")
+    build_value_banks(directory, size=50, seed=7, backend="columnar", batch_size=16)
+    return directory
+
+
+def test_banks_round_trip_generated_values(tmp_path: Path) -> None:
+    fields = ("name", "car__vin")
+    build_value_banks(tmp_path, size=20, seed=1, fields=fields, batch_size=8)
+    generator = PersonalDataGenerator(seed=1)
+    expected_names = [produce_field(generator.fake, "name") for _ in range(8)]
+
+    banks = open_value_banks(tmp_path)
+    assert set(banks) == set(fields)
+    assert len(banks["name"]) == 20
+    # The first batch of names is drawn before any VIN
+    assert [banks["name"][idx] for idx in range(8)] == expected_names
+    assert banks["name"].take(np.arange(8)) == expected_names
+
+
+def test_value_bank_backend_samples_bank_values(bank_dir: Path) -> None:
+    banks = open_value_banks(bank_dir)
+    pools = {
+        path: {bank[idx] for idx in range(len(bank))} for path, bank in banks.items()
+    }
+    generator = PersonalDataGenerator(
+        seed=3, backend="value_bank", value_bank_dir=bank_dir
+    )
+
+    personas = generator.generate(10)
+    for persona in personas:
+        flat = _flatten_attributes(persona.attributes)
+        assert tuple(flat) == ATTRIBUTE_PATHS
+        assert all(value in pools[path] for path, value in flat.items())
+        assert all(
+            value in pools[name] for name, value in persona.unique_identifiers.items()
+        )
+    assert generator.generate_identifier("ssn") in pools["ssn"]
+    # Faker is never set up
+    assert generator._fake is None
+
+    again = PersonalDataGenerator(seed=3, backend="value_bank", value_bank_dir=bank_dir)
+    assert again.generate(10) == personas
+    again.reseed(3)
+    assert again.generate(10) == personas
+
+
+def test_value_bank_backend_compact_records(bank_dir: Path) -> None:
+    compact = PersonalDataGenerator(
+        seed=5, backend="value_bank", value_bank_dir=bank_dir, compact=True
+    ).generate(3)
+    eager = PersonalDataGenerator(
+        seed=5, backend="value_bank", value_bank_dir=bank_dir
+    ).generate(3)
+    assert all(isinstance(record, CompactPersona) for record in compact)
+    assert [record.to_personal_data() for record in compact] == eager
+
+
+def test_value_bank_backend_requires_complete_banks(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        PersonalDataGenerator(seed=1, backend="value_bank")
+    with pytest.raises(ValueError):
+        ValueBankSampler(tmp_path)
+
+    build_value_banks(tmp_path, size=4, seed=1, fields=BANK_FIELDS[:2])
+    with pytest.raises(ValueError, match="lacks fields"):
+        ValueBankSampler(tmp_path)
+    with pytest.raises(ValueError):
+        build_value_banks(tmp_path, size=4, fields=["unknown"])
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+from slam_datagen.utils.work_queue import WorkQueue
+
+
+def _planned_queue(root: Path, num_tasks: int = 2) -> WorkQueue:
+    queue = WorkQueue(root, stale_after=60)
+    queue.plan(
+        job={"name": "test"}, payloads=[{"idx": idx} for idx in range(num_tasks)]
+    )
+    return queue
+
+
+def test_claims_are_exclusive_and_completion_is_recorded(tmp_path: Path) -> None:
+    queue = _planned_queue(tmp_path)
+
+    first = queue.claim("a")
+    second = queue.claim("b")
+    assert first is not None and second is not None
+    assert first.index != second.index
+    assert queue.claim("c") is None
+
+    queue.complete(first, {"worker_id": "a"})
+    queue.release(second)
+    assert queue.pending() == [second.index]
+    assert queue.results() == {first.index: {"worker_id": "a"}}
+
+    retried = queue.claim("c")
+    assert retried is not None and retried.index == second.index
+
+
+def test_stale_claims_are_taken_over(tmp_path: Path) -> None:
+    queue = _planned_queue(tmp_path, num_tasks=1)
+    task = queue.claim("crashed")
+    assert task is not None
+    assert queue.claim("b") is None
+
+    lock_path = tmp_path / "locks" / "task-00000.lock"
+    expired = time.time() - 120
+    os.utime(lock_path, (expired, expired))
+
+    recovered = queue.claim("b")
+    assert recovered is not None and recovered.index == task.index
+    assert "crashed" not in lock_path.read_text()
+    assert sorted(p.name for p in lock_path.parent.iterdir()) == [lock_path.name]
+
+
+def test_previous_owner_leaves_a_taken_over_claim_alone(tmp_path: Path) -> None:
+    queue = _planned_queue(tmp_path, num_tasks=1)
+    stalled = queue.claim("stalled")
+    assert stalled is not None and queue.heartbeat(stalled)
+
+    lock_path = tmp_path / "locks" / "task-00000.lock"
+    expired = time.time() - 120
+    os.utime(lock_path, (expired, expired))
+    recovered = queue.claim("b")
+    assert recovered is not None
+    os.utime(lock_path, (expired, expired))
+
+    # The stalled worker resumes: its heartbeat, completion and release must
+    # not refresh, finish or free the new claim
+    assert not queue.heartbeat(stalled)
+    assert lock_path.stat().st_mtime == expired
+    assert not queue.complete(stalled, {"worker_id": "stalled"})
+    queue.release(stalled)
+    assert lock_path.exists()
+    assert queue.pending() == [0]
+
+    assert queue.heartbeat(recovered)
+    assert queue.complete(recovered, {"worker_id": "b"})
+    assert queue.results() == {0: {"worker_id": "b"}}
+    assert not list(lock_path.parent.iterdir())